@@ -1,186 +1,342 @@
-from flask import Flask, request, Response
-from twilio.twiml.voice_response import VoiceResponse, Gather
-from twilio.rest import Client
-import requests
+from flask import Flask, request, Response, g, url_for
+from html import escape
 import os
 import json
 import re
-from typing import Dict
-from datetime import datetime
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from session_store import create_session_store
+from write_behind import WriteBehind, WriteBehindSessionStore
+from call_log import create_call_log
+from call_analytics import CallAnalytics
+from pms import create_property_repository
+from llm_client import create_llm_client
+from model_router import Route
+from conversation import FALLBACK_REPLY, create_pipeline, is_goodbye
+from tenants import create_tenant_registry
+from config import LANGUAGES
+from turn_pipeline import TurnPipeline
+from voice_stream import stream_reply, text_message, end_message
+from metrics import REGISTRY, CallSidFilter, bind_call, current_call, inc, observe, payload_sampled, span, span_summary
 
 app = Flask(__name__)
 
 # Configure logging for production
 import logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s [%(call_sid)s] %(name)s: %(message)s')
+for handler in logging.getLogger().handlers:
+    handler.addFilter(CallSidFilter())  # Every log line carries the CallSid it belongs to
 logger = logging.getLogger(__name__)
 
+# Guest speech and LLM payloads are only logged for this fraction of calls (default 0: never)
+LOG_PAYLOAD_RATE = float(os.getenv('LOG_PAYLOAD_RATE', 0))
+payload_logger = logging.getLogger('hotel.payloads')
+
 # Use environment variables for secrets
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')  # Optional, for outbound if needed
-client_twilio = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+_twilio_client = None
+
+def twilio_client():
+    """Twilio REST client for outbound use, built on first call (webhooks only need TwiML)."""
+    global _twilio_client
+    if _twilio_client is None:
+        from twilio.rest import Client
+        _twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return _twilio_client
 
 XAI_API_KEY = os.getenv('XAI_API_KEY')
 if not XAI_API_KEY:
     raise ValueError("XAI_API_KEY environment variable not set")
 
-XAI_API_URL = "https://api.x.ai/v1/chat/completions"
-XAI_HEADERS = {
-    "Authorization": f"Bearer {XAI_API_KEY}",
-    "Content-Type": "application/json"
-}
-
-# Define hotel services and their descriptions
-SERVICES: Dict[int, tuple] = {
-    1: ("room service", "Handle food and drink orders for the room. Confirm details, use room number, suggest items."),
-    2: ("front desk", "Assist with check-in, check-out, billing, and general inquiries. Check room status/balance."),
-    3: ("concierge", "Provide recommendations for local attractions, reservations, and transportation. Personalize based on room/guest."),
-    4: ("housekeeping", "Schedule cleaning, request amenities like towels or extra linens. Confirm room and timing."),
-    5: ("maintenance", "Handle maintenance requests like AC, plumbing, or room repairs. Schedule and confirm.")
-}
-
-# Known caller numbers to names (add more as needed; format +1xxxxxxxxxx)
-KNOWN_CALLERS = {
-    "+19496693870": "Saeed",  # Your number
-    # Add others: "+15551234567": "John",
-}
-
-# Simulated hotel data (expand to DB in production)
-HOTEL_DATA = {
-    "101": {"status": "checked_in", "balance": 50.00, "guest": "Saeed"},
-    "102": {"status": "checked_out", "balance": 0.00, "guest": "John"},
-    # Add more rooms
-}
-
-# Language config: lang code, voice, prompts (auto-detect from speech)
-LANGUAGES = {
-    1: {"lang": "en-US", "voice": "polly.Amy-Neural"},  # Default
-    2: {"lang": "es-ES", "voice": "polly.Mateo-Neural"},
-    3: {"lang": "fr-FR", "voice": "polly.Bryan-Neural"},
-    4: {"lang": "de-DE", "voice": "polly.Hans-Neural"},
-    5: {"lang": "it-IT", "voice": "polly.Giorgio-Neural"},
-    6: {"lang": "ja-JP", "voice": "polly.Mizuki-Neural"}
-}
-
-# Language detection keywords (simple, based on common words)
-LANGUAGE_KEYWORDS = {
-    2: ['hola', 'por favor', 'gracias', 'español', 'es'],
-    3: ['bonjour', 's\'il vous plaît', 'français', 'fr'],
-    4: ['hallo', 'bitte', 'deutsch', 'de'],
-    5: ['ciao', 'per favore', 'italiano', 'it'],
-    6: ['konnichiwa', 'arigatou', '日本語', 'ja']
-}
-
-STATE_FILE = '/tmp/conversations.json'  # Persistent state file
-CALL_LOGS_FILE = '/tmp/call_logs.json'  # Log file for dashboard
-
-def load_state():
-    """Load conversations from file."""
-    try:
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
-def save_state(state):
-    """Save conversations to file."""
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f)
-
-def load_call_logs():
-    """Load call logs from file."""
-    try:
-        with open(CALL_LOGS_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+# Pooled xAI client (XAI_API_URL and LLM_* env vars tune endpoint, deadlines, retries, hedging)
+llm = create_llm_client(XAI_API_KEY)
+
+# Voice mode: 'gather' (default) uses <Gather> turns; 'stream' hands the conversation to a
+# ConversationRelay websocket at /relay that speaks each reply sentence as soon as it is generated
+VOICE_MODE = os.getenv('VOICE_MODE', 'gather').lower()
+
+# Deferred replies: /handle_speech queues the LLM turn and Twilio polls /speech_reply for it
+DEFERRED_REPLIES = os.getenv('DEFERRED_REPLIES', '1') == '1'
+POLL_WAIT = float(os.getenv('REPLY_POLL_WAIT', 3.0))  # Seconds each poll waits for the reply
+MAX_POLLS = int(os.getenv('REPLY_MAX_POLLS', 4))  # Polls before giving up with the fallback reply
+STORE_POLL_INTERVAL = 0.1  # Seconds between session reads when the turn runs in another worker
+turns = TurnPipeline(int(os.getenv('TURN_WORKERS', 8)), int(os.getenv('TURN_MAX_IN_FLIGHT', 16)))
+
+# Speculative first turn: when the service-selection utterance already asks for something ("room service,
+# a hamburger"), its reply is generated while the "Connected to..." prompt plays, ready for the guest's repeat
+SPECULATIVE_TURNS = os.getenv('SPECULATIVE_TURNS', '1') == '1'
+
+# Write-behind persistence: state, call-log and post-call writes are queued and stored by a background
+# thread (coalesced per CallSid, batched per flush), so webhook latency doesn't depend on storage speed
+persistence = None
+if os.getenv('WRITE_BEHIND', '1') == '1':
+    persistence = WriteBehind(float(os.getenv('WRITE_BEHIND_INTERVAL', 0.05)), int(os.getenv('WRITE_BEHIND_BATCH', 500)),
+                              int(os.getenv('WRITE_BEHIND_MAX_PENDING', 10000)))
+
+# Per-call conversation state (SESSION_BACKEND=sqlite to share across workers)
+sessions = create_session_store()
+if persistence:
+    sessions = WriteBehindSessionStore(sessions, persistence)
+
+# Append-only call log for the dashboard (segments + index under CALL_LOG_DIR)
+call_log = create_call_log()
+
+# Dashboard rollups and filter indexes, folded in incrementally from the call log
+analytics = CallAnalytics(call_log)
+
+# Room/guest records from the PMS (PMS_BACKEND), behind a read-through TTL cache
+properties = create_property_repository()
+
+def log_payload(label, payload):
+    """Log conversation content, only for calls picked by LOG_PAYLOAD_RATE sampling."""
+    if payload_sampled(current_call(), LOG_PAYLOAD_RATE):
+        payload_logger.info("%s: %s", label, payload)
+
+# The turn logic shared with main.py (console and batch replay), from the same settings:
+# - TwiML precompiled per language from config prompts, loaded from the TWIML_SNAPSHOT file while it
+#   matches the prompts (written by `python twiml_templates.py`)
+# - service-selection vocabularies and the caller-language tracker (script detection + trigram model,
+#   with hysteresis), folded into running per-call features stored in the session as conv['analysis']
+# - prompt assembly within PROMPT_TOKEN_BUDGET; older turns fold into a rolling summary kept in the session
+# - tiered routing: thanks/confirmations and balance/status questions are answered from templates, short
+#   focused turns go to LLM_FAST_MODEL, and only open-ended or long turns reach LLM_MODEL (MODEL_ROUTING=0:
+#   always LLM_MODEL)
+# - replies to a service's repeated opening questions, cached by service, language and normalized utterance
+# That is the default hotel. With TENANTS_DIR, a call to a number in a hotel profile gets that hotel's own
+# pipeline (services, prompts, languages, vocabularies, PMS), built on first use and cached (tenants.py)
+tenants = create_tenant_registry(create_pipeline(llm, properties, log_payload=log_payload))
 
 def save_call_log(log_entry):
-    """Save call log entry."""
-    logs = load_call_logs()
-    logs.append(log_entry)
-    with open(CALL_LOGS_FILE, 'w') as f:
-        json.dump(logs, f)
-
-def detect_language(speech_result):
-    """Detect language from speech_result keywords."""
-    speech_lower = speech_result.lower()
-    for lang_id, keywords in LANGUAGE_KEYWORDS.items():
-        if any(keyword in speech_lower for keyword in keywords):
-            return lang_id
-    return 1  # Default English
+    """Append a call log entry (stamped now, written by the write-behind queue when enabled)."""
+    log_entry.setdefault('timestamp', datetime.now().isoformat())
+    if persistence:
+        persistence.submit(call_log.append_many, log_entry)
+    else:
+        call_log.append(log_entry)
+
+def log_turn(call_sid, conv, speech_result, ai_reply):
+    """Record one conversation turn, with the analyzer's features, for the dashboard."""
+    analysis = conv.get('analysis') or {}
+    last_reply = conv.get('last_reply') or {}
+    save_call_log({
+        'event': 'turn',
+        'call_sid': call_sid,
+        'hotel': conv.get('hotel'),
+        'from': conv.get('from'),
+        'service': conv.get('service'),
+        'speech': speech_result,
+        'ai_reply': ai_reply,
+        'lang': conv['lang'],
+        'turn': analysis.get('turns'),
+        'escalation': analysis.get('escalation'),
+        'intent': analysis.get('intent'),
+        'reply_source': last_reply.get('source'),
+        'llm_ms': last_reply.get('llm_ms'),
+        'route': last_reply.get('route'),
+        'route_reason': last_reply.get('route_reason'),
+    })
+
+def end_call(call_sid, conv, outcome):
+    """Forget the call's state and record how it ended (post-call record for the dashboard)."""
+    clear_state(call_sid)
+    if 'from' not in conv:
+        return  # No state left (already ended or expired): nothing to record
+    started = conv.get('timestamp')
+    save_call_log({
+        'event': 'call_end',
+        'call_sid': call_sid,
+        'hotel': conv.get('hotel'),
+        'from': conv.get('from'),
+        'service': conv.get('service'),
+        'lang': conv['lang'],
+        'outcome': outcome,
+        'turns': (conv.get('analysis') or {}).get('turns'),
+        'duration_s': round((datetime.now() - datetime.fromisoformat(started)).total_seconds(), 1) if started else None,
+    })
+
+def log_escalation(call_sid, conv):
+    """Record a hand-off to staff for the dashboard's escalation rate."""
+    inc('hotel_escalations_total')
+    save_call_log({
+        'event': 'escalation',
+        'call_sid': call_sid,
+        'hotel': conv.get('hotel'),
+        'from': conv.get('from'),
+        'service': conv.get('service'),
+        'lang': conv['lang'],
+        'escalation': conv['analysis'].get('escalation'),
+    })
 
 def get_state(call_sid):
     """Get or create state for call."""
-    all_state = load_state()
-    if call_sid not in all_state:
-        all_state[call_sid] = {'messages': [], 'lang': 1, 'room_number': None, 'caller_name': 'guest', 'timestamp': datetime.now().isoformat()}
-    return all_state[call_sid]
+    with span('state_load'):
+        state = sessions.get(call_sid)
+    if state is None:
+        state = dict(g.pipeline.new_state(), timestamp=datetime.now().isoformat())
+    return state
 
 def save_state_update(call_sid, state):
     """Update and save state."""
-    all_state = load_state()
-    all_state[call_sid] = state
-    save_state(all_state)
-
-def get_ai_response(messages, room_number=None, service_name=None):
-    """Get response from xAI Grok with context."""
-    # Limit history to last 10 messages for token efficiency
-    if len(messages) > 10:
-        messages = messages[-10:]
-    
-    # Enhanced system prompt for smarter responses
-    base_prompt = f"You are a smart, friendly hotel assistant powered by Grok-3. Respond briefly, engagingly, and helpfully. Use context from previous messages."
-    if room_number:
-        room_data = get_room_data(room_number)
-        base_prompt += f" Guest is in room {room_number}. {room_data['guest']}, status: {room_data['status']}, balance: ${room_data['balance']}. Reference if relevant."
-    if service_name:
-        base_prompt += f" You are assisting with {service_name}."
-    if any(keyword in ' '.join([m['content'].lower() for m in messages]) for keyword in ['human', 'manager', 'person', 'complaint', 'issue']):
-        base_prompt += " The user wants a human—escalate politely."
-    messages.insert(0, {"role": "system", "content": base_prompt})
-    
-    payload = {
-        "model": "grok-3",
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": 200  # Shorter for voice
-    }
+    with span('state_save'):
+        sessions.put(call_sid, state)
+
+def clear_state(call_sid):
+    """Forget state for a finished call."""
+    with span('state_save'):
+        sessions.delete(call_sid)
+        sessions.delete(speculation_key(call_sid))
+
+def pending_turn_current(call_sid, turn_id):
+    """True if the stored call state still waits on this pending turn (the poll hasn't given up on it)."""
+    with span('state_load'):
+        stored = sessions.get(call_sid)
+    pending = (stored or {}).get('pending_turn')
+    return bool(pending) and pending.get('id') == turn_id and pending['reply'] is None
+
+def run_deferred_turn(call_sid, conv):
+    """Background job: get the LLM reply for conv's pending turn and store it for /speech_reply.
+
+    A job that starts or finishes after /speech_reply gave up on its turn (queued behind others, or a slow
+    reply) is dropped, so it can't overwrite the fallback turn or a newer pending turn.
+    """
+    bind_call(call_sid)
+    pipeline = tenants.get(conv.get('hotel'))
+    turn_id = conv['pending_turn']['id']
+    if not pending_turn_current(call_sid, turn_id):
+        logger.warning("Deferred turn abandoned before it started; skipped")
+        inc('hotel_turns_stale_total')
+        return
+    try:
+        ai_reply = None
+        if conv['pending_turn'].get('speculative'):
+            ai_reply = await_speculation(call_sid, conv, llm.deadline)
+        if ai_reply is None:
+            route = Route(**conv['pending_turn']['route'])
+            ai_reply = pipeline.llm_reply(conv, route, pipeline.analyzer.escalation_hint(conv.get('analysis')))
+    except Exception:
+        logger.exception("Deferred turn failed")
+        ai_reply = FALLBACK_REPLY
+        conv['last_reply'] = {'source': 'fallback', 'llm_ms': None}
+    conv['messages'].append({"role": "assistant", "content": ai_reply})
+    pipeline.observe(conv, 'assistant', ai_reply)
+    conv['pending_turn']['reply'] = ai_reply
+    if not pending_turn_current(call_sid, turn_id):
+        logger.warning("Deferred turn finished after the poll gave up; reply dropped")
+        inc('hotel_turns_stale_total')
+        return
+    save_state_update(call_sid, conv)
+    log_turn(call_sid, conv, conv['pending_turn']['speech'], ai_reply)
+    logger.info("Deferred turn done [%s]", span_summary())
+
+def speculation_key(call_sid):
+    """Session-store key of a call's speculative reply, kept apart so the job never overwrites live call state."""
+    return f"{call_sid}:speculative"
+
+def start_speculation(call_sid, conv, speech_result, request_words):
+    """Queue the first turn's LLM call for a request heard at service selection."""
+    speculative = dict(conv, messages=[{"role": "user", "content": speech_result}])
+    if turns.submit(speculation_key(call_sid), run_speculative_turn, call_sid, speculative):
+        conv['speculation'] = request_words
+        inc('hotel_speculative_turns_total', result='started')
+
+def run_speculative_turn(call_sid, conv):
+    """Background job: answer the service-selection request and store the reply under speculation_key."""
+    bind_call(call_sid)
     try:
-        print(f"xAI Payload: {payload}")  # Debug: Log payload
-        response = requests.post(XAI_API_URL, headers=XAI_HEADERS, json=payload, timeout=10)
-        print(f"xAI Response Status: {response.status_code}")  # Debug: Log status
-        print(f"xAI Response Text: {response.text}")  # Debug: Log full response
-        response.raise_for_status()
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
-    except requests.exceptions.RequestException as e:
-        print(f"xAI Request Error: {e}")  # Debug: Log request error
-        # Predefined fallback based on service
-        fallback = "I'm having trouble connecting to my knowledge base right now. I'll note your request and follow up soon."
-        return fallback
-    except Exception as e:
-        print(f"xAI Unexpected Error: {e}")  # Debug: Log unexpected error
-        return "I'm having trouble connecting to my knowledge base right now. I'll note your request and follow up soon."
-
-def get_caller_name(from_number):
-    """Get caller name from phone number."""
-    # Normalize (strip +1 if present)
-    normalized = from_number.replace('+1', '')
-    return KNOWN_CALLERS.get(from_number, "guest")
-
-def get_room_data(room_number):
-    """Get room info from simulated DB."""
-    return HOTEL_DATA.get(room_number, {"status": "unknown", "balance": 0.00, "guest": "guest"})
+        ai_reply = tenants.get(conv.get('hotel')).reply(conv)
+    except Exception:
+        logger.exception("Speculative turn failed")
+        ai_reply = None
+    if conv.get('last_reply', {}).get('source') == 'fallback':
+        ai_reply = None  # Not worth serving; the real turn will try xAI again
+    with span('state_save'):
+        sessions.put(speculation_key(call_sid), {'reply': ai_reply, 'last_reply': conv.get('last_reply')})
+    logger.info("Speculative turn done [%s]", span_summary())
+
+def repeats_speculation(call_sid, conv, speech_result):
+    """True if the guest asked again for what the speculative turn answered; otherwise it is discarded."""
+    request_words = conv.pop('speculation', None)
+    if not request_words:
+        return False
+    # Only if nothing was added or changed ("and fries", "three towels"): the reply would leave it out
+    if g.pipeline.intents.repeats(request_words, speech_result, conv['lang']):
+        return True
+    inc('hotel_speculative_turns_total', result='discarded')
+    sessions.delete(speculation_key(call_sid))
+    return False
+
+def await_speculation(call_sid, conv, timeout):
+    """The speculative reply once it's stored (waiting up to timeout), or None if it failed or isn't ready."""
+    key = speculation_key(call_sid)
+    deadline = time.monotonic() + timeout
+    turns.wait(key, timeout)
+    with span('state_load'):
+        result = sessions.get(key)
+    while result is None and time.monotonic() < deadline:  # Running in another worker
+        time.sleep(STORE_POLL_INTERVAL)
+        result = sessions.get(key)
+    if result is None or result['reply'] is None:
+        if timeout:
+            inc('hotel_speculative_turns_total', result='failed')
+        return None
+    sessions.delete(key)
+    inc('hotel_speculative_turns_total', result='used')
+    conv['last_reply'] = dict(result['last_reply'], speculative=True)
+    return result['reply']
+
+def wait_for_reply(call_sid):
+    """Wait up to POLL_WAIT for the pending turn's reply and return the call state.
+
+    Under multiple workers the poll can land on a process that isn't running the turn,
+    so fall back to watching the shared session store.
+    """
+    if turns.wait(call_sid, POLL_WAIT):
+        return get_state(call_sid)
+    deadline = time.monotonic() + POLL_WAIT
+    conv = get_state(call_sid)
+    while conv.get('pending_turn') and conv['pending_turn']['reply'] is None and time.monotonic() < deadline:
+        time.sleep(STORE_POLL_INTERVAL)  # Yields to other requests under gevent workers
+        conv = get_state(call_sid)
+    return conv
+
+def twiml_response(name, lang=1, **values):
+    """Serve a precompiled TwiML template with its dynamic fields filled in."""
+    with span('twiml'):
+        body = g.pipeline.templates.render(name, lang, **values)
+    return Response(body, mimetype='text/xml')
+
+def reply_response(conv, ai_reply, speech_result):
+    """TwiML that speaks an AI reply, then either ends the call or gathers the next utterance."""
+    if is_goodbye(speech_result):
+        return twiml_response('reply_goodbye' if ai_reply else 'goodbye', conv['lang'], reply=ai_reply)
+    return twiml_response('reply' if ai_reply else 'listen', conv['lang'], reply=ai_reply)
+
+@app.before_request
+def start_request():
+    REGISTRY.start_flusher()
+    bind_call(request.values.get('CallSid'))
+    g.request_start = time.perf_counter()
+    g.pipeline = tenants.resolve(request.values.get('To'))  # The dialled hotel's pipeline
+
+@app.after_request
+def finish_request(response):
+    """Per-route request counters/latency, plus one log line with the request's span breakdown."""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if route != '/metrics':
+        elapsed = time.perf_counter() - g.request_start
+        observe('hotel_request_seconds', elapsed, route=route)
+        inc('hotel_requests_total', route=route, status=response.status_code)
+        logger.info("%s %s %d in %.1f ms [%s]", request.method, route, response.status_code, elapsed * 1000, span_summary())
+    return response
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle internal errors gracefully."""
-    resp = VoiceResponse()
-    resp.say("Sorry, something went wrong. Please call back or press any key to end.", voice='polly.Amy-Neural', language='en-US')
-    resp.hangup()
-    return Response(str(resp), mimetype='text/xml')
+    return twiml_response('error')
 
 @app.route('/', methods=['GET'])
 def home():
@@ -201,58 +357,127 @@ def test():
     """Test endpoint for manual verification."""
     return "Hotel AI webhook ready for Twilio calls. Version 0.2.4."
 
+def dashboard_filters():
+    """CallSid / caller number / service filters from the query string (empty ones dropped)."""
+    return {key: request.args[key].strip() for key in ('call_sid', 'caller', 'service') if request.args.get(key, '').strip()}
+
+def dashboard_number(name, default, most):
+    """Whole-number query parameter clamped to 1..most; missing or malformed values get the default."""
+    return max(1, min(request.args.get(name, default, type=int), most))
+
 @app.route('/dashboard', methods=['GET'])
 def dashboard():
-    """Simple dashboard to view recent call logs."""
-    logs = load_call_logs()
+    """Call analytics: rollups for recent hours plus a filterable, cursor-paginated call log."""
+    filters = dashboard_filters()
+    hours = dashboard_number('hours', 24, 24 * 31)
+    limit = dashboard_number('limit', 50, 200)
+    cursor = request.args.get('cursor', type=int)
+    summary = analytics.summary(hours)
+    entries, next_cursor = analytics.page(cursor, limit, **filters)
+    cache = tenants.default.reply_cache.stats()
+    mix = lambda counts, label=str: ', '.join(f"{escape(label(k))}: {v}" for k, v in counts.items()) or 'none'
+    lang_name = lambda lang: LANGUAGES.get(int(lang), {}).get('lang', lang)
+    latency = ', '.join(f"{k} {v if v is not None else '-'} ms" for k, v in summary['llm_ms'].items())
     html = f"""
     <html><body><h1>Hotel AI Call Dashboard (v0.2.4)</h1>
-    <p>Recent Calls:</p>
+    <p><strong>Last {hours}h:</strong> {summary['calls']} calls, {summary['turns']} turns, {summary['escalations']} escalations ({summary['escalation_rate']:.1%} of calls) | <strong>LLM latency:</strong> {latency}</p>
+    <p><strong>Services:</strong> {mix(summary['services'])} | <strong>Languages:</strong> {mix(summary['languages'], lang_name)} | <strong>Routes:</strong> {mix(summary['routes'])}</p>
+    <p><strong>Calls per hour:</strong> {' '.join(f"{h['hour'][11:]}h:{h['calls']}" for h in summary['per_hour']) or 'none'}</p>
+    <p>Reply cache: {cache['hits']} hits, {cache['misses']} misses, {cache['bypassed']} bypassed ({cache['hit_rate']:.0%} hit rate, ~{cache['saved_ms'] / 1000:.1f}s of LLM latency saved)</p>
+    <form method="get">CallSid <input name="call_sid" value="{escape(filters.get('call_sid', ''))}"> Caller <input name="caller" value="{escape(filters.get('caller', ''))}"> Service <input name="service" value="{escape(filters.get('service', ''))}"> <button>Filter</button>
+    <a href="{escape(url_for('dashboard_export', format='csv', **filters))}">Export CSV</a> <a href="{escape(url_for('dashboard_export', format='json', **filters))}">Export JSON</a></form>
+    <p>Call log (newest first):</p>
     <ul>
     """
-    for log in logs[-10:]:  # Last 10 calls
-        html += f"<li><strong>CallSID:</strong> {log['call_sid']} | <strong>Service:</strong> {log['service']} | <strong>Speech:</strong> {log['speech']} | <strong>AI Reply:</strong> {log['ai_reply']}</li>"
-    html += "</ul></body></html>"
+    for log in entries:
+        html += f"<li>{escape(log.get('timestamp', '')[:19])} <strong>{escape(str(log.get('event', 'turn')))}</strong> | <strong>CallSID:</strong> {escape(str(log.get('call_sid')))} | <strong>From:</strong> {escape(str(log.get('from')))} | <strong>Service:</strong> {escape(str(log.get('service')))}"
+        if log.get('speech') is not None:
+            html += f" | <strong>Speech:</strong> {escape(str(log['speech']))} | <strong>AI Reply:</strong> {escape(str(log.get('ai_reply')))}"
+        if 'turn' in log:
+            html += f" | <strong>Turn:</strong> {log['turn']} | <strong>Lang:</strong> {escape(str(lang_name(log['lang'])))} | <strong>Escalation:</strong> {log['escalation']} | <strong>Intent:</strong> {log['intent']}"
+        if log.get('route'):
+            html += f" | <strong>Route:</strong> {escape(str(log['route']))} ({escape(str(log.get('route_reason')))})"
+        if log.get('llm_ms') is not None:
+            html += f" | <strong>LLM:</strong> {log['llm_ms']} ms"
+        if log.get('outcome'):
+            html += f" | <strong>Outcome:</strong> {escape(str(log['outcome']))} after {log.get('turns')} turns, {log.get('duration_s')}s"
+        html += "</li>"
+    html += "</ul>"
+    if next_cursor is not None:
+        html += f'<a href="{escape(url_for("dashboard", cursor=next_cursor, limit=limit, hours=hours, **filters))}">Older &raquo;</a>'
+    html += "</body></html>"
     return html
 
+@app.route('/dashboard/summary', methods=['GET'])
+def dashboard_summary():
+    """Rollups as JSON."""
+    return analytics.summary(dashboard_number('hours', 24, 24 * 31))
+
+@app.route('/dashboard/export', methods=['GET'])
+def dashboard_export():
+    """Stream every matching call-log entry (optionally only the last `hours`) as CSV or a JSON array."""
+    fmt = 'json' if request.args.get('format') == 'json' else 'csv'
+    mimetype = 'application/json' if fmt == 'json' else 'text/csv'
+    since = datetime.now() - timedelta(hours=dashboard_number('hours', 24, 24 * 31)) if 'hours' in request.args else None
+    return Response(analytics.export(fmt, since=since, **dashboard_filters()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=calls.{fmt}'})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Machine-readable counters for this worker process (used by benchmarks/load_test.py)."""
+    return {
+        'pid': os.getpid(),
+        'sessions': sessions.stats(),
+        'turns': {'in_flight': turns.in_flight, 'rejected': turns.rejected},
+        'reply_cache': tenants.default.reply_cache.stats(),
+        'write_behind': persistence.stats() if persistence else None,
+        'pms': properties.stats(),
+        'tenants': tenants.stats(),
+        'llm_breaker_open': llm.breaker.is_open,
+    }
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape target (summed over workers when METRICS_DIR is set)."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/voice', methods=['POST'])
 def voice():
     call_sid = request.values.get('CallSid', 'default')
     from_number = request.values.get('From', 'unknown')
-    caller_name = get_caller_name(from_number)
     
     # Load state
     conv = get_state(call_sid)
-    conv['caller_name'] = caller_name
+    if 'from' not in conv:  # First webhook of the call (/voice is also the room prompt's redirect target)
+        # Look the caller up in the hotel's PMS: an in-house guest's room is already known, so skip the room prompt
+        caller = g.pipeline.properties.prefetch_caller(from_number)
+        conv['caller_name'] = caller['name']
+        if caller['room']:
+            conv['room_number'], conv['room_data'] = caller['room'], caller['room_data']
+        save_call_log({
+            'event': 'call_start',
+            'call_sid': call_sid,
+            'hotel': conv.get('hotel'),
+            'from': from_number,
+            'service': 'initial',
+            'lang': conv['lang'],
+            'room': conv['room_number'],
+            'speech': 'call started',
+            'ai_reply': 'welcome'
+        })
+    conv['call_sid'] = call_sid
+    conv['from'] = from_number
+    caller_name = conv['caller_name']
     
-    resp = VoiceResponse()
-    lang_config = LANGUAGES[1]  # Default English
-    welcome_text = f"Hello {caller_name}, you are using version 0.2.4 of the hotel A-I system. I speak most major languages. Welcome. How can I help you today? You can ask for room service, front desk, concierge, housekeeping, or maintenance."
-    resp.say(welcome_text, voice=lang_config['voice'], language=lang_config['lang'])
+    # Save state
+    save_state_update(call_sid, conv)
     
     # Ask for room number if not known
     if 'room_number' not in conv or not conv['room_number']:
-        resp.say("To assist better, what's your room number?", voice=lang_config['voice'], language=lang_config['lang'])
-        gather_room = Gather(input='speech dtmf', num_digits=3, speech_timeout='auto', action='/room_number', method='POST', speech_model='default')
-        resp.append(gather_room)
-        resp.redirect('/voice')
-        return Response(str(resp), mimetype='text/xml')
+        return twiml_response('welcome_room', conv['lang'], caller=caller_name)
     
     # Gather DTMF or speech for service selection (voice-first)
-    gather = Gather(input='dtmf speech', num_digits=1, speech_timeout='auto', action='/service_selected', method='POST', speech_model='default')
-    resp.append(gather)
-    
-    # Save state
-    save_state_update(call_sid, conv)
-    save_call_log({
-        'call_sid': call_sid,
-        'from': from_number,
-        'service': 'initial',
-        'speech': 'call started',
-        'ai_reply': 'welcome'
-    })
-    
-    return Response(str(resp), mimetype='text/xml')
+    return twiml_response('welcome', conv['lang'], caller=caller_name)
 
 @app.route('/room_number', methods=['POST'])
 def room_number():
@@ -272,148 +497,251 @@ def room_number():
     
     if room_num:
         conv['room_number'] = room_num
-        room_data = get_room_data(room_num)
-        lang_config = LANGUAGES[conv['lang']]
-        resp = VoiceResponse()
-        resp.say(f"Thanks, noted for room {room_num}. {room_data['guest']}, your balance is ${room_data['balance']}. How can I help?", voice=lang_config['voice'], language=lang_config['lang'])
-        gather = Gather(input='dtmf speech', num_digits=1, speech_timeout='auto', action='/service_selected', method='POST', speech_model='default')
-        resp.append(gather)
+        conv['room_data'] = g.pipeline.properties.room(room_num)
+        room_data = conv['room_data']
         save_state_update(call_sid, conv)
-        return Response(str(resp), mimetype='text/xml')
+        return twiml_response('room_noted', conv['lang'], room=room_num, guest=room_data['guest'], balance=room_data['balance'])
     
     # Invalid room, reprompt
-    lang_config = LANGUAGES[conv['lang']]
-    resp = VoiceResponse()
-    resp.say("To assist better, what's your room number?", voice=lang_config['voice'], language=lang_config['lang'])
-    gather = Gather(input='speech dtmf', num_digits=3, speech_timeout='auto', action='/room_number', method='POST', speech_model='default')
-    resp.append(gather)
     save_state_update(call_sid, conv)
-    return Response(str(resp), mimetype='text/xml')
+    return twiml_response('room_prompt', conv['lang'])
 
 @app.route('/service_selected', methods=['POST'])
 def service_selected():
     call_sid = request.values.get('CallSid', 'default')
     digit = request.values.get('Digits', None)
     speech_result = request.values.get('SpeechResult', '').lower().strip()
-    lang_config = LANGUAGES[current_conversations.get(call_sid, {}).get('lang', 1)]
-    
-    print(f"Service Selection Debug: Digit={digit}, Speech={speech_result}, Lang={lang_config['lang']}")  # Debug: Log input
+    conv = get_state(call_sid)
+    pipeline = g.pipeline
     
-    # Auto-detect language from speech_result
-    if speech_result:
-        detected_lang = detect_language(speech_result)
-        if detected_lang != current_conversations.get(call_sid, {}).get('lang', 1):
-            current_conversations[call_sid]['lang'] = detected_lang
-            lang_config = LANGUAGES[detected_lang]
-            print(f"Detected and switched to lang {detected_lang}")
+    logger.info("Service selection: digit=%s, speech=%d chars, lang=%s", digit, len(speech_result),
+                pipeline.templates.languages[conv['lang']]['lang'])
+    log_payload("Service speech", speech_result)
     
-    # Try speech first, then DTMF - expanded keywords for natural phrases
-    service_num = None
-    if speech_result:
-        if any(word in speech_result for word in ['one', 'room', 'service', 'food', 'order', 'meal', 'dinner', 'breakfast', 'lunch', 'snack', 'beverage']):
-            service_num = 1
-        elif any(word in speech_result for word in ['two', 'front', 'desk', 'check', 'in', 'out', 'bill', 'billing', 'payment', 'inquiry', 'reservation', 'key', 'room key', 'complaint']):
-            service_num = 2
-        elif any(word in speech_result for word in ['three', 'concierge', 'recommend', 'restaurant', 'attraction', 'tour', 'transport', 'taxi', 'book', 'reserve', 'dinner reservation', 'show']):
-            service_num = 3
-        elif any(word in speech_result for word in ['four', 'house', 'housekeeping', 'clean', 'towel', 'linen', 'amenity', 'bed', 'room clean', 'extra pillow', 'soap']):
-            service_num = 4
-        elif any(word in speech_result for word in ['five', 'maintenance', 'fix', 'ac', 'plumbing', 'repair', 'broken']):
-            service_num = 5
-    elif digit:
-        try:
-            service_num = int(digit)
-        except ValueError:
-            pass
+    # Try speech first (auto-detecting the language), then DTMF
+    previous_lang = conv['lang']
+    service_num, intent = pipeline.match_service(conv, speech_result, digit)
+    if conv['lang'] != previous_lang:
+        logger.info("Switched to language %s", pipeline.templates.languages[conv['lang']]['lang'])
     
-    if service_num and service_num in SERVICES:
-        service_name, desc = SERVICES[service_num]
-        conv = current_conversations.get(call_sid, {})
-        conv['service'] = service_name
-        conv['system_prompt'] = f"You are a helpful {service_name} assistant in a hotel. {desc}"
-        conv['messages'] = [{"role": "system", "content": conv['system_prompt']}]
+    service_name = pipeline.connect_service(conv, service_num)
+    if service_name:
+        logger.info("Connected to service %s: %s", service_num, service_name)
         
-        print(f"Connected to service {service_num}: {service_name}")  # Debug: Log success
+        request_words = pipeline.intents.residual(speech_result, conv['lang'], intent) if speech_result else []
+        if SPECULATIVE_TURNS and VOICE_MODE != 'stream' and request_words:
+            start_speculation(call_sid, conv, speech_result, request_words)
         
-        resp = VoiceResponse()
-        resp.say(f"Connected to {service_name}. How can I help you today? You can speak or press pound to end.", voice=lang_config['voice'], language=lang_config['lang'])
+        if VOICE_MODE == 'stream':
+            save_state_update(call_sid, conv)
+            # Connect the call to the /relay websocket for streamed replies
+            return twiml_response('connected_relay', conv['lang'], host=request.host, service=service_name)
         
         # Gather speech for conversation
-        gather = Gather(input='speech', speech_timeout='auto', action='/handle_speech', method='POST', speech_model='default', finish_on_key='#')
-        resp.append(gather)
-        return Response(str(resp), mimetype='text/xml')
+        save_state_update(call_sid, conv)
+        return twiml_response('connected', conv['lang'], service=service_name)
     
     # Invalid, repeat with clearer prompt
-    resp = VoiceResponse()
-    resp.say("Sorry, I didn't understand. Tell me what you need: room service, front desk, concierge, housekeeping, or maintenance.", voice=lang_config['voice'], language=lang_config['lang'])
-    gather = Gather(input='dtmf speech', num_digits=1, speech_timeout='auto', action='/service_selected', method='POST', speech_model='default')
-    resp.append(gather)
     save_state_update(call_sid, conv)
-    return Response(str(resp), mimetype='text/xml')
+    return twiml_response('not_understood', conv['lang'])
 
 @app.route('/handle_speech', methods=['POST'])
 def handle_speech():
     call_sid = request.values.get('CallSid', 'default')
     speech_result = request.values.get('SpeechResult', '').strip()
-    lang_config = LANGUAGES[current_conversations.get(call_sid, {}).get('lang', 1)]
+    conv = get_state(call_sid)
+    pipeline = g.pipeline
     
-    print(f"Speech Input: {speech_result}")  # Debug: Log transcribed speech
+    log_payload("Speech input", speech_result)
     
-    conv = current_conversations.get(call_sid, {})
-    if speech_result and conv:
+    if speech_result and conv.get('service'):
+        pipeline.observe(conv, 'user', speech_result)
         messages = conv['messages']
         messages.append({"role": "user", "content": speech_result})
         
-        # Check for escalation in all messages
-        all_content = ' '.join([m['content'].lower() for m in messages])
-        if any(keyword in all_content for keyword in ['human', 'manager', 'person', 'complaint', 'issue', 'problem']):
-            resp = VoiceResponse()
-            resp.say("I'll connect you to a staff member right away. Please hold.", voice=lang_config['voice'], language=lang_config['lang'])
-            resp.hangup()
-            # Clean up
-            all_state = load_state()
-            if call_sid in all_state:
-                del all_state[call_sid]
-            save_state(all_state)
-            return Response(str(resp), mimetype='text/xml')
+        # Escalate on a recent request for a human (running score, not a rescan of the history)
+        if pipeline.analyzer.should_escalate(conv['analysis']):
+            log_escalation(call_sid, conv)
+            end_call(call_sid, conv, 'escalated')
+            return twiml_response('hold', conv['lang'])
         
-        ai_reply = get_ai_response(messages, conv.get('room_number'), conv.get('service'))
+        # A reply generated at service selection answers this turn if the guest repeated that request
+        speculative = repeats_speculation(call_sid, conv, speech_result)
+        ai_reply = await_speculation(call_sid, conv, 0 if DEFERRED_REPLIES else llm.deadline) if speculative else None
+        escalate = pipeline.analyzer.escalation_hint(conv['analysis'])
+        if ai_reply is None:
+            # Templates and reply-cache hits are answered here; only an LLM call is worth deferring
+            ai_reply, route = pipeline.instant_reply(conv, escalate)
+        if ai_reply is None and DEFERRED_REPLIES:
+            conv['pending_turn'] = {'id': uuid.uuid4().hex, 'speech': speech_result, 'reply': None, 'speculative': speculative,
+                                    'route': route._asdict()}
+            save_state_update(call_sid, conv)
+            if turns.submit(call_sid, run_deferred_turn, call_sid, conv):
+                return twiml_response('one_moment', conv['lang'])
+            # Admission refused: too many turns in flight, answer now instead of queueing
+            logger.warning("Turn pipeline saturated; using fallback")
+            inc('hotel_turns_rejected_total')
+            del conv['pending_turn']
+            ai_reply = FALLBACK_REPLY
+            conv['last_reply'] = {'source': 'fallback', 'llm_ms': None}
+        elif ai_reply is None:
+            ai_reply = pipeline.llm_reply(conv, route, escalate)
         messages.append({"role": "assistant", "content": ai_reply})
-        
-        resp = VoiceResponse()
-        resp.say(ai_reply, voice=lang_config['voice'], language=lang_config['lang'])
-        resp.pause(length=1)
-        if "bye" in speech_result.lower() or "goodbye" in speech_result.lower():
-            resp.say("Thank you for calling. Goodbye!", voice=lang_config['voice'], language=lang_config['lang'])
-            resp.hangup()
-        else:
-            resp.say("What else can I help with? Say or press pound to end.", voice=lang_config['voice'], language=lang_config['lang'])
-            # Continue conversation with speech
-            gather = Gather(input='speech', speech_timeout='auto', action='/handle_speech', method='POST', speech_model='default', finish_on_key='#')
-            resp.append(gather)
+        pipeline.observe(conv, 'assistant', ai_reply)
         save_state_update(call_sid, conv)
-        return Response(str(resp), mimetype='text/xml')
+        log_turn(call_sid, conv, speech_result, ai_reply)
+        if is_goodbye(speech_result):
+            end_call(call_sid, conv, 'goodbye')
+        return reply_response(conv, ai_reply, speech_result)
     
-    # No speech or end
-    resp = VoiceResponse()
-    resp.say("Thank you for calling. Goodbye!", voice=lang_config['voice'], language=lang_config['lang'])
-    resp.hangup()
-    # Clean up conversation
-    all_state = load_state()
-    if call_sid in all_state:
-        del all_state[call_sid]
-    save_state(all_state)
-    return Response(str(resp), mimetype='text/xml')
+    # No speech or end; clean up conversation
+    end_call(call_sid, conv, 'no_speech')
+    return twiml_response('goodbye', conv['lang'])
+
+@app.route('/speech_reply', methods=['POST'])
+def speech_reply():
+    """Poll target for deferred turns: serve the reply once the background LLM call has stored it."""
+    call_sid = request.values.get('CallSid', 'default')
+    attempt = max(1, request.args.get('attempt', 1, type=int))
+    with span('reply_wait'):
+        conv = wait_for_reply(call_sid)
+    pending = conv.get('pending_turn')
+    if not pending:
+        # Nothing outstanding (e.g. state expired); just listen for the next request
+        return reply_response(conv, None, '')
+    ai_reply = pending['reply']
+    if ai_reply is None:
+        if attempt < MAX_POLLS:
+            return twiml_response('poll', attempt=attempt + 1)
+        ai_reply = FALLBACK_REPLY
+        conv['messages'].append({"role": "assistant", "content": ai_reply})
+        g.pipeline.observe(conv, 'assistant', ai_reply)
+    del conv['pending_turn']
+    save_state_update(call_sid, conv)
+    if is_goodbye(pending['speech']):
+        end_call(call_sid, conv, 'goodbye')
+    return reply_response(conv, ai_reply, pending['speech'])
+
+def relay(ws):
+    """ConversationRelay websocket: Twilio sends transcribed prompts, we stream back reply sentences."""
+    call_sid = 'default'
+    while True:
+        raw = ws.receive()
+        if raw is None:
+            break
+        message = json.loads(raw)
+        kind = message.get('type')
+        if kind == 'setup':
+            call_sid = message.get('callSid', call_sid)
+            bind_call(call_sid)
+        elif kind == 'prompt' and message.get('last', True):
+            speech_result = message.get('voicePrompt', '').strip()
+            if not speech_result:
+                continue
+            conv = get_state(call_sid)
+            # The websocket request carries no To number: the call state says which hotel this is
+            pipeline = g.pipeline = tenants.get(conv.get('hotel'))
+            messages = conv['messages']
+            messages.append({"role": "user", "content": speech_result})
+            pipeline.observe(conv, 'user', speech_result)
+            if pipeline.analyzer.should_escalate(conv['analysis']):
+                log_escalation(call_sid, conv)
+                ws.send(text_message(pipeline.templates.text(conv['lang'], 'hold'), last=True))
+                ws.send(end_message('escalate'))
+                end_call(call_sid, conv, 'escalated')
+                break
+            started = time.perf_counter()
+            escalate = pipeline.analyzer.escalation_hint(conv['analysis'])
+            route = pipeline.route(conv, speech_result, escalate)
+            cache_key = pipeline.cache_key(conv, speech_result, escalate)
+            cached = pipeline.reply_cache.get(cache_key) if route.tier != 'template' else None
+            if route.tier == 'template':
+                deltas = iter([pipeline.template_reply(conv, route)])
+            elif cached is not None:
+                deltas = iter([cached])
+            else:
+                deltas = llm.stream(pipeline.build_messages(conv, escalate), model=route.model, temperature=0.7,
+                                    max_tokens=route.max_tokens, conversation_id=call_sid)
+            start = time.monotonic()
+            with span('llm'):
+                result = stream_reply(deltas, ws.send, FALLBACK_REPLY)
+            source = ('template' if route.tier == 'template' else 'cache' if cached is not None
+                      else 'fallback' if result['text'] == FALLBACK_REPLY else 'llm')
+            if source == 'llm' and result['complete'] and not pipeline.mentions_room(result['text'], conv):  # Never a cut-off reply
+                pipeline.reply_cache.put(cache_key, result['text'], (time.monotonic() - start) * 1000)
+            logger.info("Streamed reply, first sentence after %s ms", result['first_sentence_ms'])
+            pipeline.record_reply(conv, source, route, started,
+                         round((time.monotonic() - start) * 1000) if source == 'llm' else None)
+            messages.append({"role": "assistant", "content": result['text']})
+            pipeline.observe(conv, 'assistant', result['text'])
+            log_turn(call_sid, conv, speech_result, result['text'])
+            if is_goodbye(speech_result):
+                ws.send(text_message(pipeline.templates.text(conv['lang'], 'goodbye'), last=True))
+                ws.send(end_message('goodbye'))
+                end_call(call_sid, conv, 'goodbye')
+                break
+            save_state_update(call_sid, conv)
+        elif kind == 'interrupt':
+            # Caller talked over the reply: keep only what they actually heard
+            conv = get_state(call_sid)
+            heard = message.get('utteranceUntilInterrupt')
+            if heard is not None and conv['messages'] and conv['messages'][-1]['role'] == 'assistant':
+                conv['messages'][-1]['content'] = heard
+                save_state_update(call_sid, conv)
+        elif kind == 'error':
+            logger.warning("ConversationRelay error: %s", message.get('description'))
+
+if VOICE_MODE == 'stream':
+    # Websocket support (flask_sock, wsproto) is only imported when calls are handed to ConversationRelay
+    from flask_sock import Sock
+    Sock(app).route('/relay')(relay)
+
+@app.route('/stream_ended', methods=['POST'])
+def stream_ended():
+    """<Connect> action: hang up after a finished relay session, otherwise fall back to <Gather> turns."""
+    call_sid = request.values.get('CallSid', 'default')
+    handoff = json.loads(request.values.get('HandoffData') or '{}')
+    if handoff.get('reason') in ('goodbye', 'escalate'):
+        return twiml_response('hangup')
+    logger.warning("Relay session ended unexpectedly; falling back to Gather")
+    return reply_response(get_state(call_sid), None, '')
 
 @app.route('/hangup', methods=['POST'])
 def hangup():
-    lang_config = LANGUAGES[1]  # Default English for hangup
-    resp = VoiceResponse()
-    resp.say("Thank you for calling. Goodbye!", voice=lang_config['voice'], language=lang_config['lang'])
-    resp.hangup()
-    return Response(str(resp), mimetype='text/xml')
+    call_sid = request.values.get('CallSid', 'default')
+    end_call(call_sid, get_state(call_sid), 'hangup')
+    return twiml_response('goodbye')  # Default English for hangup
+
+def warm_up(wait=False):
+    """Prime what the first caller would otherwise pay for, before traffic arrives.
+
+    Opens the state store inline; the xAI and PMS connections (DNS, TCP, TLS) are opened on a
+    background thread, so the first guest turn reuses them (wait=True blocks until they are).
+    """
+    started = time.perf_counter()
+    try:
+        sessions.get('warm-up')  # Pooled SQLite connection and page cache
+    except Exception:
+        logger.exception("Warm-up: state store unavailable")
+
+    def connect():
+        connect_started = time.perf_counter()
+        llm_ok, pms_ok = llm.warm(), properties.warm()
+        tenants.refresh()  # Index the hotel profiles (they are built on their first call)
+        logger.info("Warm-up: xAI %s, PMS %s in %.0f ms", 'connected' if llm_ok else 'unreachable',
+                    'connected' if pms_ok else 'unreachable', (time.perf_counter() - connect_started) * 1000)
+
+    thread = threading.Thread(target=connect, name='warm-up', daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    logger.info("Warm-up done in %.0f ms (templates %s)", (time.perf_counter() - started) * 1000,
+                'from snapshot' if tenants.default.templates.from_snapshot else 'compiled')
 
 if __name__ == '__main__':
+    # Development server; production runs under gunicorn (see gunicorn.conf.py / Procfile)
     port = int(os.environ.get('PORT', 5000))
     host = os.environ.get('HOST', '0.0.0.0')
-    app.run(host=host, port=port, debug=True)
+    if os.getenv('WARM_UP', '1') == '1':
+        warm_up()
+    app.run(host=host, port=port, debug=os.getenv('FLASK_DEBUG', '0') == '1')
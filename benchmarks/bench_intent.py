@@ -0,0 +1,69 @@
+# bench_intent.py - Accuracy and speed of service-selection intent matching
+#
+# Usage: python benchmarks/bench_intent.py [--iterations 2000]
+# Compares intent_matcher against the original substring chains from
+# service_selected on the labelled utterances in intent_utterances.jsonl.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SERVICE_KEYWORDS  # noqa: E402
+from intent_matcher import IntentMatcher  # noqa: E402
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_utterances.jsonl')
+
+
+def legacy_match(speech_result, lang=1):
+    """The any(word in speech_result ...) chains service_selected used before intent_matcher."""
+    speech_result = speech_result.lower()
+    if any(word in speech_result for word in ['one', 'room', 'service', 'food', 'order', 'meal', 'dinner', 'breakfast', 'lunch', 'snack', 'beverage']):
+        return 1
+    elif any(word in speech_result for word in ['two', 'front', 'desk', 'check', 'in', 'out', 'bill', 'billing', 'payment', 'inquiry', 'reservation', 'key', 'room key', 'complaint']):
+        return 2
+    elif any(word in speech_result for word in ['three', 'concierge', 'recommend', 'restaurant', 'attraction', 'tour', 'transport', 'taxi', 'book', 'reserve', 'dinner reservation', 'show']):
+        return 3
+    elif any(word in speech_result for word in ['four', 'house', 'housekeeping', 'clean', 'towel', 'linen', 'amenity', 'bed', 'room clean', 'extra pillow', 'soap']):
+        return 4
+    elif any(word in speech_result for word in ['five', 'maintenance', 'fix', 'ac', 'plumbing', 'repair', 'broken']):
+        return 5
+    return None
+
+
+def evaluate(name, match, samples, iterations):
+    correct = sum(1 for s in samples if match(s['text'], s['lang']) == s['service'])
+    misses = [s['text'] for s in samples if match(s['text'], s['lang']) != s['service']]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for s in samples:
+            match(s['text'], s['lang'])
+    per_call_us = (time.perf_counter() - start) / (iterations * len(samples)) * 1e6
+    return {"matcher": name, "accuracy": round(correct / len(samples), 3), "per_call_us": round(per_call_us, 2),
+            "misses": misses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Intent matcher benchmark')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    with open(DATA_FILE, encoding='utf-8') as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    matcher = IntentMatcher(SERVICE_KEYWORDS)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    results = [
+        evaluate('legacy', legacy_match, samples, args.iterations),
+        evaluate('intent_matcher', lambda text, lang: matcher.match(text, lang).service, samples, args.iterations),
+    ]
+    print(json.dumps({"samples": len(samples), "compile_ms": round(compile_ms, 2), "results": results},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
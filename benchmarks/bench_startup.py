@@ -0,0 +1,145 @@
+# bench_startup.py - Cold start: import-to-first-response time of a fresh process
+#
+# Usage:
+#   python benchmarks/bench_startup.py --runs 7 --output startup.json
+#   python benchmarks/bench_startup.py --warm                 # call app.warm_up() before the first webhook
+#   python benchmarks/bench_startup.py --server gunicorn      # spawn gunicorn, time until /voice answers
+#   python benchmarks/bench_startup.py --baseline startup.json  # exit 1 on a regression
+#
+# What a caller waits for when the instance has been asleep. Each run starts a
+# new interpreter that imports app, optionally warms it up, then plays the
+# first webhooks of a call through Flask's test client: /voice, and an inline
+# /handle_speech turn against fake_xai (the first xAI request opens a new pooled
+# connection). With --server gunicorn the whole server is started instead and
+# the clock runs from spawning it until /voice answers. Medians over --runs.
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_xai import FakeXAIServer  # noqa: E402
+
+CALL = {'CallSid': 'CASTARTUP', 'From': '+15550000000'}
+
+# Runs in a fresh interpreter; prints one JSON line of timings
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+if {warm} and hasattr(app, 'warm_up'):
+    app.warm_up(wait=True)
+warmed = time.perf_counter()
+client = app.app.test_client()
+call = {call}
+assert client.post('/voice', data=call).status_code == 200
+voice = time.perf_counter()
+client.post('/service_selected', data=dict(call, Digits='1'))
+turn_start = time.perf_counter()
+assert client.post('/handle_speech', data=dict(call, SpeechResult='Can I get a hamburger')).status_code == 200
+turn = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'warm_ms': (warmed - imported) * 1000,
+                  'first_response_ms': (voice - start) * 1000, 'first_turn_ms': (turn - turn_start) * 1000,
+                  'modules': len(sys.modules)}}))
+"""
+
+
+def app_env(xai_url, workdir, extra):
+    env = dict(os.environ, XAI_API_URL=xai_url, XAI_API_KEY='startup', TWILIO_ACCOUNT_SID='ACstartup',
+               TWILIO_AUTH_TOKEN='startup', DEFERRED_REPLIES='0', SPECULATIVE_TURNS='0',
+               SESSION_DB_PATH=os.path.join(workdir, 'sessions.db'), CALL_LOG_DIR=os.path.join(workdir, 'call_logs'))
+    env.update(item.split('=', 1) for item in extra)
+    return env
+
+
+def run_inprocess(env, warm):
+    output = subprocess.run([sys.executable, '-c', CHILD.format(warm=warm, call=CALL)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_gunicorn(env, workdir):
+    """Spawn-to-first-/voice time of a one-worker gunicorn server."""
+    port = free_port()
+    env = dict(env, PORT=str(port), HOST='127.0.0.1', WEB_CONCURRENCY='1')
+    base = f"http://127.0.0.1:{port}"
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'a')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile',
+                                os.devnull, 'app:app'], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        while time.perf_counter() - start < 30:
+            try:
+                if requests.post(base + '/voice', data=CALL, timeout=5).ok:
+                    return {'first_response_ms': (time.perf_counter() - start) * 1000}
+            except requests.ConnectionError:
+                time.sleep(0.005)
+        raise SystemExit(f"gunicorn did not answer; see {log.name}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def compare(result, baseline, tolerance):
+    """List regressions of result against a previous run."""
+    problems = []
+    for key in ('import_ms', 'first_response_ms'):
+        before, after = baseline.get(key), result.get(key)
+        if before and after and after > before * (1 + tolerance):
+            problems.append(f"{key}: {before} -> {after} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--server', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--warm', action='store_true', help='call app.warm_up() before the first webhook')
+    parser.add_argument('--llm-latency', type=float, default=0.05)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='extra app environment')
+    parser.add_argument('--output', help='also write the JSON result here')
+    parser.add_argument('--baseline', help='previous result to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative increase')
+    args = parser.parse_args()
+
+    xai = FakeXAIServer(latency=args.llm_latency, jitter=0.0).start()
+    workdir = tempfile.mkdtemp(prefix='hotel-startup-')
+    env = app_env(xai.url, workdir, args.env)
+    samples = []
+    for _ in range(args.runs):
+        samples.append(run_gunicorn(env, workdir) if args.server == 'gunicorn' else run_inprocess(env, args.warm))
+    result = {"config": {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')}}
+    for key in samples[0]:
+        result[key] = round(statistics.median(s[key] for s in samples), 1)
+    result['first_response_ms_all'] = [round(s['first_response_ms'], 1) for s in samples]
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
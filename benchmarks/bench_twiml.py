@@ -0,0 +1,82 @@
+# bench_twiml.py - Per-request cost of TwiML rendering
+#
+# Usage: python benchmarks/bench_twiml.py [--iterations 5000]
+# Builds the busiest responses the way routes did before twiml_templates
+# (a fresh VoiceResponse/Gather tree serialized per request) and compares
+# them with rendering the precompiled templates.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twilio.twiml.voice_response import VoiceResponse, Gather  # noqa: E402
+
+from twiml_templates import TwimlTemplates  # noqa: E402
+
+VOICE = {'voice': 'polly.Amy-Neural', 'language': 'en-US'}
+REPLY = "Certainly, I've ordered a hamburger and fries to room 101. It should arrive in about 25 minutes."
+
+
+def legacy_welcome_room(caller):
+    resp = VoiceResponse()
+    resp.say(f"Hello {caller}, you are using version 0.2.4 of the hotel A-I system. I speak most major languages. Welcome. How can I help you today? You can ask for room service, front desk, concierge, housekeeping, or maintenance.", **VOICE)
+    resp.say("To assist better, what's your room number?", **VOICE)
+    resp.append(Gather(input='speech dtmf', num_digits=3, speech_timeout='auto', action='/room_number', method='POST', speech_model='default'))
+    resp.redirect('/voice')
+    return str(resp)
+
+
+def legacy_room_noted(room, guest, balance):
+    resp = VoiceResponse()
+    resp.say(f"Thanks, noted for room {room}. {guest}, your balance is ${balance}. How can I help?", **VOICE)
+    resp.append(Gather(input='dtmf speech', num_digits=1, speech_timeout='auto', action='/service_selected', method='POST', speech_model='default'))
+    return str(resp)
+
+
+def legacy_reply(reply):
+    resp = VoiceResponse()
+    resp.say(reply, **VOICE)
+    resp.pause(length=1)
+    resp.say("What else can I help with? Say or press pound to end.", **VOICE)
+    resp.append(Gather(input='speech', speech_timeout='auto', action='/handle_speech', method='POST', speech_model='default', finish_on_key='#'))
+    return str(resp)
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TwiML rendering benchmark')
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    templates = TwimlTemplates()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    cases = {
+        'welcome_room': (lambda: legacy_welcome_room('Saeed'),
+                         lambda: templates.render('welcome_room', 1, caller='Saeed')),
+        'room_noted': (lambda: legacy_room_noted('101', 'Saeed', 50.0),
+                       lambda: templates.render('room_noted', 1, room='101', guest='Saeed', balance=50.0)),
+        'reply': (lambda: legacy_reply(REPLY),
+                  lambda: templates.render('reply', 1, reply=REPLY)),
+    }
+    results = []
+    for name, (legacy, template) in cases.items():
+        legacy_us, template_us = timed(legacy, args.iterations), timed(template, args.iterations)
+        results.append({"response": name, "voice_response_us": legacy_us, "template_us": template_us,
+                        "speedup": round(legacy_us / template_us, 1)})
+    print(json.dumps({"compile_ms": round(compile_ms, 2), "iterations": args.iterations, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
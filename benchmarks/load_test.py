@@ -0,0 +1,260 @@
+# load_test.py - Concurrent call-flow load test with a fake xAI backend
+#
+# Usage:
+#   python benchmarks/load_test.py --calls 200 --concurrency 50 --llm-latency 0.8 --output run.json
+#   python benchmarks/load_test.py --baseline run.json    # exit 1 on a p95 / error-rate regression
+#   python benchmarks/load_test.py --base http://127.0.0.1:5000   # drive an app that's already running
+#
+# Each simulated call plays Twilio's side of the <Gather> flow: /voice ->
+# /room_number -> /service_selected -> several /handle_speech turns (following
+# /speech_reply redirects like Twilio does) -> /hangup. Unless --base is given,
+# the app is started under gunicorn (gunicorn.conf.py) against fake_xai with
+# the requested latency. Output is JSON: per-route latency percentiles, call
+# throughput, error rate and session-store contention summed over workers.
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_xai import FakeXAIServer  # noqa: E402
+
+TWILIO_TIMEOUT = 15.0  # Twilio gives up on a webhook after 15 seconds
+FALLBACK_MARKER = "trouble connecting"  # Part of app.FALLBACK_REPLY
+REDIRECT_RE = re.compile(r'<Redirect>(/speech_reply[^<]*)</Redirect>')
+
+# Service digit -> guest turns for that service (the last turn of every call says goodbye)
+SCRIPTS = {
+    1: ["Can I get a cheeseburger and fries please", "Also a bottle of sparkling water", "How long will that take"],
+    2: ["What time is checkout tomorrow", "Can I get a late checkout at 2pm", "Please send a copy of my bill by email"],
+    3: ["Can you recommend an Italian restaurant nearby", "Book a table for two at 8pm", "I also need a taxi there"],
+    4: ["Could I get two extra towels", "And an extra pillow please", "Can you clean the room around noon"],
+    5: ["The air conditioning is not cooling", "It has been broken since this morning", "When can someone come up"],
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Collects (route, milliseconds, ok) samples from all call threads."""
+
+    def __init__(self):
+        self.samples = []
+        self.fallback_replies = 0
+        self._lock = threading.Lock()
+
+    def add(self, route, ms, ok):
+        with self._lock:
+            self.samples.append((route, ms, ok))
+
+    def fallback(self):
+        with self._lock:
+            self.fallback_replies += 1
+
+    def routes(self):
+        by_route = {}
+        for route, ms, ok in self.samples:
+            by_route.setdefault(route, []).append((ms, ok))
+        summary = {}
+        for route, entries in sorted(by_route.items()):
+            latencies = sorted(ms for ms, _ in entries)
+            errors = sum(1 for _, ok in entries if not ok)
+            summary[route] = {
+                "requests": len(entries), "errors": errors,
+                "p50_ms": round(percentile(latencies, 50), 1), "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1), "max_ms": round(latencies[-1], 1),
+            }
+        return summary
+
+
+def post(session, base, recorder, path, data):
+    """One webhook request; slow (past Twilio's budget) or non-200 answers count as errors."""
+    route = path.split('?', 1)[0]
+    start = time.perf_counter()
+    try:
+        response = session.post(base + path, data=data, timeout=TWILIO_TIMEOUT)
+        ms = (time.perf_counter() - start) * 1000
+        ok = response.status_code == 200 and ms < TWILIO_TIMEOUT * 1000
+        recorder.add(route, ms, ok)
+        return response.text if ok else None
+    except requests.RequestException:
+        recorder.add(route, (time.perf_counter() - start) * 1000, False)
+        return None
+
+
+def run_call(base, index, turns, recorder, think_time):
+    """Play one complete call; return True if every step answered."""
+    rng = random.Random(index)
+    service = rng.randint(1, 5)
+    call = {'CallSid': f"CALOAD{index:06d}", 'From': f"+1555{index:07d}"}
+    session = requests.Session()
+    steps = [('/voice', {}), ('/room_number', {'Digits': str(rng.choice([101, 102, 204, 315]))}),
+             ('/service_selected', {'Digits': str(service)})]
+    for path, data in steps:
+        if post(session, base, recorder, path, {**call, **data}) is None:
+            return False
+    utterances = (SCRIPTS[service] * turns)[:max(turns - 1, 0)] + ["Thanks, that's all. Goodbye"]
+    for utterance in utterances:
+        time.sleep(think_time)
+        body = post(session, base, recorder, '/handle_speech', {**call, 'SpeechResult': utterance})
+        while body is not None and REDIRECT_RE.search(body):
+            body = post(session, base, recorder, REDIRECT_RE.search(body).group(1).replace('&amp;', '&'), call)
+        if body is None:
+            return False
+        if FALLBACK_MARKER in body:
+            recorder.fallback()
+    return post(session, base, recorder, '/hangup', call) is not None
+
+
+def collect_stats(base, probes):
+    """Poll /stats on fresh connections until each worker has answered; sum store contention."""
+    workers = {}
+    for _ in range(probes):
+        try:
+            data = requests.get(base + '/stats', timeout=5).json()
+        except (requests.RequestException, ValueError):
+            continue
+        workers[data['pid']] = data
+    store = {"backend": None, "ops": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "slow_ops": 0, "errors": 0}
+    for data in workers.values():
+        sessions = data['sessions']
+        store['backend'] = sessions['backend']
+        for key in ('ops', 'wait_ms', 'slow_ops', 'errors'):
+            store[key] += sessions[key]
+        store['max_wait_ms'] = max(store['max_wait_ms'], sessions['max_wait_ms'])
+    store['wait_ms'] = round(store['wait_ms'], 2)
+    store['mean_wait_ms'] = round(store['wait_ms'] / store['ops'], 3) if store['ops'] else 0.0
+    return {"workers_seen": len(workers), "session_store": store,
+            "turns_rejected": sum(d['turns']['rejected'] for d in workers.values())}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, xai_url, workdir):
+    """Run the app under gunicorn (or the Flask dev server) pointed at the fake xAI server."""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), HOST='127.0.0.1', XAI_API_URL=xai_url, XAI_API_KEY='load-test',
+               TWILIO_ACCOUNT_SID=os.getenv('TWILIO_ACCOUNT_SID', 'ACload'),
+               TWILIO_AUTH_TOKEN=os.getenv('TWILIO_AUTH_TOKEN', 'load'), WEB_CONCURRENCY=str(args.workers),
+               SESSION_DB_PATH=os.path.join(workdir, 'sessions.db'), CALL_LOG_DIR=os.path.join(workdir, 'call_logs'))
+    env.update(item.split('=', 1) for item in args.env)
+    if args.server == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', os.devnull, 'app:app']
+    else:
+        cmd = [sys.executable, 'app.py']
+    log = open(os.path.join(workdir, 'app.log'), 'w')
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base + '/test', timeout=1).ok:
+                return process, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"App did not start; see {log.name}")
+
+
+def compare(result, baseline, tolerance):
+    """List regressions of result against a previous run."""
+    problems = []
+    for route, stats in result['routes'].items():
+        before = baseline.get('routes', {}).get(route)
+        if before and stats['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            problems.append(f"{route}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+    if result['error_rate'] > baseline.get('error_rate', 0.0) + 0.01:
+        problems.append(f"error rate {baseline.get('error_rate')} -> {result['error_rate']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent call-flow load test')
+    parser.add_argument('--base', help='URL of a running app (default: start one under gunicorn)')
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20, help='calls in progress at once')
+    parser.add_argument('--turns', type=int, default=3, help='/handle_speech turns per call, including goodbye')
+    parser.add_argument('--think-time', type=float, default=0.0, help='seconds between guest turns')
+    parser.add_argument('--llm-latency', type=float, default=0.8)
+    parser.add_argument('--llm-jitter', type=float, default=0.2)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--server', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='extra app environment')
+    parser.add_argument('--output', help='also write the JSON result here')
+    parser.add_argument('--baseline', help='previous result to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative p95 increase')
+    args = parser.parse_args()
+
+    xai, process, workdir = None, None, tempfile.mkdtemp(prefix='hotel-load-')
+    base = args.base
+    if not base:
+        xai = FakeXAIServer(latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate).start()
+        process, base = start_app(args, xai.url, workdir)
+    try:
+        recorder = Recorder()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            completed = list(pool.map(lambda i: run_call(base, i, args.turns, recorder, args.think_time),
+                                      range(args.calls)))
+        elapsed = time.perf_counter() - start
+        requests_total = len(recorder.samples)
+        errors = sum(1 for _, _, ok in recorder.samples if not ok)
+        result = {
+            "config": {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+            "duration_s": round(elapsed, 2),
+            "calls": args.calls, "calls_completed": sum(completed),
+            "calls_per_s": round(args.calls / elapsed, 2), "requests_per_s": round(requests_total / elapsed, 2),
+            "requests": requests_total, "errors": errors,
+            "error_rate": round(errors / requests_total, 4) if requests_total else 0.0,
+            "fallback_replies": recorder.fallback_replies,
+            "llm_requests": xai.requests if xai else None,
+            "routes": recorder.routes(),
+            "server": collect_stats(base, probes=max(8, args.workers * 8)),
+        }
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if xai:
+            xai.stop()
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
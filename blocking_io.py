@@ -0,0 +1,33 @@
+# blocking_io.py - Run blocking storage calls off the gevent hub
+#
+# gevent's monkey patching makes sockets and sleeps cooperative, but not
+# sqlite3 (a C library waiting on its own file locks, for up to the busy
+# timeout) or fcntl.flock. Called from a greenlet, either one stalls every
+# call the worker is serving. run_blocking() hands such a call to the hub's
+# pool of real OS threads and parks only the calling greenlet until it
+# returns. The hand-off costs a trip through the hub, so callers try the
+# non-waiting form inline first (busy timeout 0, LOCK_NB) and only wait here
+# when the lock is actually held. In a process that isn't patched (the Flask
+# dev server, main.py, benchmarks) it just calls the function.
+
+import sys
+from typing import Callable, TypeVar
+
+T = TypeVar('T')
+
+
+def gevent_patched() -> bool:
+    """True once gunicorn's gevent worker has monkey-patched this process."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def run_blocking(fn: Callable[..., T], *args) -> T:
+    """fn(*args) on a native thread under gevent (exceptions re-raised here), inline otherwise.
+
+    fn must not take gevent-patched locks: those belong to the hub's thread.
+    """
+    if gevent_patched():
+        from gevent import get_hub
+        return get_hub().threadpool.apply(fn, args)
+    return fn(*args)
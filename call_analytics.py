@@ -0,0 +1,359 @@
+# call_analytics.py - Incremental rollups, filtered paging and export over the call log
+#
+# CallAnalytics follows the call log: each refresh folds only the entries
+# appended since the last one into hourly rollups (calls, turns, escalations,
+# service, language and routing-tier mix, an LLM latency histogram) and into position lists
+# per CallSid, caller number and service. A dashboard summary merges at most
+# `hours` rollups and a page reads at most `limit` matching entries, so neither
+# depends on how long the log is.
+#
+# Memory is bounded too: the filter indexes cover the last INDEX_ENTRIES
+# entries. A filtered page that reaches past them scans older entries, at most
+# SCAN_LIMIT per request, and hands back a cursor to carry on from. Each worker
+# keeps its own copy; every CHECKPOINT_ENTRIES folded entries (or
+# CHECKPOINT_INTERVAL seconds) it is saved next to the log's segments, so a
+# restarted worker loads the checkpoint and folds only the entries logged since.
+
+import bisect
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from call_log import CallLog
+
+logger = logging.getLogger(__name__)
+
+# LLM latency histogram bounds in ms (roughly 25% apart, 10 ms to ~50 s); the last bucket is open
+LATENCY_BOUNDS = [round(10 * 1.25 ** i) for i in range(39)]
+MAX_HOURS = 24 * 31  # Hourly rollups kept
+ACTIVE_CALLS = 10000  # Calls remembered for once-per-call counting (service/language mix)
+INDEX_ENTRIES = 100000  # Most recent entries covered by the CallSid / caller / service indexes
+SCAN_LIMIT = 10000  # Entries a filtered page may look at before returning a cursor to continue from
+CALL_SCAN_LIMIT = 200000  # The same for a CallSid filter, which older entries are checked against in the index alone
+EXPORT_BATCH = 500
+PAGE_BATCH = 200
+CHECKPOINT_FILE = 'analytics.json'
+CHECKPOINT_VERSION = 1
+CHECKPOINT_ENTRIES = 10000  # Save the rollups after folding this many entries...
+CHECKPOINT_INTERVAL = 300  # ...or this many seconds after the last save, if anything was folded
+EXPORT_FIELDS = ['timestamp', 'event', 'call_sid', 'hotel', 'from', 'service', 'lang', 'turn', 'speech', 'ai_reply',
+                 'reply_source', 'route', 'route_reason', 'llm_ms', 'escalation', 'intent', 'outcome', 'duration_s']
+
+
+def entry_event(entry: Dict) -> str:
+    """Kind of log entry; entries written before events were recorded are inferred."""
+    if 'event' in entry:
+        return entry['event']
+    return 'call_start' if entry.get('service') == 'initial' else 'turn'
+
+
+def _matches(entry, checks):
+    return all(str(entry.get(field)) == value for field, value in checks)
+
+
+def _new_hour():
+    return {'calls': 0, 'turns': 0, 'escalations': 0, 'services': {}, 'languages': {}, 'routes': {},
+            'latency': [0] * (len(LATENCY_BOUNDS) + 1)}
+
+
+def _percentile(histogram, pct):
+    total = sum(histogram)
+    if not total:
+        return None
+    target, seen = pct / 100.0 * total, 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return LATENCY_BOUNDS[i] if i < len(LATENCY_BOUNDS) else LATENCY_BOUNDS[-1]
+    return LATENCY_BOUNDS[-1]
+
+
+class CallAnalytics:
+    """Rollups and indexes kept current by folding in newly logged entries."""
+
+    def __init__(self, call_log: CallLog):
+        self.call_log = call_log
+        self.checkpoint_path = os.path.join(call_log.directory, CHECKPOINT_FILE)
+        self._position = 0
+        self._hours: "OrderedDict[str, Dict]" = OrderedDict()  # 'YYYY-MM-DDTHH' -> rollup
+        self._calls: "OrderedDict[str, Dict]" = OrderedDict()  # Recently active call -> what was counted
+        self._by_call: Dict[str, deque] = {}
+        self._by_caller: Dict[str, deque] = {}
+        self._by_service: Dict[str, deque] = {}
+        self._indexed: deque = deque()  # (position, CallSid, caller, service) of each indexed entry, oldest first
+        self._index_floor = 0  # Entries before this position are no longer indexed
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._load_checkpoint()
+
+    # -- folding ---------------------------------------------------------
+
+    def refresh(self):
+        """Fold in entries logged (by any worker) since the last refresh."""
+        with self._lock:
+            while True:
+                batch, self._position = self.call_log.entries_since(self._position)
+                for position, entry in batch:
+                    self._fold(position, entry)
+                self._unsaved += len(batch)
+                if not batch:
+                    break
+            if self._unsaved >= CHECKPOINT_ENTRIES or (
+                    self._unsaved and time.monotonic() - self._saved_at >= CHECKPOINT_INTERVAL):
+                self._save_checkpoint()
+
+    def _index(self, position, call_sid, caller, service):
+        """Add an entry to the filter indexes, dropping the oldest entry once INDEX_ENTRIES are indexed."""
+        keys = (call_sid, caller, service)
+        for index, key in zip((self._by_call, self._by_caller, self._by_service), keys):
+            if key:
+                index.setdefault(key, deque()).append(position)
+        self._indexed.append((position,) + keys)
+        if len(self._indexed) > INDEX_ENTRIES:
+            _, *old = self._indexed.popleft()
+            for index, key in zip((self._by_call, self._by_caller, self._by_service), old):
+                if key:
+                    positions = index[key]
+                    positions.popleft()  # Positions are appended in order, so the oldest is first
+                    if not positions:
+                        del index[key]
+            self._index_floor = self._indexed[0][0]
+
+    def _call(self, call_sid):
+        seen = self._calls.get(call_sid)
+        if seen is None:
+            seen = self._calls[call_sid] = {'services': set(), 'lang': False}
+            if len(self._calls) > ACTIVE_CALLS:
+                self._calls.popitem(last=False)
+        else:
+            self._calls.move_to_end(call_sid)
+        return seen
+
+    def _fold(self, position, entry):
+        hour_key = entry.get('timestamp', '')[:13]
+        hour = self._hours.get(hour_key)
+        if hour is None:
+            hour = self._hours[hour_key] = _new_hour()
+            while len(self._hours) > MAX_HOURS:
+                self._hours.popitem(last=False)
+        call_sid = str(entry.get('call_sid', ''))
+        event = entry_event(entry)
+        service = entry.get('service')
+        self._index(position, call_sid, entry.get('from') or None, service or None)
+        if event == 'call_start':
+            hour['calls'] += 1
+            return
+        if event == 'call_end':
+            return  # Post-call record: listed and exported, not counted
+        if event == 'escalation':
+            hour['escalations'] += 1
+            return
+        hour['turns'] += 1
+        seen = self._call(call_sid)
+        if service:
+            if service not in seen['services']:
+                seen['services'].add(service)
+                hour['services'][service] = hour['services'].get(service, 0) + 1
+        if entry.get('lang') is not None and not seen['lang']:
+            seen['lang'] = True
+            lang = str(entry['lang'])
+            hour['languages'][lang] = hour['languages'].get(lang, 0) + 1
+        if entry.get('route'):
+            hour['routes'][entry['route']] = hour['routes'].get(entry['route'], 0) + 1
+        if entry.get('llm_ms') is not None:
+            hour['latency'][bisect.bisect_left(LATENCY_BOUNDS, entry['llm_ms'])] += 1
+
+    # -- checkpoints -----------------------------------------------------
+
+    def _save_checkpoint(self):
+        """Write the rollups, active calls and indexes next to the log (atomically; any worker's will do)."""
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'log': self.call_log.head(),
+            'position': self._position,
+            'index_floor': self._index_floor,
+            'hours': self._hours,
+            'calls': [[call_sid, sorted(seen['services']), seen['lang']] for call_sid, seen in self._calls.items()],
+            'indexed': list(self._indexed),
+        }
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(tmp, self.checkpoint_path)
+        except OSError as e:
+            logger.warning("Analytics checkpoint not saved: %s", e)
+            return
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+
+    def _load_checkpoint(self):
+        """Start from the saved rollups, unless there are none or they belong to another (recreated) log."""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Analytics checkpoint unreadable, rebuilding from the log: %s", e)
+            return
+        if (state.get('version') != CHECKPOINT_VERSION or state['log'] != self.call_log.head()
+                or state['position'] > self.call_log.end()):
+            logger.warning("Analytics checkpoint doesn't match the call log; rebuilding")
+            return
+        self._position = state['position']
+        self._hours = OrderedDict(state['hours'])
+        self._calls = OrderedDict((call_sid, {'services': set(services), 'lang': lang})
+                                  for call_sid, services, lang in state['calls'])
+        for position, call_sid, caller, service in state['indexed']:
+            self._index(position, call_sid, caller, service)
+        self._index_floor = state['index_floor']
+        logger.info("Analytics: loaded checkpoint, %d hours of rollups", len(self._hours))
+
+    # -- reading ---------------------------------------------------------
+
+    def summary(self, hours: int = 24) -> Dict:
+        """Totals, mixes and latency percentiles over the last `hours` hours (at most `hours` rollups)."""
+        self.refresh()
+        cutoff = (datetime.now() - timedelta(hours=hours - 1)).strftime('%Y-%m-%dT%H')
+        recent = []
+        with self._lock:
+            for key in reversed(self._hours):
+                if key < cutoff or len(recent) == hours:
+                    break
+                recent.append((key, self._hours[key]))
+        recent.reverse()
+        total = _new_hour()
+        per_hour = []
+        for key, hour in recent:
+            per_hour.append({'hour': key, 'calls': hour['calls'], 'turns': hour['turns'],
+                             'escalations': hour['escalations']})
+            for field in ('calls', 'turns', 'escalations'):
+                total[field] += hour[field]
+            for field in ('services', 'languages', 'routes'):
+                for name, count in hour[field].items():
+                    total[field][name] = total[field].get(name, 0) + count
+            total['latency'] = [a + b for a, b in zip(total['latency'], hour['latency'])]
+        return {
+            'hours': hours,
+            'calls': total['calls'],
+            'turns': total['turns'],
+            'escalations': total['escalations'],
+            'escalation_rate': round(total['escalations'] / total['calls'], 4) if total['calls'] else 0.0,
+            'services': dict(sorted(total['services'].items(), key=lambda item: -item[1])),
+            'languages': dict(sorted(total['languages'].items(), key=lambda item: -item[1])),
+            'routes': dict(sorted(total['routes'].items(), key=lambda item: -item[1])),
+            'llm_ms': {f"p{p}": _percentile(total['latency'], p) for p in (50, 90, 95, 99)},
+            'per_hour': per_hour,
+        }
+
+    def _candidates(self, call_sid, caller, service) -> Tuple[Optional[deque], List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Smallest matching index list (None = no filter), the filters left to check on its entries, and all filters."""
+        indexed = [(self._by_call, 'call_sid', call_sid), (self._by_caller, 'from', caller),
+                   (self._by_service, 'service', service)]
+        active = [(index.get(value, ()), field, value) for index, field, value in indexed if value]
+        if not active:
+            return None, [], []
+        active.sort(key=lambda item: len(item[0]))
+        return active[0][0], [(field, value) for _, field, value in active[1:]], [(field, value) for _, field, value in active]
+
+    def page(self, cursor: Optional[int] = None, limit: int = 50, call_sid: Optional[str] = None,
+             caller: Optional[str] = None, service: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Newest-first entries before cursor matching the filters, and the cursor for the next page.
+
+        A filtered page looks at no more than SCAN_LIMIT entries (CALL_SCAN_LIMIT for a CallSid): indexed
+        matches first, then, past the indexes, older entries one by one. If that runs out first the page
+        may be short, with a cursor.
+        """
+        self.refresh()
+        with self._lock:
+            end = self._position if cursor is None else min(cursor, self._position)
+            positions, checks, filters = self._candidates(call_sid, caller, service)
+            if positions is not None:
+                newest = len(positions) - bisect.bisect_left(positions, end)
+                positions = list(itertools.islice(reversed(positions), newest, newest + SCAN_LIMIT))
+            older = min(end, self._index_floor)
+        if not filters:
+            batch = self.call_log.positions_before(end, limit)
+            return self.call_log.read(batch), (batch[-1] if len(batch) == limit else None)
+        sources = [(positions, checks)]
+        more, oldest = len(positions) == SCAN_LIMIT, positions[-1] if positions else None
+        if not more and older:
+            # The index line carries the CallSid, so a CallSid filter skips other calls' entries unread
+            budget = (CALL_SCAN_LIMIT if call_sid else SCAN_LIMIT) - len(positions)
+            scanned = self.call_log.calls_before(older, budget)
+            sources.append(([pos for pos, sid in scanned if not call_sid or sid == call_sid], filters))
+            more, oldest = len(scanned) == budget, scanned[-1][0] if scanned else oldest
+        entries = []
+        for candidates, required in sources:
+            for start in range(0, len(candidates), PAGE_BATCH):
+                batch = candidates[start:start + PAGE_BATCH]
+                for position, entry in zip(batch, self.call_log.read(batch)):
+                    if _matches(entry, required):
+                        entries.append(entry)
+                        if len(entries) == limit:
+                            return entries, position
+        return entries, (oldest if more and oldest else None)
+
+    def _matching(self, call_sid, caller, service, since=None) -> Iterator[List[Dict]]:
+        """Every matching entry (timestamped since, if given), oldest first, a batch at a time."""
+        first = self.call_log.position_at(since) if since else 0
+        wanted = (lambda entry: datetime.fromisoformat(entry['timestamp']) >= since) if since else (lambda entry: True)
+        with self._lock:
+            end = self._position
+            positions, checks, filters = self._candidates(call_sid, caller, service)
+            if positions is not None:
+                positions = list(itertools.islice(positions, bisect.bisect_left(positions, first),
+                                                  bisect.bisect_left(positions, end)))
+            older = min(end, self._index_floor)
+        if positions is None or first < older:
+            # Everything, or the entries older than the indexes: read the log in order
+            position, stop = first, end if positions is None else older
+            while True:
+                batch, position = self.call_log.entries_since(position, EXPORT_BATCH, stop)
+                if not batch:
+                    break
+                yield [entry for _, entry in batch if _matches(entry, filters) and wanted(entry)]
+        if positions is not None:
+            for start in range(0, len(positions), EXPORT_BATCH):
+                yield [e for e in self.call_log.read(positions[start:start + EXPORT_BATCH])
+                       if _matches(e, checks) and wanted(e)]
+
+    def export(self, fmt: str = 'csv', call_sid: Optional[str] = None, caller: Optional[str] = None,
+               service: Optional[str] = None, since: Optional[datetime] = None) -> Iterator[str]:
+        """Stream every matching entry (from since on, if given), oldest first, as CSV rows or a JSON array.
+
+        since seeks into the log (CallLog.position_at), so a recent export doesn't read the older history.
+        """
+        self.refresh()
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+        else:
+            yield '['
+        first = True
+        for rows in self._matching(call_sid, caller, service, since):
+            if fmt == 'csv':
+                for entry in rows:
+                    writer.writerow(dict(entry, event=entry_event(entry)))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                for entry in rows:
+                    yield ('' if first else ',\n') + json.dumps(entry, ensure_ascii=False)
+                    first = False
+        if fmt == 'csv':
+            yield buffer.getvalue()
+        else:
+            yield ']\n'
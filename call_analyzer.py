@@ -0,0 +1,82 @@
+# call_analyzer.py - Running per-call features, updated once per new message
+#
+# The analysis is a plain dict stored in the session (conv['analysis']), so it
+# travels with every session backend. Each message costs O(len(message)) (times
+# the handful of escalation phrases): nothing re-reads the history.
+
+from typing import Dict, List, Optional
+
+from intent_matcher import IntentMatcher, tokenize
+from language_id import LanguageTracker
+from metrics import span
+
+# Escalation signals and their weights: a strong phrase escalates on its own,
+# weak ones only when they repeat within a couple of turns. Asking for a person
+# is a phrase ("speak to a person"), not the word: "a table for one person" isn't.
+ESCALATION_WEIGHTS = {
+    'human': 1.0, 'real person': 1.0, 'live person': 1.0, 'speak to a person': 1.0, 'talk to a person': 1.0,
+    'speak with a person': 1.0, 'manager': 1.0, 'supervisor': 1.0, 'operator': 1.0, 'representative': 1.0,
+    'complaint': 0.6, 'complain': 0.6, 'issue': 0.6, 'problem': 0.6, 'unacceptable': 0.6, 'ridiculous': 0.6,
+}
+
+# Phrases that contain a signal word but aren't frustration
+NEUTRAL_PHRASES = ('no problem', 'not a problem', 'no issue', 'not an issue')
+
+# Signal words that are simply how guests describe what a service handles ("the AC has a problem")
+SERVICE_WORDS = {
+    'maintenance': {'problem', 'issue'},
+}
+
+
+class CallAnalyzer:
+    """Updates escalation score (with recency decay), language, intent and turn count per message."""
+
+    def __init__(self, language_tracker: LanguageTracker, intent_matcher: IntentMatcher,
+                 weights: Dict[str, float] = ESCALATION_WEIGHTS, decay: float = 0.7,
+                 escalate_at: float = 1.0, hint_at: float = 0.5):
+        self.language_tracker = language_tracker
+        self.intent_matcher = intent_matcher
+        self.weights = weights
+        self.decay = decay  # Applied to the escalation score once per guest turn
+        self.escalate_at = escalate_at
+        self.hint_at = hint_at
+
+    @staticmethod
+    def new_state(lang: int = 1) -> Dict:
+        return {'turns': 0, 'messages': 0, 'escalation': 0.0, 'last_signals': [], 'lang': lang,
+                'lang_candidate': None, 'intent': None, 'intent_confidence': 0.0}
+
+    def signals(self, text: str, service: Optional[str] = None) -> List[str]:
+        """Escalation phrases in a guest message, leaving out the service's own vocabulary."""
+        padded = f" {' '.join(tokenize(text))} "
+        for phrase in NEUTRAL_PHRASES:
+            padded = padded.replace(f" {phrase} ", ' ')
+        ignored = SERVICE_WORDS.get(service, ())
+        return [p for p in self.weights if p not in ignored and f" {p} " in padded]
+
+    def observe(self, state: Dict, role: str, text: str, service: Optional[str] = None) -> Dict:
+        """Fold one message into state (in place) and return it."""
+        state['messages'] += 1
+        if role != 'user':
+            return state
+        state['turns'] += 1
+        signals = self.signals(text, service)
+        state['escalation'] = round(state['escalation'] * self.decay + sum(self.weights[w] for w in signals), 4)
+        state['last_signals'] = signals
+        with span('language'):
+            state['lang'], state['lang_candidate'] = self.language_tracker.update(
+                state['lang'], state['lang_candidate'], text)
+        with span('intent'):
+            intent = self.intent_matcher.match(text, state['lang'])
+        if intent.service is not None:
+            state['intent'] = intent.service
+            state['intent_confidence'] = round(intent.confidence, 3)
+        return state
+
+    def should_escalate(self, state: Optional[Dict]) -> bool:
+        """The guest is asking for a human now (or has kept complaining)."""
+        return bool(state) and state['escalation'] >= self.escalate_at
+
+    def escalation_hint(self, state: Optional[Dict]) -> bool:
+        """Recent frustration the assistant should acknowledge, short of transferring."""
+        return bool(state) and state['escalation'] >= self.hint_at
@@ -0,0 +1,326 @@
+# call_log.py - Append-only, segmented call log with a compact index
+#
+# Entries are written as JSON lines into segments named calls-YYYYMMDD-NNN.jsonl,
+# rotated per day and whenever a segment reaches max_segment_bytes. Every append
+# also writes one line per entry to the index (write time, CallSid, segment,
+# offset, length), so "last N", "since" and per-CallSid scans read the small
+# index and then seek straight to the entries they need.
+#
+# The index is split into one file per day, index-YYYYMMDD-<base>.tsv, where
+# base is the number of index bytes before it: together they read as one
+# stream, and an entry's position is the byte offset of its index line in that
+# stream. Index lines are stamped when they are written, never earlier than the
+# line before, so the stream is ordered by time even when entries carry older
+# timestamps (the write-behind queue stamps them when they are queued). Readers
+# seek into the index for every lookup, so a process keeps nothing per entry in
+# memory and opening a log of any length costs nothing.
+
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from blocking_io import run_blocking
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; fall back to in-process locking only
+    fcntl = None
+
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+LOCK_FILE = 'index.lock'
+READ_BYTES = 64 * 1024  # Index bytes read at a time; far longer than any index line
+
+
+def _segment_seq(name):
+    return int(name[:-len('.jsonl')].rsplit('-', 1)[1])
+
+
+def _index_base(name):
+    return int(name[:-len('.tsv')].rsplit('-', 1)[1])
+
+
+class CallLog:
+    """Append-only JSONL log shared safely by threads and worker processes."""
+
+    def __init__(self, directory: str, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._lock_fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        self._segment = None  # (name, fd) of the segment this process appends to
+        self._index = None  # (name, fd) of the index file this process appends to
+        self._bases: List[int] = []  # Index files known so far (one per day), oldest first: base...
+        self._index_fds: List[int] = []  # ...and a read descriptor
+        self._files_lock = threading.Lock()
+
+    # -- writing ---------------------------------------------------------
+
+    def _segment_names(self, day):
+        prefix = f"calls-{day}-"
+        names = [n for n in os.listdir(self.directory) if n.startswith(prefix) and n.endswith('.jsonl')]
+        return sorted(names, key=_segment_seq)
+
+    def _active_segment(self, day):
+        """Return (name, fd) of the segment to append to, rotating by day and size."""
+        if self._segment and self._segment[0].startswith(f"calls-{day}-"):
+            if os.fstat(self._segment[1]).st_size < self.max_segment_bytes:
+                return self._segment
+        # Another process may already have rotated, so look at what's on disk.
+        names = self._segment_names(day)
+        seq = _segment_seq(names[-1]) if names else 0
+        name = names[-1] if names else f"calls-{day}-000.jsonl"
+        if names and os.path.getsize(os.path.join(self.directory, name)) >= self.max_segment_bytes:
+            seq += 1
+            name = f"calls-{day}-{seq:03d}.jsonl"
+        if self._segment:
+            os.close(self._segment[1])
+        fd = os.open(os.path.join(self.directory, name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._segment = (name, fd)
+        return self._segment
+
+    def append(self, entry: Dict) -> Dict:
+        """Append one entry, stamping it with a timestamp if it has none."""
+        return self.append_many([entry])[0]
+
+    def _active_index(self, day):
+        """Return (name, fd) of the index file to append to, starting a new one each day."""
+        if self._index and self._index[0].startswith(f"index-{day}-"):
+            return self._index
+        # Another process may already have started today's file
+        self._refresh_index()
+        names = self._index_names()
+        if names and names[-1].startswith(f"index-{day}-"):
+            name = names[-1]
+        else:
+            name = f"index-{day}-{self._index_size():012d}.tsv"
+        if self._index:
+            os.close(self._index[1])
+        fd = os.open(os.path.join(self.directory, name), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._index = (name, fd)
+        return self._index
+
+    def _last_stamp(self, fd) -> float:
+        """Write time of the last line in an index file (0 if it has none)."""
+        size = os.fstat(fd).st_size
+        data = os.pread(fd, min(size, 256), max(0, size - 256)) if size else b''
+        return float(data.rstrip(b'\n').rsplit(b'\n', 1)[-1].split(b'\t', 1)[0]) if data else 0.0
+
+    def append_many(self, entries: List[Dict]) -> List[Dict]:
+        """Append entries in order under one lock: one segment write per day and one index write."""
+        entries = [dict(entry) for entry in entries]
+        rows = []  # (day, CallSid, line)
+        for entry in entries:
+            entry.setdefault('timestamp', datetime.now().isoformat())
+            day = datetime.fromisoformat(entry['timestamp']).strftime('%Y%m%d')
+            line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+            rows.append((day, str(entry.get('call_sid', '')).replace('\t', ' '), line))
+        with self._lock:
+            self._lock_index()
+            try:
+                now = time.time()
+                name, index_fd = self._active_index(datetime.fromtimestamp(now).strftime('%Y%m%d'))
+                stamp = max(now, self._last_stamp(index_fd))  # The clock can step back; the index can't
+                index = []
+                start = 0
+                while start < len(rows):
+                    day = rows[start][0]
+                    end = start
+                    while end < len(rows) and rows[end][0] == day:
+                        end += 1
+                    segment, fd = self._active_segment(day)
+                    offset = os.fstat(fd).st_size  # Nobody else appends while we hold the lock
+                    os.write(fd, b''.join(row[2] for row in rows[start:end]))
+                    for _, call_sid, line in rows[start:end]:
+                        index.append(f"{stamp:.6f}\t{call_sid}\t{segment}\t{offset}\t{len(line)}\n")
+                        offset += len(line)
+                    start = end
+                os.write(index_fd, ''.join(index).encode('utf-8'))
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return entries
+
+    def _lock_index(self):
+        """Take the cross-process file lock, waiting on a native thread if another process holds it.
+
+        flock isn't cooperative under gevent: a blocking wait would stall every call the worker serves.
+        """
+        if not fcntl:
+            return
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            run_blocking(fcntl.flock, self._lock_fd, fcntl.LOCK_EX)
+
+    # -- reading ---------------------------------------------------------
+
+    def _index_names(self):
+        names = [n for n in os.listdir(self.directory) if n.startswith('index-') and n.endswith('.tsv')]
+        return sorted(names, key=_index_base)
+
+    def _refresh_index(self):
+        """Pick up index files started (by any process) since the last look."""
+        with self._files_lock:
+            for name in self._index_names():
+                base = _index_base(name)
+                if not self._bases or base > self._bases[-1]:
+                    self._index_fds.append(os.open(os.path.join(self.directory, name), os.O_RDONLY))
+                    self._bases.append(base)  # Last, so readers never find a base without its descriptor
+
+    def _index_size(self) -> int:
+        """Bytes in the index stream, including any line a writer is part-way through."""
+        self._refresh_index()
+        return self._bases[-1] + os.fstat(self._index_fds[-1]).st_size if self._bases else 0
+
+    def _pread(self, size: int, position: int) -> bytes:
+        """Up to size bytes of the index stream from position, across its files."""
+        chunks = []
+        while size > 0:
+            i = bisect.bisect_right(self._bases, position) - 1
+            if i < 0:
+                break
+            data = os.pread(self._index_fds[i], size, position - self._bases[i])
+            if not data:
+                if i + 1 < len(self._bases):
+                    break  # Can't happen: a file is complete once the next one starts
+                self._refresh_index()
+                if i + 1 == len(self._bases):
+                    break
+                continue
+            chunks.append(data)
+            position += len(data)
+            size -= len(data)
+        return b''.join(chunks)
+
+    def head(self) -> str:
+        """The first index line: identifies this log (one deleted and started again begins differently)."""
+        self._refresh_index()
+        data = self._pread(256, 0)
+        return data[:data.find(b'\n') + 1].decode('utf-8', 'replace')
+
+    def end(self) -> int:
+        """Position after the last complete entry (a writer may be part-way through the next index line)."""
+        size = self._index_size()
+        start = max(0, size - READ_BYTES)
+        return start + self._pread(size - start, start).rfind(b'\n') + 1
+
+    def _lines_from(self, start: int, stop: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """(position, index line) from start up to stop, oldest first, read a block at a time."""
+        stop = self.end() if stop is None else stop
+        pos = start
+        while pos < stop:
+            data = self._pread(min(READ_BYTES, stop - pos), pos)
+            end = data.rfind(b'\n') + 1
+            if not end:
+                return
+            for raw in data[:end].splitlines(keepends=True):
+                yield pos, raw
+                pos += len(raw)
+
+    def _lines_before(self, stop: int) -> Iterator[Tuple[int, bytes]]:
+        """(position, index line) before stop, newest first, read a block at a time."""
+        while stop > 0:
+            start = max(0, stop - READ_BYTES)
+            data = self._pread(stop - start, start)
+            first = data.find(b'\n') + 1 if start else 0  # A line cut by the block start comes with the next block
+            pos = stop
+            for raw in reversed(data[first:].splitlines(keepends=True)):
+                pos -= len(raw)
+                yield pos, raw
+            stop = start + first
+
+    def _line_at(self, position: int) -> Tuple[int, bytes]:
+        """Start and text of the index line containing the byte at position."""
+        start = position
+        while start > 0:
+            step = min(start, 256)
+            newline = self._pread(step, start - step).rfind(b'\n')
+            if newline >= 0:
+                start += newline + 1 - step
+                break
+            start -= step
+        return start, self._line(start)
+
+    def _line(self, position: int) -> bytes:
+        """The index line starting at position."""
+        size = 256
+        while True:
+            data = self._pread(size, position)
+            newline = data.find(b'\n')
+            if newline >= 0 or len(data) < size:
+                return data[:newline + 1]
+            size *= 4
+
+    @staticmethod
+    def _ref(raw: bytes) -> Tuple[float, str, str, int, int]:
+        ts, call_sid, name, offset, length = raw.decode('utf-8').rstrip('\n').split('\t')
+        return float(ts), call_sid, name, int(offset), int(length)
+
+    def _read_lines(self, lines: Iterable[Tuple[int, bytes]]) -> List[Dict]:
+        """Load the entries behind index lines, opening each segment once per run."""
+        entries = []
+        handle, current = None, None
+        try:
+            for _, raw in lines:
+                _, _, name, offset, length = self._ref(raw)
+                if name != current:
+                    if handle:
+                        handle.close()
+                    handle, current = open(os.path.join(self.directory, name), 'rb'), name
+                handle.seek(offset)
+                entries.append(json.loads(handle.read(length)))
+        finally:
+            if handle:
+                handle.close()
+        return entries
+
+    def read(self, positions: Iterable[int]) -> List[Dict]:
+        """Load entries at the given positions."""
+        return self._read_lines((pos, self._line(pos)) for pos in positions)
+
+    def positions_before(self, stop: int, limit: int) -> List[int]:
+        """Positions of up to limit entries logged before stop, newest first."""
+        return [pos for pos, _ in itertools.islice(self._lines_before(stop), limit)]
+
+    def calls_before(self, stop: int, limit: int) -> List[Tuple[int, str]]:
+        """(position, CallSid) of up to limit entries logged before stop, newest first (read from the index alone)."""
+        return [(pos, self._ref(raw)[1]) for pos, raw in itertools.islice(self._lines_before(stop), limit)]
+
+    def entries_since(self, position: int, limit: int = 1000, stop: Optional[int] = None) -> Tuple[List[Tuple[int, Dict]], int]:
+        """Return up to limit (position, entry) pairs appended at or after position (before stop), and the next position."""
+        lines = list(itertools.islice(self._lines_from(position, stop), limit))
+        end = lines[-1][0] + len(lines[-1][1]) if lines else position
+        return list(zip((pos for pos, _ in lines), self._read_lines(lines))), end
+
+    def _first_at(self, timestamp: float, end: int) -> int:
+        """Position of the first entry written at or after timestamp (binary search over the index)."""
+        lo, hi = 0, end
+        while lo < hi:
+            pos, raw = self._line_at((lo + hi) // 2)
+            if self._ref(raw)[0] < timestamp:
+                lo = pos + len(raw)
+            else:
+                hi = pos
+        return lo
+
+    def position_at(self, when: datetime) -> int:
+        """Position of the first entry written at or after when.
+
+        Every entry timestamped from when on comes after it, but entries queued before when and written
+        after it do too: filter on the entry's own timestamp.
+        """
+        return self._first_at(when.timestamp(), self.end())
+
+
+def create_call_log():
+    """Build the call log configured by CALL_LOG_DIR and CALL_LOG_SEGMENT_BYTES."""
+    return CallLog(
+        os.getenv('CALL_LOG_DIR', '/tmp/call_logs'),
+        int(os.getenv('CALL_LOG_SEGMENT_BYTES', DEFAULT_SEGMENT_BYTES)),
+    )
@@ -17,9 +17,9 @@ KNOWN_CALLERS = {
     # Add others: "+15551234567": "John",
 }
 
-# Simulated hotel data (expand to DB in production)
+# Simulated hotel data for the stub PMS backend (pms.py); "phone" lets /voice recognize an in-house guest's room
 HOTEL_DATA = {
-    "101": {"status": "checked_in", "balance": 50.00, "guest": "Saeed"},
+    "101": {"status": "checked_in", "balance": 50.00, "guest": "Saeed", "phone": "+19496693870"},
     "102": {"status": "checked_out", "balance": 0.00, "guest": "John"},
     # Add more rooms
 }
@@ -29,37 +29,278 @@ LANGUAGES = {
     1: {
         "lang": "en-US", 
         "voice": "polly.Amy-Neural", 
-        "welcome": '<prosody rate="slow">Hello <emphasis level="strong">{caller}</emphasis>, you are using version 0.2.0 of the <say-as interpret-as="characters">A I</say-as> hotel system.</prosody> <prosody rate="medium">Welcome. <break time="0.5s"/> How can I help you today? You can ask for room service, front desk, concierge, or housekeeping.</prosody>',
+        "welcome": '<prosody rate="slow">Hello <emphasis level="strong">{caller}</emphasis>, you are using version 0.2.4 of the <say-as interpret-as="characters">A I</say-as> hotel system.</prosody> <prosody rate="medium">Welcome. I speak most major languages. <break time="0.5s"/> How can I help you today? You can ask for room service, front desk, concierge, housekeeping, or maintenance.</prosody>',
         "room_prompt": '<prosody rate="medium">To assist better, what\'s your room number? <break time="0.3s"/></prosody>'
     },
     2: {
         "lang": "es-ES", 
         "voice": "polly.Mateo-Neural", 
-        "welcome": '<prosody rate="slow">Hola <emphasis level="strong">{caller}</emphasis>, estás usando la versión 0.2.0 del sistema de hotel <say-as interpret-as="characters">A I</say-as>.</prosody> <prosody rate="medium">Bienvenido. <break time="0.5s"/> ¿Cómo puedo ayudarte hoy? Puedes pedir servicio de habitación, recepción, conserjería o limpieza.</prosody>',
+        "welcome": '<prosody rate="slow">Hola <emphasis level="strong">{caller}</emphasis>, estás usando la versión 0.2.4 del sistema de hotel <say-as interpret-as="characters">A I</say-as>.</prosody> <prosody rate="medium">Bienvenido. <break time="0.5s"/> ¿Cómo puedo ayudarte hoy? Puedes pedir servicio de habitación, recepción, conserjería, limpieza o mantenimiento.</prosody>',
         "room_prompt": '<prosody rate="medium">¿Cuál es el número de tu habitación para ayudarte mejor? <break time="0.3s"/></prosody>'
     },
     3: {
         "lang": "fr-FR", 
         "voice": "polly.Bryan-Neural", 
-        "welcome": '<prosody rate="slow">Bonjour <emphasis level="strong">{caller}</emphasis>, vous utilisez la version 0.2.0 du système <say-as interpret-as="characters">A I</say-as> de l\'hôtel.</prosody> <prosody rate="medium">Bienvenue. <break time="0.5s"/> Comment puis-je vous aider aujourd\'hui ? Vous pouvez demander le service en chambre, la réception, le concierge ou le ménage.</prosody>',
+        "welcome": '<prosody rate="slow">Bonjour <emphasis level="strong">{caller}</emphasis>, vous utilisez la version 0.2.4 du système <say-as interpret-as="characters">A I</say-as> de l\'hôtel.</prosody> <prosody rate="medium">Bienvenue. <break time="0.5s"/> Comment puis-je vous aider aujourd\'hui ? Vous pouvez demander le service en chambre, la réception, le concierge, le ménage ou la maintenance.</prosody>',
         "room_prompt": '<prosody rate="medium">Pour mieux vous aider, quel est le numéro de votre chambre ? <break time="0.3s"/></prosody>'
     },
     4: {
         "lang": "de-DE", 
         "voice": "polly.Hans-Neural", 
-        "welcome": '<prosody rate="slow">Hallo <emphasis level="strong">{caller}</emphasis>, Sie verwenden Version 0.2.0 des Hotel-A-I-Systems.</prosody> <prosody rate="medium">Willkommen. <break time="0.5s"/> Wie kann ich Ihnen heute helfen? Sie können nach Zimmerservice, Rezeption, Concierge oder Hauswirtschaft fragen.</prosody>',
+        "welcome": '<prosody rate="slow">Hallo <emphasis level="strong">{caller}</emphasis>, Sie verwenden Version 0.2.4 des Hotel-A-I-Systems.</prosody> <prosody rate="medium">Willkommen. <break time="0.5s"/> Wie kann ich Ihnen heute helfen? Sie können nach Zimmerservice, Rezeption, Concierge, Hauswirtschaft oder Wartung fragen.</prosody>',
         "room_prompt": '<prosody rate="medium">Um besser zu helfen, was ist Ihre Zimmernummer? <break time="0.3s"/></prosody>'
     },
     5: {
         "lang": "it-IT", 
         "voice": "polly.Giorgio-Neural", 
-        "welcome": '<prosody rate="slow">Ciao <emphasis level="strong">{caller}</emphasis>, stai utilizzando la versione 0.2.0 del sistema hotel A-I.</prosody> <prosody rate="medium">Benvenuto. <break time="0.5s"/> Come posso aiutarti oggi? Puoi chiedere per room service, reception, concierge o housekeeping.</prosody>',
+        "welcome": '<prosody rate="slow">Ciao <emphasis level="strong">{caller}</emphasis>, stai utilizzando la versione 0.2.4 del sistema hotel A-I.</prosody> <prosody rate="medium">Benvenuto. <break time="0.5s"/> Come posso aiutarti oggi? Puoi chiedere per room service, reception, concierge, housekeeping o manutenzione.</prosody>',
         "room_prompt": '<prosody rate="medium">Per aiutarti meglio, qual è il tuo numero di stanza? <break time="0.3s"/></prosody>'
     },
     6: {
         "lang": "ja-JP", 
         "voice": "polly.Mizuki-Neural", 
-        "welcome": '<prosody rate="slow">こんにちは <emphasis level="strong">{caller}</emphasis> 様、ホテルのA-Iシステムバージョン0.2.0をお使いです。</prosody> <prosody rate="medium">ようこそ。<break time="0.5s"/> 今日どのようにお手伝いしましょうか？ルームサービス、フロントデスク、コンシェルジュ、またはハウスキーピングをリクエストできます。</prosody>',
+        "welcome": '<prosody rate="slow">こんにちは <emphasis level="strong">{caller}</emphasis> 様、ホテルのA-Iシステムバージョン0.2.4をお使いです。</prosody> <prosody rate="medium">ようこそ。<break time="0.5s"/> 今日どのようにお手伝いしましょうか？ルームサービス、フロントデスク、コンシェルジュ、ハウスキーピング、またはメンテナンスをリクエストできます。</prosody>',
         "room_prompt": '<prosody rate="medium">より良くお手伝いするために、お部屋の番号は何ですか？ <break time="0.3s"/></prosody>'
     }
 }
+
+# Remaining caller-facing prompts per language (keys match LANGUAGES). Like welcome/room_prompt these
+# are TwiML <Say> markup (SSML allowed) with {slots} filled in per call; missing keys fall back to English.
+PROMPTS = {
+    1: {
+        "room_noted": "Thanks, noted for room {room}. {guest}, your balance is ${balance}. How can I help?",
+        "connected": "Connected to {service}. How can I help you today? You can speak or press pound to end.",
+        "connected_relay": "Connected to {service}. How can I help you today?",
+        "not_understood": "Sorry, I didn't understand. Tell me what you need: room service, front desk, concierge, housekeeping, or maintenance.",
+        "anything_else": "What else can I help with? Say or press pound to end.",
+        "one_moment": "One moment please.",
+        "hold": "I'll connect you to a staff member right away. Please hold.",
+        "goodbye": "Thank you for calling. Goodbye!",
+        "thanks_reply": "You're welcome!",
+        "confirm_reply": "Great, that's confirmed.",
+        "balance_reply": "The balance for room {room} is ${balance}.",
+        "status_reply": "Room {room} is registered to {guest}, status: {status}.",
+        "error": "Sorry, something went wrong. Please call back or press any key to end."
+    },
+    2: {
+        "room_noted": "Gracias, anotado para la habitación {room}. {guest}, su saldo es de ${balance}. ¿En qué puedo ayudarle?",
+        "connected": "Conectado con {service}. ¿Cómo puedo ayudarle hoy? Puede hablar o pulsar almohadilla para terminar.",
+        "connected_relay": "Conectado con {service}. ¿Cómo puedo ayudarle hoy?",
+        "not_understood": "Perdón, no le entendí. Dígame qué necesita: servicio de habitación, recepción, conserjería, limpieza o mantenimiento.",
+        "anything_else": "¿En qué más puedo ayudarle? Hable o pulse almohadilla para terminar.",
+        "one_moment": "Un momento, por favor.",
+        "hold": "Le paso con un miembro del personal enseguida. Por favor, espere.",
+        "goodbye": "Gracias por llamar. ¡Adiós!",
+        "thanks_reply": "¡De nada!",
+        "confirm_reply": "Perfecto, queda confirmado.",
+        "balance_reply": "El saldo de la habitación {room} es de ${balance}.",
+        "status_reply": "La habitación {room} está a nombre de {guest}, estado: {status}."
+    },
+    3: {
+        "room_noted": "Merci, c'est noté pour la chambre {room}. {guest}, votre solde est de ${balance}. Comment puis-je vous aider ?",
+        "connected": "Vous êtes en ligne avec {service}. Comment puis-je vous aider aujourd'hui ? Parlez ou appuyez sur dièse pour terminer.",
+        "connected_relay": "Vous êtes en ligne avec {service}. Comment puis-je vous aider aujourd'hui ?",
+        "not_understood": "Désolé, je n'ai pas compris. Dites-moi ce dont vous avez besoin : service en chambre, réception, concierge, ménage ou maintenance.",
+        "anything_else": "Puis-je vous aider pour autre chose ? Parlez ou appuyez sur dièse pour terminer.",
+        "one_moment": "Un instant, s'il vous plaît.",
+        "hold": "Je vous mets en relation avec un membre du personnel. Veuillez patienter.",
+        "goodbye": "Merci de votre appel. Au revoir !",
+        "thanks_reply": "Je vous en prie !",
+        "confirm_reply": "Parfait, c'est confirmé.",
+        "balance_reply": "Le solde de la chambre {room} est de ${balance}.",
+        "status_reply": "La chambre {room} est au nom de {guest}, statut : {status}."
+    },
+    4: {
+        "room_noted": "Danke, notiert für Zimmer {room}. {guest}, Ihr Saldo beträgt ${balance}. Wie kann ich helfen?",
+        "connected": "Verbunden mit {service}. Wie kann ich Ihnen heute helfen? Sprechen Sie oder drücken Sie die Raute-Taste zum Beenden.",
+        "connected_relay": "Verbunden mit {service}. Wie kann ich Ihnen heute helfen?",
+        "not_understood": "Entschuldigung, das habe ich nicht verstanden. Was brauchen Sie: Zimmerservice, Rezeption, Concierge, Hauswirtschaft oder Wartung?",
+        "anything_else": "Womit kann ich sonst noch helfen? Sprechen Sie oder drücken Sie die Raute-Taste zum Beenden.",
+        "one_moment": "Einen Moment bitte.",
+        "hold": "Ich verbinde Sie sofort mit einem Mitarbeiter. Bitte bleiben Sie dran.",
+        "goodbye": "Danke für Ihren Anruf. Auf Wiederhören!",
+        "thanks_reply": "Gern geschehen!",
+        "confirm_reply": "Prima, das ist bestätigt.",
+        "balance_reply": "Der Saldo für Zimmer {room} beträgt ${balance}.",
+        "status_reply": "Zimmer {room} ist auf {guest} gebucht, Status: {status}."
+    },
+    5: {
+        "room_noted": "Grazie, annotato per la camera {room}. {guest}, il suo saldo è di ${balance}. Come posso aiutarla?",
+        "connected": "Collegato con {service}. Come posso aiutarla oggi? Parli o prema cancelletto per terminare.",
+        "connected_relay": "Collegato con {service}. Come posso aiutarla oggi?",
+        "not_understood": "Mi scusi, non ho capito. Mi dica di cosa ha bisogno: room service, reception, concierge, housekeeping o manutenzione.",
+        "anything_else": "Posso aiutarla con altro? Parli o prema cancelletto per terminare.",
+        "one_moment": "Un momento, per favore.",
+        "hold": "La metto subito in contatto con un membro del personale. Resti in linea.",
+        "goodbye": "Grazie per aver chiamato. Arrivederci!",
+        "thanks_reply": "Prego!",
+        "confirm_reply": "Perfetto, è confermato.",
+        "balance_reply": "Il saldo della camera {room} è di ${balance}.",
+        "status_reply": "La camera {room} è intestata a {guest}, stato: {status}."
+    },
+    6: {
+        "room_noted": "ありがとうございます。{room}号室で承りました。{guest}様、残高は${balance}です。ご用件をどうぞ。",
+        "connected": "{service}におつなぎしました。ご用件をお話しください。終了するにはシャープを押してください。",
+        "connected_relay": "{service}におつなぎしました。ご用件をお話しください。",
+        "not_understood": "申し訳ありません、聞き取れませんでした。ルームサービス、フロントデスク、コンシェルジュ、ハウスキーピング、メンテナンスのどれをご希望ですか？",
+        "anything_else": "他にご用件はございますか？終了するにはシャープを押してください。",
+        "one_moment": "少々お待ちください。",
+        "hold": "ただいまスタッフにおつなぎします。そのままお待ちください。",
+        "goodbye": "お電話ありがとうございました。失礼いたします。",
+        "thanks_reply": "どういたしまして。",
+        "confirm_reply": "かしこまりました。確定いたしました。",
+        "balance_reply": "{room}号室の残高は${balance}です。",
+        "status_reply": "{room}号室は{guest}様のお名前で、ステータスは{status}です。"
+    }
+}
+
+# Model routing (model_router.py): phrases per language that decide whether a guest turn is answered
+# from a template above (thanks, confirm, balance, status), by the fast model, or needs the full model
+# (open_ended). thanks (which includes farewells) / confirm must make up the whole utterance, and so must balance / status
+# together with ask (question words and the small words around them), so "put it on my bill" isn't a balance question;
+# the others only have to appear in it.
+# confirm_question marks an assistant reply that asked the guest to confirm something.
+ROUTER_PHRASES = {
+    1: {
+        "thanks": ["thank you", "thanks", "thank you very much", "thanks a lot", "great", "perfect", "awesome", "cool",
+                   "ok", "okay", "got it", "sounds good", "alright", "all right", "wonderful", "excellent", "bye", "goodbye",
+                   "bye bye"],
+        "confirm": ["yes", "yeah", "yep", "correct", "that's right", "that is right", "that's correct", "exactly", "sure",
+                    "yes please", "please do", "go ahead", "confirmed", "right"],
+        "ask": ["what", "what's", "whats", "what is", "how much", "which", "tell me", "can you tell me", "could you tell me",
+                "is", "are", "am", "i", "my", "the", "current", "on", "in", "of", "for", "room", "again", "now"],
+        "balance": ["balance", "how much do i owe", "what do i owe", "my bill", "my charges", "amount due"],
+        "status": ["checked in", "my status", "room status", "my room number", "which room am i", "what room am i"],
+        "confirm_question": ["is that right", "is that correct", "shall i", "should i", "confirm", "would you like me to",
+                             "does that work"],
+        "open_ended": ["recommend", "recommendation", "suggest", "suggestion", "why", "explain", "best", "ideas", "compare",
+                       "difference", "options", "what should", "tell me about", "describe", "plan", "itinerary"],
+    },
+    2: {
+        "thanks": ["gracias", "muchas gracias", "perfecto", "vale", "genial", "de acuerdo", "entendido", "adiós", "hasta luego"],
+        "confirm": ["sí", "si", "correcto", "exacto", "claro", "eso es", "sí por favor", "adelante"],
+        "ask": ["cuál", "cuál es", "qué", "cuánto", "dígame", "dime", "me puede decir", "es", "mi", "el", "la", "de", "en",
+                "actual", "estoy"],
+        "balance": ["saldo", "cuánto debo", "mi cuenta", "mi factura"],
+        "status": ["mi estado", "estado de la habitación", "número de habitación"],
+        "confirm_question": ["es correcto", "confirma", "quiere que"],
+        "open_ended": ["recomienda", "recomendar", "recomendación", "sugiere", "por qué", "explica", "mejor", "opciones"],
+    },
+    3: {
+        "thanks": ["merci", "merci beaucoup", "parfait", "d'accord", "super", "génial", "entendu", "au revoir"],
+        "confirm": ["oui", "exact", "exactement", "c'est ça", "c'est correct", "oui s'il vous plaît", "allez-y"],
+        "ask": ["quel", "quelle", "quel est", "combien", "dites-moi", "pouvez-vous me dire", "est", "mon", "ma", "le", "la",
+                "de", "sur", "actuel", "suis", "je"],
+        "balance": ["solde", "combien je dois", "ma facture", "ma note"],
+        "status": ["mon statut", "statut de la chambre", "numéro de chambre"],
+        "confirm_question": ["est-ce correct", "c'est bien ça", "confirmez", "voulez-vous que"],
+        "open_ended": ["recommander", "recommandation", "suggérer", "pourquoi", "expliquer", "meilleur", "options"],
+    },
+    4: {
+        "thanks": ["danke", "vielen dank", "danke schön", "perfekt", "super", "prima", "alles klar", "okay", "tschüss",
+                   "auf wiedersehen"],
+        "confirm": ["ja", "genau", "richtig", "korrekt", "stimmt", "ja bitte", "gerne"],
+        "ask": ["wie", "was", "welche", "wie hoch", "wie ist", "was ist", "sagen sie mir", "können sie mir sagen", "ist",
+                "mein", "meine", "der", "die", "das", "auf", "aktuell", "aktuelle", "bin", "ich"],
+        "balance": ["saldo", "wie viel schulde ich", "meine rechnung", "kontostand"],
+        "status": ["mein status", "zimmerstatus", "zimmernummer"],
+        "confirm_question": ["ist das richtig", "stimmt das", "bestätigen", "soll ich"],
+        "open_ended": ["empfehlen", "empfehlung", "vorschlagen", "warum", "erklären", "beste", "optionen"],
+    },
+    5: {
+        "thanks": ["grazie", "grazie mille", "perfetto", "va bene", "ottimo", "d'accordo", "arrivederci", "ciao"],
+        "confirm": ["sì", "si", "esatto", "corretto", "giusto", "certo", "sì grazie", "procedi"],
+        "ask": ["qual", "quale", "qual è", "quanto", "mi dica", "mi dice", "è", "il", "la", "mio", "mia", "di", "sul",
+                "attuale", "sono"],
+        "balance": ["saldo", "quanto devo", "il mio conto", "la mia fattura"],
+        "status": ["il mio stato", "stato della camera", "numero di camera"],
+        "confirm_question": ["è corretto", "giusto", "confermi", "vuole che"],
+        "open_ended": ["consigliare", "consiglio", "suggerire", "perché", "spiegare", "migliore", "opzioni"],
+    },
+    6: {
+        "thanks": ["ありがとうございます", "ありがとう", "どうも", "了解", "わかりました", "大丈夫です", "さようなら", "失礼します"],
+        "confirm": ["はい", "そうです", "お願いします", "ええ", "その通り"],
+        "ask": ["教えてください", "教えて", "ですか", "いくら", "何番", "何", "私の", "は", "の", "を", "か"],
+        "balance": ["残高", "請求額", "支払い額"],
+        "status": ["ステータス", "部屋番号"],
+        "confirm_question": ["よろしいですか", "でしょうか", "確認"],
+        "open_ended": ["おすすめ", "なぜ", "説明", "一番", "比較"],
+    },
+}
+
+# Service-selection vocabularies per language (keys match LANGUAGES), compiled once by intent_matcher.
+# Entries are phrases or (phrase, weight); multi-word phrases weigh their word count by default.
+# English is also understood in every other language, since guests often mix. The first phrase of each
+# list names the service: it and the weighted menu numbers don't count as a request in their own right.
+SERVICE_KEYWORDS = {
+    1: {
+        1: ['room service', 'food', 'order', 'meal', 'dinner', 'breakfast', 'lunch', 'snack', 'beverage', 'drink', 'drinks',
+            'hungry', 'menu', 'eat', 'hamburger', 'burger', 'pizza', 'sandwich', 'coffee', 'wine', ('one', 0.5)],
+        2: ['front desk', 'reception', 'check in', 'check out', 'checkout', 'late checkout', 'bill', 'billing', 'invoice',
+            'payment', 'pay', 'receipt', 'room key', 'key card', 'key', 'locked out', 'inquiry', 'balance', 'reservation',
+            'complaint', ('two', 0.5)],
+        3: ['concierge', 'recommend', 'recommendation', 'restaurant', 'restaurants', 'attraction', 'attractions', 'tour',
+            'tours', 'transport', 'transportation', 'taxi', 'cab', 'airport', 'shuttle', 'book', 'reserve', 'dinner reservation',
+            'restaurant reservation', 'tickets', 'show', 'museum', 'things to do', 'nearby', ('three', 0.5)],
+        4: ['housekeeping', 'house keeping', 'clean', 'cleaning', 'towel', 'towels', 'linen', 'linens', 'sheets', 'amenity',
+            'amenities', 'bed', 'pillow', 'pillows', 'extra pillow', 'blanket', 'soap', 'shampoo', 'toilet paper', 'toiletries',
+            'tidy', 'make up the room', 'turndown', 'room clean', ('four', 0.5)],
+        5: ['maintenance', 'fix', 'repair', 'broken', 'ac', 'a c', 'air conditioning', 'air conditioner', 'heating', 'heater',
+            'plumbing', 'leak', 'leaking', 'toilet', 'shower', 'sink', 'clogged', 'light', 'lights', 'tv', 'television',
+            'not working', "doesn't work", ('five', 0.5)],
+    },
+    2: {
+        1: ['servicio de habitaciones', 'servicio a la habitación', 'comida', 'pedir', 'pedido', 'desayuno', 'almuerzo', 'cena',
+            'bebida', 'bebidas', 'hamburguesa', 'menú', 'tengo hambre', ('uno', 0.5)],
+        2: ['recepción', 'registro', 'salida', 'factura', 'cuenta', 'pago', 'pagar', 'llave', 'tarjeta', 'reserva', ('dos', 0.5)],
+        3: ['conserje', 'conserjería', 'recomendar', 'recomendación', 'restaurante', 'taxi', 'excursión', 'transporte',
+            'aeropuerto', 'entradas', 'museo', 'reservar una mesa', ('tres', 0.5)],
+        4: ['limpieza', 'limpiar', 'toalla', 'toallas', 'sábanas', 'almohada', 'manta', 'jabón', 'champú', 'papel higiénico',
+            ('cuatro', 0.5)],
+        5: ['mantenimiento', 'reparar', 'arreglar', 'roto', 'rota', 'aire acondicionado', 'calefacción', 'fuga', 'inodoro',
+            'ducha', 'no funciona', ('cinco', 0.5)],
+    },
+    3: {
+        1: ['service en chambre', 'nourriture', 'commander', 'commande', 'petit déjeuner', 'déjeuner', 'dîner', 'boisson',
+            'boissons', 'manger', 'faim'],
+        2: ['réception', 'enregistrement', 'départ', 'facture', 'note', 'paiement', 'payer', 'clé', 'carte', 'réservation',
+            ('deux', 0.5)],
+        3: ['concierge', 'recommander', 'recommandation', 'restaurant', 'taxi', 'visite', 'excursion', 'transport', 'aéroport',
+            'billets', 'musée', ('trois', 0.5)],
+        4: ['ménage', 'nettoyer', 'nettoyage', 'serviette', 'serviettes', 'draps', 'oreiller', 'couverture', 'savon',
+            'shampooing', 'papier toilette', ('quatre', 0.5)],
+        5: ['maintenance', 'réparer', 'réparation', 'cassé', 'cassée', 'climatisation', 'clim', 'chauffage', 'fuite',
+            'toilettes', 'douche', 'ne marche pas', 'en panne', ('cinq', 0.5)],
+    },
+    4: {
+        1: ['zimmerservice', 'essen', 'bestellen', 'bestellung', 'frühstück', 'mittagessen', 'abendessen', 'getränk',
+            'getränke', 'hunger', ('eins', 0.5)],
+        2: ['rezeption', 'einchecken', 'auschecken', 'rechnung', 'bezahlen', 'zahlung', 'schlüssel', 'schlüsselkarte',
+            'reservierung', ('zwei', 0.5)],
+        3: ['concierge', 'empfehlen', 'empfehlung', 'restaurant', 'taxi', 'ausflug', 'transport', 'flughafen', 'tickets',
+            'museum', ('drei', 0.5)],
+        4: ['hauswirtschaft', 'reinigung', 'putzen', 'sauber machen', 'handtuch', 'handtücher', 'bettwäsche', 'kissen',
+            'decke', 'seife', 'toilettenpapier', ('vier', 0.5)],
+        5: ['wartung', 'reparieren', 'reparatur', 'kaputt', 'defekt', 'klimaanlage', 'heizung', 'leck', 'toilette', 'dusche',
+            'funktioniert nicht', ('fünf', 0.5)],
+    },
+    5: {
+        1: ['servizio in camera', 'cibo', 'ordinare', 'ordine', 'colazione', 'pranzo', 'cena', 'bevanda', 'bevande', 'fame',
+            'mangiare'],
+        2: ['ricevimento', 'conto', 'fattura', 'pagamento', 'pagare', 'chiave', 'prenotazione', ('due', 0.5)],
+        3: ['concierge', 'consigliare', 'consiglio', 'ristorante', 'escursione', 'trasporto', 'aeroporto', 'biglietti', 'museo',
+            ('tre', 0.5)],
+        4: ['pulizia', 'pulire', 'asciugamano', 'asciugamani', 'lenzuola', 'cuscino', 'coperta', 'sapone',
+            'carta igienica', ('quattro', 0.5)],
+        5: ['manutenzione', 'riparare', 'riparazione', 'rotto', 'rotta', 'guasto', 'aria condizionata', 'riscaldamento',
+            'perdita', 'doccia', 'non funziona', ('cinque', 0.5)],
+    },
+    6: {
+        1: ['ルームサービス', '食事', '注文', '朝食', '昼食', '夕食', '飲み物', 'お腹が空', 'ハンバーガー', ('一番', 0.5)],
+        2: ['フロント', 'チェックイン', 'チェックアウト', '会計', '請求', '支払', '鍵', 'カードキー', '予約', ('二番', 0.5)],
+        3: ['コンシェルジュ', 'おすすめ', 'レストラン', 'タクシー', '観光', 'ツアー', '空港', 'チケット', ('三番', 0.5)],
+        4: ['ハウスキーピング', '掃除', '清掃', 'タオル', 'シーツ', '枕', '毛布', '石鹸', 'シャンプー', 'トイレットペーパー',
+            ('四番', 0.5)],
+        5: ['メンテナンス', '修理', '故障', '壊れ', 'エアコン', '暖房', '水漏れ', 'トイレ', 'シャワー', ('五番', 0.5)],
+    },
+}
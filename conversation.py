@@ -0,0 +1,251 @@
+# conversation.py - The turn pipeline shared by the Twilio webhooks and main.py's console/batch replay
+#
+# ConversationPipeline turns a guest utterance into a reply for one call's
+# state dict (`conv`): language tracking and the running call analysis,
+# service selection, escalation, model routing, and template / reply-cache /
+# xAI replies with the prompt assembled within its token budget. It knows
+# nothing about Flask, TwiML or session storage: app.py wraps it in webhooks
+# (state in the session store, deferred turns, speculation), main.py feeds it
+# typed input or recorded transcripts. create_pipeline() builds one from the
+# same environment settings the server uses, so a replay answers exactly as a
+# call would. Each hotel served by the deployment has its own pipeline (see
+# tenants.py); the one built here is the default hotel's.
+
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from call_analyzer import CallAnalyzer
+from config import SERVICE_KEYWORDS, SERVICES
+from intent_matcher import IntentMatch, IntentMatcher
+from language_id import LanguageIdentifier, LanguageTracker
+from llm_client import LLMUnavailable
+from metrics import inc, observe, span
+from model_router import ModelRouter, Route
+from pms import create_property_repository
+from prompt_builder import PromptBuilder
+from reply_cache import ReplyCache
+from twiml_templates import SNAPSHOT_PATH, TwimlTemplates
+
+logger = logging.getLogger(__name__)
+
+# Stable system-prompt prefix (kept identical across turns so provider prompt caching can hit)
+BASE_PROMPT = "You are a smart, friendly hotel assistant. Respond briefly, engagingly, and helpfully. Use context from previous messages."
+
+GOODBYE_RE = re.compile(r"\b(?:good)?bye\b", re.IGNORECASE)
+
+FALLBACK_REPLY = "I'm having trouble connecting to my knowledge base right now. I'll note your request and follow up soon."
+
+
+def is_goodbye(speech_result: str) -> bool:
+    """The guest said bye or goodbye as a word ("thanks, bye"; not "maybe a club sandwich")."""
+    return bool(GOODBYE_RE.search(speech_result))
+
+
+class ConversationPipeline:
+    """Per-turn logic over a call's state dict; one instance serves every call."""
+
+    def __init__(self, llm, properties, templates: TwimlTemplates, intents: IntentMatcher, analyzer: CallAnalyzer,
+                 prompts: PromptBuilder, router: ModelRouter, reply_cache: ReplyCache, services: Dict = SERVICES,
+                 model_routing: bool = True, log_payload: Optional[Callable[[str, object], None]] = None,
+                 hotel: str = 'default', hotel_name: Optional[str] = None):
+        self.hotel = hotel  # Tenant id (tenants.py); stored in call state so background turns find the pipeline
+        self.hotel_name = hotel_name
+        self.llm = llm
+        self.properties = properties
+        self.templates = templates
+        self.intents = intents
+        self.analyzer = analyzer
+        self.prompts = prompts
+        self.router = router
+        self.reply_cache = reply_cache
+        self.services = services
+        self.model_routing = model_routing
+        self.log_payload = log_payload or (lambda label, payload: None)
+
+    def new_state(self) -> Dict:
+        """State for a call we haven't seen yet."""
+        return {'messages': [], 'lang': 1, 'room_number': None, 'room_data': None, 'caller_name': 'guest',
+                'hotel': self.hotel}
+
+    def observe(self, conv: Dict, role: str, text: str) -> bool:
+        """Fold a new message into the call's running analysis; returns True if the language switched."""
+        analysis = conv.setdefault('analysis', self.analyzer.new_state(conv['lang']))
+        self.analyzer.observe(analysis, role, text, conv.get('service'))
+        switched = analysis['lang'] != conv['lang']
+        conv['lang'] = analysis['lang']
+        return switched
+
+    def match_service(self, conv: Dict, speech_result: str = '',
+                      digit: Optional[str] = None) -> Tuple[Optional[int], Optional[IntentMatch]]:
+        """Service number the guest asked for (speech first, then DTMF), and the intent match for speech.
+
+        Speech also updates the call's language. Every service is scored and a tie counts as no match.
+        """
+        if speech_result:
+            self.observe(conv, 'user', speech_result)
+            with span('intent'):
+                intent = self.intents.match(speech_result, conv['lang'])
+            logger.info("Intent scores: %s", intent.scores)
+            return intent.service, intent
+        try:
+            return (int(digit) if digit else None), None
+        except ValueError:
+            return None, None
+
+    def connect_service(self, conv: Dict, service_num: Optional[int]) -> Optional[str]:
+        """Start the conversation with a service; its name, or None if there is no such service."""
+        if not service_num or service_num not in self.services:
+            return None
+        service_name, desc = self.services[service_num]
+        conv['service'] = service_name
+        where = f"at {self.hotel_name}" if self.hotel_name else "in a hotel"
+        conv['system_prompt'] = f"You are a helpful {service_name} assistant {where}. {desc}"
+        conv['messages'] = []  # System prompt is added per request by build_messages, never stored
+        conv['summary'] = None
+        return service_name
+
+    def room_data(self, conv: Dict) -> Dict:
+        """Room record snapshotted into the call state when the room became known (looked up once per call)."""
+        if conv.get('room_data') is None:
+            conv['room_data'] = self.properties.room(conv['room_number'])
+        return conv['room_data']
+
+    def build_messages(self, conv: Dict, escalate: bool = False):
+        """Assemble system prompt, call context, rolling summary and recent history for Grok.
+
+        conv['messages'] is left untouched; only the cached summary in conv['summary'] is updated.
+        """
+        system_prompt = BASE_PROMPT
+        if conv.get('system_prompt'):
+            system_prompt += " " + conv['system_prompt']
+        context = None
+        room_number = conv.get('room_number')
+        if room_number:
+            room_data = self.room_data(conv)
+            context = f"Guest is in room {room_number}. {room_data['guest']}, status: {room_data['status']}, balance: ${room_data['balance']}. Reference if relevant."
+        note = "The user wants a human—escalate politely." if escalate else None
+        with span('prompt'):
+            messages, conv['summary'] = self.prompts.build(conv['messages'], conv.get('summary'), system_prompt, context, note)
+        return messages
+
+    def mentions_room(self, reply: str, conv: Dict) -> bool:
+        """True if a reply quotes room-specific data, so it can't be reused for other guests."""
+        room_number = conv.get('room_number')
+        if not room_number:
+            return False
+        room_data = self.room_data(conv)
+        return any(value and str(value).lower() in reply.lower()
+                   for value in (room_number, room_data['guest'] if room_data['guest'] != 'guest' else None, f"{room_data['balance']}"))
+
+    def cache_key(self, conv: Dict, utterance: str, escalate: bool = False):
+        """Reply-cache key for the guest's latest turn, or None if its reply depends on the conversation.
+
+        Only the first question to a service stands alone; later ones can lean on earlier turns
+        ("can you make that two"), and a reply steering towards staff is specific to its call.
+        """
+        if escalate or len(conv['messages']) != 1:
+            return None
+        return self.reply_cache.make_key(conv.get('service'), conv['lang'], utterance)
+
+    def route(self, conv: Dict, utterance: str, escalate: bool = False) -> Route:
+        """Pick the template / fast / full tier for the guest's latest utterance."""
+        if not self.model_routing:
+            return Route('full', 'disabled', self.router.full_model, self.router.full_max_tokens)
+        messages = conv['messages']
+        last_reply = messages[-2]['content'] if len(messages) > 1 and messages[-2]['role'] == 'assistant' else None
+        with span('route'):
+            route = self.router.route(utterance, conv['lang'], bool(conv.get('room_number')), last_reply, escalate)
+        inc('hotel_routes_total', tier=route.tier, reason=route.reason)
+        logger.info("Routed turn: %s (%s)", route.tier, route.reason)
+        return route
+
+    def template_reply(self, conv: Dict, route: Route) -> str:
+        """Template-tier reply, filled from the room record where the template needs it."""
+        values = {}
+        if route.template in ('balance_reply', 'status_reply'):
+            room_data = self.room_data(conv)
+            balance = room_data['balance']
+            values = {'room': conv['room_number'], 'guest': room_data['guest'],
+                      'balance': f"{balance:.2f}" if isinstance(balance, (int, float)) else balance,
+                      'status': str(room_data['status']).replace('_', ' ')}
+        return self.templates.text(conv['lang'], route.template, **values)
+
+    def record_reply(self, conv: Dict, source: str, route: Route, started: float, llm_ms: Optional[int] = None,
+                     usage: Optional[Dict] = None):
+        """Note where the reply came from (and its token usage, for xAI replies) and time it per routing tier."""
+        inc('hotel_llm_replies_total', source=source)
+        observe('hotel_reply_seconds', time.perf_counter() - started, tier=route.tier)
+        conv['last_reply'] = {'source': source, 'llm_ms': llm_ms, 'route': route.tier, 'route_reason': route.reason}
+        if usage is not None:
+            conv['last_reply'].update(model=route.model, prompt_tokens=usage.get('prompt_tokens'),
+                                      completion_tokens=usage.get('completion_tokens'))
+
+    def instant_reply(self, conv: Dict, escalate: bool = False) -> Tuple[Optional[str], Route]:
+        """Route the guest's latest turn and answer it from a template or the reply cache if possible.
+
+        Returns (reply, route); reply is None if the turn needs llm_reply() on that route.
+        """
+        started = time.perf_counter()
+        messages = conv['messages']
+        utterance = messages[-1]['content'] if messages and messages[-1]['role'] == 'user' else ''
+        route = self.route(conv, utterance, escalate)
+        if route.tier == 'template':
+            reply = self.template_reply(conv, route)
+            self.record_reply(conv, 'template', route, started)
+            return reply, route
+        cached = self.reply_cache.get(self.cache_key(conv, utterance, escalate))
+        if cached is not None:
+            logger.info("Reply cache hit")
+            self.record_reply(conv, 'cache', route, started)
+            return cached, route
+        return None, route
+
+    def reply(self, conv: Dict, escalate: bool = False) -> str:
+        """Reply to the guest's latest turn: from a template, the reply cache, or xAI Grok (fast or full model)."""
+        reply, route = self.instant_reply(conv, escalate)
+        return reply if reply is not None else self.llm_reply(conv, route, escalate)
+
+    def llm_reply(self, conv: Dict, route: Route, escalate: bool = False) -> str:
+        """xAI reply to the guest's latest turn on route's model (cached if it may be), or the fallback line."""
+        started = time.perf_counter()
+        last = conv['messages'][-1] if conv['messages'] else {}
+        utterance = last['content'] if last.get('role') == 'user' else ''
+        messages = self.build_messages(conv, escalate)
+        try:
+            self.log_payload("xAI messages", messages)
+            with span('llm'):
+                completion = self.llm.complete(messages, model=route.model, temperature=0.7, max_tokens=route.max_tokens,  # Shorter for voice
+                                               conversation_id=conv.get('call_sid'))
+            logger.info("xAI reply from %s in %.0f ms, usage %s", route.model, completion.latency_ms, completion.usage)
+            self.log_payload("xAI reply", completion.text)
+            self.record_reply(conv, 'llm', route, started, round(completion.latency_ms), completion.usage)
+            if not self.mentions_room(completion.text, conv):
+                self.reply_cache.put(self.cache_key(conv, utterance, escalate), completion.text, completion.latency_ms)
+            return completion.text
+        except LLMUnavailable as e:
+            logger.warning("xAI unavailable: %s", e)
+            self.record_reply(conv, 'fallback', route, started)
+            # Predefined fallback; the circuit breaker makes this immediate while xAI is degraded
+            return FALLBACK_REPLY
+
+
+def create_pipeline(llm, properties=None, log_payload=None) -> ConversationPipeline:
+    """Pipeline from environment settings: PROMPT_*, REPLY_CACHE_*, LLM_MODEL / LLM_FAST_MODEL, MODEL_ROUTING..."""
+    language_tracker = LanguageTracker(LanguageIdentifier())
+    intents = IntentMatcher(SERVICE_KEYWORDS)
+    return ConversationPipeline(
+        llm,
+        properties or create_property_repository(),
+        TwimlTemplates(snapshot=os.getenv('TWIML_SNAPSHOT', SNAPSHOT_PATH) or None),
+        intents,
+        CallAnalyzer(language_tracker, intents),
+        PromptBuilder(int(os.getenv('PROMPT_TOKEN_BUDGET', 1200)), int(os.getenv('PROMPT_SUMMARY_TOKENS', 200))),
+        ModelRouter(os.getenv('LLM_FAST_MODEL', 'grok-3-mini'), os.getenv('LLM_MODEL', 'grok-3'),
+                    int(os.getenv('ROUTER_FAST_MAX_WORDS', 12))),
+        ReplyCache(int(os.getenv('REPLY_CACHE_SIZE', 2000)), float(os.getenv('REPLY_CACHE_TTL', 3600))),
+        model_routing=os.getenv('MODEL_ROUTING', '1') == '1',
+        log_payload=log_payload,
+    )
@@ -0,0 +1,70 @@
+# fake_twilio_relay.py - Local stand-in for Twilio's ConversationRelay websocket client
+#
+# Plays Twilio's side of the /relay protocol against a running app and reports
+# time to first spoken sentence per prompt. With the fake xAI server:
+#   python fake_xai.py --port 8099 --latency 0.6 --token-latency 0.05 &
+#   VOICE_MODE=stream XAI_API_URL=http://127.0.0.1:8099/v1/chat/completions XAI_API_KEY=test python app.py &
+#   python fake_twilio_relay.py --base http://127.0.0.1:5000 "I'd like a hamburger" "goodbye"
+
+import argparse
+import json
+import time
+import uuid
+
+import requests
+import simple_websocket
+
+
+def start_call(base, call_sid, service='room service', to='+15551111111'):
+    """Drive the HTTP part of the call so the relay session has a selected service (at the hotel behind `to`)."""
+    requests.post(f"{base}/voice", data={'CallSid': call_sid, 'From': '+15550000000', 'To': to}, timeout=10)
+    requests.post(f"{base}/service_selected", data={'CallSid': call_sid, 'To': to, 'SpeechResult': service}, timeout=10)
+
+
+def run_session(ws_url, call_sid, prompts, lang='en-US', to='+15551111111'):
+    """Send setup plus each prompt; return per-prompt timings and the spoken text."""
+    ws = simple_websocket.Client.connect(ws_url)
+    results = []
+    try:
+        ws.send(json.dumps({"type": "setup", "sessionId": f"VX{uuid.uuid4().hex}", "callSid": call_sid,
+                            "from": "+15550000000", "to": to, "customParameters": {}}))
+        for prompt in prompts:
+            start = time.monotonic()
+            ws.send(json.dumps({"type": "prompt", "voicePrompt": prompt, "lang": lang, "last": True}))
+            first, tokens, ended = None, [], False
+            while True:
+                raw = ws.receive(timeout=30)
+                if raw is None:
+                    ended = True
+                    break
+                message = json.loads(raw)
+                if message['type'] == 'text':
+                    if message['token'] and first is None:
+                        first = (time.monotonic() - start) * 1000
+                    tokens.append(message['token'])
+                    if message.get('last'):
+                        break
+                elif message['type'] == 'end':
+                    ended = True
+                    break
+            results.append({"prompt": prompt, "first_sentence_ms": first,
+                            "total_ms": (time.monotonic() - start) * 1000, "reply": ''.join(tokens).strip()})
+            if ended:
+                break
+    finally:
+        ws.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Twilio ConversationRelay client')
+    parser.add_argument('--base', default='http://127.0.0.1:5000', help='app base URL')
+    parser.add_argument('--service', default='room service')
+    parser.add_argument('--to', default='+15551111111', help='dialled number (picks the hotel with TENANTS_DIR)')
+    parser.add_argument('prompts', nargs='*', default=["Can I get a hamburger and fries?", "Thanks, goodbye"])
+    args = parser.parse_args()
+    call_sid = f"CA{uuid.uuid4().hex}"
+    start_call(args.base, call_sid, args.service, args.to)
+    ws_url = args.base.replace('http', 'ws', 1) + '/relay'
+    for result in run_session(ws_url, call_sid, args.prompts, to=args.to):
+        print(json.dumps(result))
@@ -0,0 +1,136 @@
+# fake_xai.py - Local stand-in for the xAI chat completions API (offline testing)
+#
+# Run standalone:  python fake_xai.py --port 8099 --latency 0.4 --error-rate 0.1
+# then point the app at it:  XAI_API_URL=http://127.0.0.1:8099/v1/chat/completions
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeXAIServer(ThreadingHTTPServer):
+    """Chat completions server with tunable latency, jitter, errors and hangs."""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.2, jitter=0.0, error_rate=0.0, hang_rate=0.0,
+                 token_latency=0.03):
+        super().__init__((host, port), _Handler)
+        self.latency = latency  # Time to first token (or to the whole reply when not streaming)
+        self.token_latency = token_latency  # Delay between streamed words
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate  # Fraction of requests that never answer (until the client times out)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self):
+        """Serve from a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes; don't hold the body for an ACK
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != '/v1/models':
+            return self._send_json(404, {"error": "not found"})
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._send_json(401, {"error": "missing bearer token"})
+        self._send_json(200, {"object": "list", "data": [{"id": model, "object": "model"}
+                                                         for model in ('grok-3', 'grok-3-mini')]})
+
+    def do_POST(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._send_json(401, {"error": "missing bearer token"})
+        if self.path != '/v1/chat/completions':
+            return self._send_json(404, {"error": "not found"})
+        payload = json.loads(body or b'{}')
+        if random.random() < server.hang_rate:
+            time.sleep(60)
+            return
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        if random.random() < server.error_rate:
+            return self._send_json(503, {"error": "upstream overloaded"})
+        if payload.get('stream'):
+            return self._send_stream(fake_completion(payload))
+        self._send_json(200, fake_completion(payload))
+
+    def _send_stream(self, completion):
+        """Replay a completion as chat.completion.chunk server-sent events, one word at a time."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        words = completion['choices'][0]['message']['content'].split(' ')
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server.token_latency)
+            chunk = {"id": completion['id'], "object": "chat.completion.chunk", "model": completion['model'],
+                     "choices": [{"index": 0, "delta": {"content": word if i == 0 else ' ' + word}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def fake_completion(payload):
+    """Build a deterministic chat.completion body that echoes the last user turn."""
+    messages = payload.get('messages', [])
+    last_user = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+    reply = (f"Certainly. You asked about: {last_user}. I'll take care of that right away. "
+             "Is there anything else you need for your stay?") if last_user else "How can I help?"
+    prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "model": payload.get('model', 'grok-3'),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(reply) // 4,
+                  "total_tokens": prompt_tokens + len(reply) // 4},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake xAI chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per completion')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--token-latency', type=float, default=0.03, help='seconds between streamed words')
+    args = parser.parse_args()
+    server = FakeXAIServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.hang_rate,
+                           args.token_latency)
+    print(f"Fake xAI listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,57 @@
+# gunicorn.conf.py - Production serving: several processes, each running gevent workers
+#
+# Usage: gunicorn -c gunicorn.conf.py app:app   (the Procfile entry)
+# A gevent worker serves many calls at once: outbound xAI requests, websocket
+# frames and sleeps yield to other greenlets instead of holding an OS thread,
+# so one slow LLM reply no longer queues the other callers. gevent can't make
+# sqlite3 or the call log's flock cooperative: the session store and call log
+# don't wait for a held lock inline, they wait on the hub's native thread pool
+# (blocking_io.py), so a locked database stalls only the calls that need it. The app itself stays plain
+# Flask; gunicorn patches the standard library before the app is imported
+# (so don't enable preload_app).
+
+import os
+import sys
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))  # Processes; roughly one per CPU
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))  # Concurrent requests/websockets per worker
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+keepalive = 5  # Twilio reuses connections across a call's webhooks
+accesslog = '-'
+
+# Call state has to be visible to whichever worker receives the next webhook
+if workers > 1:
+    os.environ.setdefault('SESSION_BACKEND', 'sqlite')
+    os.environ.setdefault('METRICS_DIR', '/tmp/hotel_metrics')  # /metrics sums every worker's snapshot
+
+# Greenlets are cheap: let each worker run far more LLM turns and pooled xAI connections
+if worker_class == 'gevent':
+    os.environ.setdefault('TURN_WORKERS', '200')
+    os.environ.setdefault('TURN_MAX_IN_FLIGHT', '400')
+    os.environ.setdefault('LLM_POOL_SIZE', '200')
+
+
+def on_starting(server):
+    # Counters start from zero with the server: drop snapshots left by a previous run
+    directory = os.environ.get('METRICS_DIR')
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+
+
+def post_worker_init(worker):
+    # The app is imported; prime its pools and caches before this worker accepts its first call
+    app = sys.modules.get('app')
+    if app is not None and os.getenv('WARM_UP', '1') == '1':
+        app.warm_up()
+
+
+def worker_exit(server, worker):
+    # Store whatever the worker's write-behind queue still holds before the process goes
+    app = sys.modules.get('app')
+    if app is not None and app.persistence is not None:
+        app.persistence.close()
@@ -0,0 +1,142 @@
+# intent_matcher.py - Compiled keyword matcher for service selection
+#
+# Keyword tables (config.SERVICE_KEYWORDS) are compiled once into a token index:
+# first token -> candidate phrases, longest first. Matching walks the utterance
+# once, taking the longest phrase that starts at each token and skipping the
+# tokens it covers, so cost depends on utterance length rather than vocabulary
+# size and "in" can no longer match inside "maintenance". Every service is
+# scored; the best one wins only if it strictly beats the runner-up.
+# Scripts written without spaces (Japanese) are matched with one compiled
+# longest-first alternation instead. residual() returns what an utterance asks
+# for beyond naming a service ("room service, a hamburger" -> ['hamburger']), and
+# repeats() tells whether a later utterance asks for anything beyond that.
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+
+TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff66-\uff9f]')
+
+# Words that don't make a request on their own (all languages; tokens are lowercased)
+FILLER_TOKENS = {
+    'i', "i'd", "i'm", 'id', 'im', 'me', 'my', 'we', 'you', 'a', 'an', 'the', 'to', 'for', 'of', 'and', 'with', 'in',
+    'on', 'is', 'it', 'that', 'this', 'some', 'like', 'want', 'need', 'would', 'could', 'can', 'get', 'have', 'please',
+    'yes', 'yeah', 'hi', 'hello', 'hey', 'um', 'uh', 'ok', 'okay', 'so', 'just', 'thanks', 'thank', 'connect', 'talk',
+    'speak', 'number', 'un', 'una', 'el', 'la', 'los', 'las', 'de', 'del', 'y', 'por', 'favor', 'quiero', 'quisiera',
+    'necesito', 'hola', 'gracias', 'une', 'le', 'les', 'du', 'des', 'et', 'je', 'voudrais', 'veux', "s'il", 'vous',
+    'plaît', 'bonjour', 'merci', 'ich', 'möchte', 'brauche', 'bitte', 'ein', 'eine', 'einen', 'der', 'die', 'das',
+    'und', 'für', 'hallo', 'danke', 'il', 'lo', 'per', 'di', 'e', 'vorrei', 'voglio', 'ciao', 'grazie',
+}
+CJK_FILLER = ('お願いします', 'お願い', 'ください', 'です', 'もしもし')
+
+
+class IntentMatch(NamedTuple):
+    service: Optional[int]  # Winning service number, or None if nothing matched or it's a tie
+    confidence: float  # Winner's share of the total score (0-1)
+    scores: Dict[int, float]
+    matched: Set[int]  # Indices of utterance tokens consumed by keywords
+    naming: Set[int]  # The subset consumed by phrases that only name a service (its first keyword, a menu number)
+    numbers: Set[int]  # The subset of naming that is a menu number, which next to other words is a quantity instead
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class _CompiledVocabulary:
+    def __init__(self, tables: List[Dict[int, list]]):
+        self.index: Dict[str, List[tuple]] = {}  # first token -> [(tokens, service, weight, naming, number)], longest first
+        self.cjk_naming: List[str] = []
+        cjk_phrases: Dict[str, tuple] = {}
+        for table in tables:
+            for service, phrases in table.items():
+                for position, entry in enumerate(phrases):
+                    phrase, weight = entry if isinstance(entry, tuple) else (entry, None)
+                    naming = position == 0 or weight is not None
+                    if CJK_RE.search(phrase):
+                        cjk_phrases[phrase] = (service, weight or 1.0)
+                        if naming:
+                            self.cjk_naming.append(phrase)
+                        continue
+                    tokens = tuple(tokenize(phrase))
+                    if tokens:
+                        # Longer phrases are more specific, so they count for more by default
+                        self.index.setdefault(tokens[0], []).append((tokens, service, weight or float(len(tokens)), naming,
+                                                                     weight is not None))
+        for candidates in self.index.values():
+            candidates.sort(key=lambda c: len(c[0]), reverse=True)
+        self.cjk_services = cjk_phrases
+        self.cjk_pattern = None
+        if cjk_phrases:
+            ordered = sorted(cjk_phrases, key=len, reverse=True)
+            self.cjk_pattern = re.compile('|'.join(re.escape(p) for p in ordered))
+
+
+class IntentMatcher:
+    """Per-language service matcher; every language also understands the fallback (English) vocabulary."""
+
+    def __init__(self, keywords: Dict[int, Dict[int, list]], fallback_lang: int = 1):
+        fallback = keywords.get(fallback_lang, {})
+        self._vocabularies = {
+            lang: _CompiledVocabulary([table] if lang == fallback_lang else [table, fallback])
+            for lang, table in keywords.items()
+        }
+        self._default = self._vocabularies.get(fallback_lang) or _CompiledVocabulary([])
+
+    def match(self, text: str, lang: int = 1) -> IntentMatch:
+        """Score every service against the utterance."""
+        vocab = self._vocabularies.get(lang, self._default)
+        scores: Dict[int, float] = {}
+        matched: Set[int] = set()
+        naming: Set[int] = set()
+        numbers: Set[int] = set()
+        tokens = tokenize(text)
+        i = 0
+        while i < len(tokens):
+            for phrase, service, weight, names, number in vocab.index.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    scores[service] = scores.get(service, 0.0) + weight
+                    matched.update(range(i, i + len(phrase)))
+                    if names:
+                        naming.update(range(i, i + len(phrase)))
+                    if number:
+                        numbers.update(range(i, i + len(phrase)))
+                    i += len(phrase)
+                    break
+            else:
+                i += 1
+        if vocab.cjk_pattern is not None:
+            for hit in vocab.cjk_pattern.finditer(text):
+                service, weight = vocab.cjk_services[hit.group()]
+                scores[service] = scores.get(service, 0.0) + weight
+        if not scores:
+            return IntentMatch(None, 0.0, scores, matched, naming, numbers)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return IntentMatch(None, 0.0, scores, matched, naming, numbers)  # Ambiguous; ask again rather than guess
+        return IntentMatch(ranked[0][0], ranked[0][1] / sum(scores.values()), scores, matched, naming, numbers)
+
+    def residual(self, text: str, lang: int = 1, match: Optional[IntentMatch] = None) -> List[str]:
+        """Words of the utterance that ask for something beyond naming a service, filler dropped.
+
+        Empty for "room service please" or "two"; ['hamburger'] for "room service, a hamburger". Numbers
+        next to other words are quantities or room numbers, so "two towels" is ['two', 'towels'].
+        """
+        vocab = self._vocabularies.get(lang, self._default)
+        if CJK_RE.search(text):
+            for phrase in vocab.cjk_naming + list(CJK_FILLER):
+                text = text.replace(phrase, ' ')
+            # No word boundaries to go on: keep runs of at least two characters
+            return [token for token in tokenize(text) if len(token) > 1 and token not in FILLER_TOKENS]
+        if match is None:
+            match = self.match(text, lang)
+        kept = [(i, token) for i, token in enumerate(tokenize(text))
+                if token not in FILLER_TOKENS and (i not in match.naming or i in match.numbers)]
+        if all(token.isdigit() or i in match.numbers for i, token in kept):
+            return []  # Nothing but a menu choice
+        return [token for _, token in kept]
+
+    def repeats(self, request_words: List[str], text: str, lang: int = 1) -> bool:
+        """True if text asks for nothing beyond request_words, the residual of an earlier utterance."""
+        said = set(self.residual(text, lang))
+        return bool(said) and said <= set(request_words)
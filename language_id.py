@@ -0,0 +1,125 @@
+# language_id.py - Script detection plus a character trigram model for caller language
+#
+# Japanese is recognised by script (kana/kanji). The Latin-script languages in
+# LANGUAGES are scored with a naive Bayes model over character trigrams, built
+# once from the short seed texts below and kept as log-probability tables, so a
+# decision is a handful of dict lookups. LanguageTracker adds hysteresis so a
+# single ambiguous word can't flip the call's voice mid-conversation.
+
+import math
+import re
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+JAPANESE = 6
+DEFAULT_LANG = 1
+KANA_RE = re.compile(r'[\u3040-\u30ff\uff66-\uff9f]')
+KANJI_RE = re.compile(r'[\u4e00-\u9fff]')
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Everyday hotel-guest phrasing per language (keys match LANGUAGES)
+SEED_TEXT = {
+    1: "hello yes please thank you thanks good morning good evening i would like to order room service "
+       "can i get extra towels and a pillow what time is checkout could you send someone to fix the air "
+       "conditioning i need a taxi to the airport is there a restaurant nearby my room number is the wifi "
+       "password is not working we want breakfast for two people how much is my bill that is right okay "
+       "that sounds great can you help me with my reservation i have a problem with the shower where is the "
+       "pool when does the gym open it is too cold in here the light in the bathroom does not work",
+    2: "hola sí por favor gracias buenos días buenas noches quisiera pedir servicio de habitaciones "
+       "me puede traer más toallas y una almohada a qué hora es la salida puede enviar a alguien para "
+       "arreglar el aire acondicionado necesito un taxi al aeropuerto hay un restaurante cerca el número de "
+       "mi habitación es la contraseña del wifi no funciona queremos desayuno para dos personas cuánto es "
+       "mi cuenta está bien de acuerdo me puede ayudar con mi reserva tengo un problema con la ducha dónde "
+       "está la piscina hace mucho frío aquí la luz del baño no funciona español",
+    3: "bonjour oui s'il vous plaît merci bonsoir je voudrais commander le service en chambre pouvez-vous "
+       "m'apporter des serviettes et un oreiller à quelle heure est le départ pouvez-vous envoyer quelqu'un "
+       "pour réparer la climatisation j'ai besoin d'un taxi pour l'aéroport y a-t-il un restaurant près "
+       "d'ici le numéro de ma chambre est le mot de passe du wifi ne marche pas nous voulons le petit "
+       "déjeuner pour deux personnes combien coûte ma note c'est bien d'accord pouvez-vous m'aider avec ma "
+       "réservation j'ai un problème avec la douche où est la piscine il fait très froid ici français",
+    4: "hallo ja bitte danke guten morgen guten abend ich möchte den zimmerservice bestellen können sie mir "
+       "noch handtücher und ein kissen bringen wann ist der check-out können sie jemanden schicken um die "
+       "klimaanlage zu reparieren ich brauche ein taxi zum flughafen gibt es ein restaurant in der nähe meine "
+       "zimmernummer ist das wlan passwort funktioniert nicht wir möchten frühstück für zwei personen wie "
+       "viel kostet meine rechnung das ist richtig in ordnung können sie mir mit meiner reservierung helfen "
+       "ich habe ein problem mit der dusche wo ist das schwimmbad es ist sehr kalt hier deutsch",
+    5: "ciao buongiorno buonasera sì per favore grazie vorrei ordinare il servizio in camera può portarmi "
+       "altri asciugamani e un cuscino a che ora è il check-out può mandare qualcuno a riparare l'aria "
+       "condizionata ho bisogno di un taxi per l'aeroporto c'è un ristorante qui vicino il numero della mia "
+       "camera è la password del wifi non funziona vogliamo la colazione per due persone quanto costa il mio "
+       "conto va bene d'accordo può aiutarmi con la mia prenotazione ho un problema con la doccia dov'è la "
+       "piscina fa molto freddo qui la luce del bagno non funziona italiano",
+}
+
+
+class Detection(NamedTuple):
+    lang: int
+    confidence: float
+    letters: int  # Amount of evidence the decision is based on
+
+
+def _trigrams(text: str):
+    for word in WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3]
+
+
+class LanguageIdentifier:
+    """Naive Bayes over character trigrams for Latin scripts, script detection for Japanese."""
+
+    def __init__(self, seed_text: Dict[int, str] = SEED_TEXT, alpha: float = 0.5):
+        self._tables: Dict[int, Dict[str, float]] = {}
+        self._unseen: Dict[int, float] = {}
+        counts = {lang: Counter(_trigrams(text)) for lang, text in seed_text.items()}
+        vocabulary = len(set().union(*counts.values())) + 1
+        for lang, counter in counts.items():
+            denominator = sum(counter.values()) + alpha * vocabulary
+            self._tables[lang] = {gram: math.log((n + alpha) / denominator) for gram, n in counter.items()}
+            self._unseen[lang] = math.log(alpha / denominator)
+
+    def detect(self, text: str) -> Detection:
+        """Return the most likely language with a posterior-style confidence in [0, 1]."""
+        if KANA_RE.search(text) or KANJI_RE.search(text):
+            return Detection(JAPANESE, 1.0, len(text))
+        grams = list(_trigrams(text))
+        if not grams:
+            return Detection(DEFAULT_LANG, 0.0, 0)
+        scores = {}
+        for lang, table in self._tables.items():
+            unseen = self._unseen[lang]
+            scores[lang] = sum(table.get(gram, unseen) for gram in grams)
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        letters = sum(len(w) for w in WORD_RE.findall(text))
+        return Detection(best, 1.0 / total, letters)
+
+
+class LanguageTracker:
+    """Hysteresis for a call's language: switch on strong evidence, or on two agreeing weaker detections.
+
+    Strong evidence is a confident detection over several words: a single foreign word ("quesadillas")
+    only ever makes a candidate.
+    """
+
+    def __init__(self, identifier: LanguageIdentifier, switch_confidence: float = 0.9, min_letters: int = 20,
+                 candidate_confidence: float = 0.6, min_words: int = 2):
+        self.identifier = identifier
+        self.switch_confidence = switch_confidence
+        self.min_letters = min_letters
+        self.min_words = min_words
+        self.candidate_confidence = candidate_confidence
+
+    def update(self, current: int, candidate: Optional[int], text: str):
+        """Return (language to use, pending candidate) after hearing text."""
+        detection = self.identifier.detect(text)
+        if detection.lang == current or detection.confidence < self.candidate_confidence:
+            return current, None
+        if detection.lang == JAPANESE:
+            return JAPANESE, None  # Script detection is unambiguous
+        if (detection.confidence >= self.switch_confidence and detection.letters >= self.min_letters
+                and len(WORD_RE.findall(text)) >= self.min_words):
+            return detection.lang, None
+        if candidate == detection.lang:
+            return detection.lang, None  # Second utterance in a row pointing the same way
+        return current, detection.lang
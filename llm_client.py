@@ -0,0 +1,297 @@
+# llm_client.py - Pooled, resilient client for the xAI chat completions API
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+XAI_API_URL = "https://api.x.ai/v1/chat/completions"
+
+# Twilio gives a webhook 15s; keep the whole LLM call well inside that so
+# there is still time to render TwiML and fall back gracefully.
+DEFAULT_DEADLINE = 8.0
+DEFAULT_ATTEMPT_TIMEOUT = 4.0
+CONNECT_TIMEOUT = 1.5
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+CONVERSATION_HEADER = 'x-grok-conv-id'  # Lets xAI keep a conversation on the same prompt cache
+
+
+class LLMUnavailable(Exception):
+    """Raised when no completion could be obtained; callers should use fallback text."""
+
+
+class Completion(NamedTuple):
+    text: str
+    model: str
+    usage: Dict
+    latency_ms: float
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a single probe through once reset_after has passed."""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def acquire(self) -> str:
+        """Admit a request: 'ok' (closed), 'probe' (the one half-open request) or 'rejected'.
+
+        A 'probe' must end in record_success(), record_failure() or release_probe().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 'ok'
+            if not self._probing and time.monotonic() - self._opened_at >= self.reset_after:
+                self._probing = True  # Half-open: one request decides whether to close
+                return 'probe'
+            return 'rejected'
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self):
+        """Give up the half-open probe without a verdict (e.g. the caller abandoned it), so another can run."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a token, sleeping until one is free; False if that would take longer than timeout."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait_for = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if timeout is not None and wait_for > timeout:
+                return False
+            self._tokens -= 1  # Reserved now, so concurrent callers queue up behind it
+        if wait_for:
+            time.sleep(wait_for)
+        return True
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class LLMClient:
+    """Keep-alive session with per-attempt timeouts, jittered retries, optional hedging and a circuit breaker."""
+
+    def __init__(self, api_key: str, url: str = XAI_API_URL, deadline: float = DEFAULT_DEADLINE,
+                 attempt_timeout: float = DEFAULT_ATTEMPT_TIMEOUT, retries: int = 2, backoff: float = 0.25,
+                 hedge_after: Optional[float] = None, pool_size: int = 20,
+                 breaker: Optional[CircuitBreaker] = None, rate_limit: Optional[RateLimiter] = None):
+        self.url = url
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limit = rate_limit  # Shared across threads; every attempt (retries included) takes a token
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Hedged requests need a second thread per call while the first is in flight
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-hedge') if hedge_after else None
+
+    def _post(self, payload, timeout, headers=None):
+        """Single HTTP attempt; raises _RetryableError for transient failures."""
+        try:
+            response = self.session.post(self.url, json=payload, headers=headers,
+                                         timeout=(min(CONNECT_TIMEOUT, timeout), timeout))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise _RetryableError(str(e)) from e
+        if response.status_code in RETRYABLE_STATUS:
+            raise _RetryableError(f"HTTP {response.status_code}")
+        try:
+            response.raise_for_status()
+            data = response.json()
+            return data["choices"][0]["message"]["content"], data.get("model", payload["model"]), data.get("usage", {})
+        except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+            raise LLMUnavailable(f"Unexpected xAI response: {e}") from e
+
+    def _hedged_post(self, payload, timeout, headers=None):
+        """Send the request, and a duplicate if the first hasn't answered within hedge_after."""
+        if not self._executor or self.hedge_after >= timeout:
+            return self._post(payload, timeout, headers)
+        futures = {self._executor.submit(self._post, payload, timeout, headers)}
+        if not wait(futures, timeout=self.hedge_after).done:
+            futures.add(self._executor.submit(self._post, payload, timeout - self.hedge_after, headers))
+        error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:  # Keep waiting on the other copy
+                    error = e
+        raise error
+
+    def warm(self, timeout: float = DEFAULT_ATTEMPT_TIMEOUT) -> bool:
+        """Open a pooled keep-alive connection (DNS, TCP, TLS) before the first completion needs one.
+
+        Lists the models next to the completions endpoint, which also checks the API key.
+        """
+        url = self.url.rsplit('/chat/completions', 1)[0] + '/models'
+        try:
+            response = self.session.get(url, timeout=(CONNECT_TIMEOUT, timeout))
+            response.content  # Read to the end so the connection goes back to the pool
+        except requests.exceptions.RequestException:
+            return False
+        return response.ok
+
+    def complete(self, messages: List[Dict], model: str = "grok-3", temperature: float = 0.7,
+                 max_tokens: int = 200, deadline: Optional[float] = None,
+                 conversation_id: Optional[str] = None) -> Completion:
+        """Return a chat completion or raise LLMUnavailable within the deadline.
+
+        conversation_id (e.g. the CallSid) is sent as x-grok-conv-id so xAI routes a call's
+        turns to the same cache and can reuse the shared prompt prefix.
+        """
+        headers = {CONVERSATION_HEADER: conversation_id} if conversation_id else None
+        admitted = self.breaker.acquire()
+        if admitted == 'rejected':
+            raise LLMUnavailable("xAI circuit breaker is open")
+        payload = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        start = time.monotonic()
+        stop_at = start + (deadline or self.deadline)
+        error = None
+        succeeded = None  # xAI's verdict for the breaker; None if it gave none (throttled locally, or a bug)
+        try:
+            for attempt in range(self.retries + 1):
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0.1:
+                    break
+                if self.rate_limit:
+                    if not self.rate_limit.acquire(remaining - 0.1):
+                        raise LLMUnavailable(f"xAI rate limit: no request slot before the deadline ({error or 'first attempt'})")
+                    remaining = stop_at - time.monotonic()
+                try:
+                    text, used_model, usage = self._hedged_post(payload, min(self.attempt_timeout, remaining), headers)
+                except _RetryableError as e:
+                    error = e
+                except LLMUnavailable:
+                    succeeded = False
+                    raise
+                else:
+                    succeeded = True
+                    return Completion(text, used_model, usage, (time.monotonic() - start) * 1000)
+                # Full jitter, never sleeping past the deadline
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+                time.sleep(max(0.0, min(delay, stop_at - time.monotonic() - 0.1)))
+            succeeded = False
+            raise LLMUnavailable(f"xAI request failed: {error or 'deadline exceeded'}")
+        finally:
+            self._settle(admitted, succeeded)
+
+    def stream(self, messages: List[Dict], model: str = "grok-3", temperature: float = 0.7,
+               max_tokens: int = 200, conversation_id: Optional[str] = None) -> Iterator[str]:
+        """Yield reply text deltas from a streamed (server-sent events) completion.
+
+        Streams are not retried: once text has been spoken it can't be taken back. A stream the caller
+        closes early (hang-up, generator closed) counts as neither success nor failure.
+        """
+        admitted = self.breaker.acquire()
+        if admitted == 'rejected':
+            raise LLMUnavailable("xAI circuit breaker is open")
+        payload = {"model": model, "messages": messages, "temperature": temperature,
+                   "max_tokens": max_tokens, "stream": True}
+        succeeded = None  # Stays None if the caller closes the stream early
+        try:
+            if self.rate_limit and not self.rate_limit.acquire(self.attempt_timeout):
+                raise LLMUnavailable("xAI rate limit: no request slot within the attempt timeout")
+            try:
+                headers = {CONVERSATION_HEADER: conversation_id} if conversation_id else None
+                response = self.session.post(self.url, json=payload, headers=headers, stream=True,
+                                             timeout=(CONNECT_TIMEOUT, self.attempt_timeout))
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                succeeded = False
+                raise LLMUnavailable(f"xAI stream failed: {e}") from e
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+            except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+                succeeded = False
+                raise LLMUnavailable(f"xAI stream interrupted: {e}") from e
+            finally:
+                response.close()
+            succeeded = True
+        finally:
+            self._settle(admitted, succeeded)
+
+    def _settle(self, admitted: str, succeeded: Optional[bool]):
+        """Report a request's outcome to the breaker; a probe with no verdict is handed back for another call."""
+        if succeeded is True:
+            self.breaker.record_success()
+        elif succeeded is False:
+            self.breaker.record_failure()
+        elif admitted == 'probe':
+            self.breaker.release_probe()  # Otherwise the breaker would wait on this probe forever
+
+
+def create_llm_client(api_key: str, **overrides) -> LLMClient:
+    """Build a client from LLM_* environment settings; keyword overrides win."""
+    hedge_after = os.getenv('LLM_HEDGE_AFTER')
+    rate_limit = os.getenv('LLM_RATE_LIMIT')
+    settings = {
+        'url': os.getenv('XAI_API_URL', XAI_API_URL),
+        'deadline': float(os.getenv('LLM_DEADLINE', DEFAULT_DEADLINE)),
+        'attempt_timeout': float(os.getenv('LLM_ATTEMPT_TIMEOUT', DEFAULT_ATTEMPT_TIMEOUT)),
+        'retries': int(os.getenv('LLM_RETRIES', 2)),
+        'hedge_after': float(hedge_after) if hedge_after else None,
+        'pool_size': int(os.getenv('LLM_POOL_SIZE', 20)),
+        'breaker': CircuitBreaker(int(os.getenv('LLM_BREAKER_FAILURES', 5)),
+                                  float(os.getenv('LLM_BREAKER_RESET', 30))),
+        'rate_limit': RateLimiter(float(rate_limit)) if rate_limit else None,
+    }
+    settings.update(overrides)
+    return LLMClient(api_key, **settings)
@@ -1,79 +1,308 @@
+# main.py - Console conversations and offline transcript replay through the webhook pipeline
+#
+# Usage:
+#   python main.py                                         # talk to the assistant at the console
+#   python main.py replay calls.jsonl --output replies.jsonl --concurrency 8 --rate 5
+#
+# Both modes run conversation.ConversationPipeline built from the server's
+# environment settings: the same service selection, language tracking,
+# escalation, model routing, reply cache and prompt budget as a phone call, so
+# a replay shows what callers would have heard. Replay reads one recorded
+# conversation per line,
+#   {"id": "c1", "from": "+19496693870", "room": "101", "service": "room service please",
+#    "turns": ["Can I get a hamburger", "thanks, goodbye"]}
+# ("digit": "1" instead of "service" for a keypress; "lang": 2 to start in
+# Spanish; "from" and "room" are optional, as on a call; "to" picks the hotel
+# when TENANTS_DIR holds hotel profiles), runs up to
+# --concurrency conversations at once with xAI requests held to --rate per
+# second, and writes one JSON line per turn: reply, where it came from, routing
+# tier, model, latencies and token counts. A summary with the reply mix,
+# latency percentiles and an estimated xAI cost goes to stderr.
+
+import argparse
+import json
+import logging
 import os
-import requests
-from typing import Dict
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List
+
+from conversation import create_pipeline
+from llm_client import RateLimiter, create_llm_client
+from metrics import bind_call
+from reply_cache import ReplyCache
+from tenants import create_tenant_registry
+
+logger = logging.getLogger(__name__)
 
 # xAI API configuration
 XAI_API_KEY = os.getenv('XAI_API_KEY')
-if not XAI_API_KEY:
-    raise ValueError("XAI_API_KEY environment variable not set")
-
-XAI_API_URL = "https://api.x.ai/v1/chat/completions"
-HEADERS = {
-    "Authorization": f"Bearer {XAI_API_KEY}",
-    "Content-Type": "application/json"
-}
-
-# Define hotel services and their descriptions
-SERVICES: Dict[str, str] = {
-    "room service": "Handle food and drink orders for the room.",
-    "front desk": "Assist with check-in, check-out, billing, and general inquiries.",
-    "concierge": "Provide recommendations for local attractions, reservations, and transportation.",
-    "housekeeping": "Schedule cleaning, request amenities like towels or extra linens."
-}
-
-def select_service() -> str:
-    """Simulate button press by listing options and getting user input."""
-    print("Welcome to Hotel AI Services. Please select a service:")
-    for i, service in enumerate(SERVICES.keys(), 1):
-        print(f"{i}. {service.replace(' ', '_').title()}")
-    
-    choice = input("Enter the number of your choice: ")
+
+# Typed or recorded lines that end the conversation without a reply, matched as the whole line
+EXIT_WORDS = {'bye', 'goodbye', 'exit'}
+
+# USD per million (prompt, completion) tokens, for cost estimates; override with --price MODEL=IN,OUT
+PRICES = {'grok-3': (3.00, 15.00), 'grok-3-mini': (0.30, 0.50)}
+
+
+def converse(pipeline, conv: Dict, utterances: Iterable[str]) -> Iterator[Dict]:
+    """Play guest utterances into a connected call, yielding one record per turn.
+
+    Mirrors /handle_speech: a guest who asks for a human is put on hold and the conversation
+    ends. A line that is just one of EXIT_WORDS ends it without a turn.
+    """
+    for turn, speech in enumerate(utterances, 1):
+        speech = speech.strip()
+        if not speech:
+            continue
+        if speech.lower() in EXIT_WORDS:
+            return
+        started = time.perf_counter()
+        pipeline.observe(conv, 'user', speech)
+        conv['messages'].append({"role": "user", "content": speech})
+        analysis = conv['analysis']
+        if pipeline.analyzer.should_escalate(analysis):
+            conv['last_reply'] = {'source': 'escalation'}
+            yield turn_record(conv, turn, speech, pipeline.templates.text(conv['lang'], 'hold'), started)
+            return
+        reply = pipeline.reply(conv, pipeline.analyzer.escalation_hint(analysis))
+        conv['messages'].append({"role": "assistant", "content": reply})
+        pipeline.observe(conv, 'assistant', reply)
+        yield turn_record(conv, turn, speech, reply, started)
+
+
+def turn_record(conv: Dict, turn: int, speech: str, reply: str, started: float) -> Dict:
+    analysis = conv.get('analysis') or {}
+    last_reply = conv.get('last_reply') or {}
+    return {
+        'turn': turn,
+        'speech': speech,
+        'reply': reply,
+        'source': last_reply.get('source'),
+        'route': last_reply.get('route'),
+        'route_reason': last_reply.get('route_reason'),
+        'model': last_reply.get('model'),
+        'lang': conv['lang'],
+        'escalation': analysis.get('escalation'),
+        'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+        'llm_ms': last_reply.get('llm_ms'),
+        'prompt_tokens': last_reply.get('prompt_tokens'),
+        'completion_tokens': last_reply.get('completion_tokens'),
+    }
+
+
+def start_call(pipeline, from_number=None, room=None, lang=1) -> Dict:
+    """Call state as /voice and /room_number would leave it."""
+    conv = dict(pipeline.new_state(), lang=lang)
+    if from_number:
+        conv['from'] = from_number
+        caller = pipeline.properties.prefetch_caller(from_number)
+        conv['caller_name'] = caller['name']
+        if caller['room']:
+            conv['room_number'], conv['room_data'] = caller['room'], caller['room_data']
+    if room:
+        conv['room_number'], conv['room_data'] = str(room), None
+    return conv
+
+
+def replay_conversation(tenants, item: Dict) -> List[Dict]:
+    """Every turn of one recorded conversation, tagged with its id (one error record if it failed)."""
+    conversation_id = str(item.get('id'))
+    bind_call(f"replay-{conversation_id}")
+    try:
+        pipeline = tenants.resolve(item.get('to'))
+        conv = start_call(pipeline, item.get('from'), item.get('room'), int(item.get('lang', 1)))
+        conv['call_sid'] = f"replay-{conversation_id}"  # Sent as the xAI conversation id
+        speech = str(item.get('service', '')).lower().strip()
+        service_num, _ = pipeline.match_service(conv, speech, item.get('digit'))
+        service = pipeline.connect_service(conv, service_num)
+        if not service:
+            return [{'id': conversation_id, 'error': 'no service selected', 'service_speech': speech}]
+        records = list(converse(pipeline, conv, item.get('turns', [])))
+    except Exception as e:
+        logger.exception("Replay of %s failed", conversation_id)
+        return [{'id': conversation_id, 'error': f"{type(e).__name__}: {e}"}]
+    return [dict(record, id=conversation_id, hotel=pipeline.hotel, service=service) for record in records]
+
+
+def read_corpus(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                item = json.loads(line)
+                item.setdefault('id', number)
+                yield item
+
+
+def replay(tenants, corpus: Iterable[Dict], concurrency: int) -> Iterator[Dict]:
+    """Turn records for every conversation, as conversations finish, at most `concurrency` at a time.
+
+    The corpus is read as the pool frees up, so thousands of conversations don't all sit in memory.
+    """
+    corpus = iter(corpus)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='replay') as pool:
+        running = set()
+        while True:
+            for item in corpus:
+                running.add(pool.submit(replay_conversation, tenants, item))
+                if len(running) >= concurrency * 2:  # Keep the pool busy without queueing the whole corpus
+                    break
+            if not running:
+                return
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def percentile(values: List[float], pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(pct / 100.0 * len(values)))]
+
+
+class ReplaySummary:
+    """Running totals over turn records: reply sources, routing tiers, tokens, latency and cost."""
+
+    def __init__(self, prices: Dict = PRICES):
+        self.prices = prices
+        self.conversations = set()
+        self.errors = 0
+        self.turns = 0
+        self.sources: Dict[str, int] = {}
+        self.routes: Dict[str, int] = {}
+        self.tokens: Dict[str, List[int]] = {}  # model -> [prompt, completion]
+        self.latencies: List[float] = []
+        self.llm_latencies: List[float] = []
+
+    def add(self, record: Dict):
+        self.conversations.add(record['id'])
+        if 'error' in record:
+            self.errors += 1
+            return
+        self.turns += 1
+        self.sources[record['source']] = self.sources.get(record['source'], 0) + 1
+        if record['route']:
+            self.routes[record['route']] = self.routes.get(record['route'], 0) + 1
+        if record['model']:
+            counts = self.tokens.setdefault(record['model'], [0, 0])
+            counts[0] += record['prompt_tokens'] or 0
+            counts[1] += record['completion_tokens'] or 0
+        self.latencies.append(record['latency_ms'])
+        if record['llm_ms'] is not None:
+            self.llm_latencies.append(record['llm_ms'])
+
+    def cost(self):
+        """Estimated USD for the tokens used, or None if a model has no price."""
+        total = 0.0
+        for model, (prompt, completion) in self.tokens.items():
+            if model not in self.prices:
+                return None
+            price_in, price_out = self.prices[model]
+            total += (prompt * price_in + completion * price_out) / 1e6
+        return round(total, 4)
+
+    def report(self) -> Dict:
+        return {
+            'conversations': len(self.conversations),
+            'turns': self.turns,
+            'errors': self.errors,
+            'sources': self.sources,
+            'routes': self.routes,
+            'tokens': {model: {'prompt': p, 'completion': c} for model, (p, c) in self.tokens.items()},
+            'latency_ms': {f"p{p}": percentile(self.latencies, p) for p in (50, 95, 99)},
+            'llm_ms': {f"p{p}": percentile(self.llm_latencies, p) for p in (50, 95, 99)},
+            'estimated_cost_usd': self.cost(),
+        }
+
+
+def parse_prices(overrides: List[str]) -> Dict:
+    prices = dict(PRICES)
+    for override in overrides:
+        model, _, values = override.partition('=')
+        price_in, price_out = values.split(',')
+        prices[model] = (float(price_in), float(price_out))
+    return prices
+
+
+def run_replay(argv: List[str]):
+    parser = argparse.ArgumentParser(prog='main.py replay', description='Replay recorded guest transcripts')
+    parser.add_argument('corpus', help='JSONL file, one conversation per line')
+    parser.add_argument('--output', help='per-turn JSONL results (default: stdout)')
+    parser.add_argument('--concurrency', type=int, default=4, help='conversations replayed at once')
+    parser.add_argument('--rate', type=float, help='xAI requests per second (default: unlimited)')
+    parser.add_argument('--no-cache', action='store_true', help="don't reuse replies across conversations")
+    parser.add_argument('--no-routing', action='store_true', help='send every turn to LLM_MODEL')
+    parser.add_argument('--price', action='append', default=[], metavar='MODEL=IN,OUT',
+                        help='USD per million prompt/completion tokens')
+    args = parser.parse_args(argv)
+
+    llm = create_llm_client(XAI_API_KEY, deadline=30.0, attempt_timeout=15.0, pool_size=args.concurrency,
+                            rate_limit=RateLimiter(args.rate) if args.rate else None)
+    pipeline = create_pipeline(llm)
+    if args.no_cache:
+        pipeline.reply_cache = ReplyCache(0)  # Hotels from TENANTS_DIR copy these settings
+    if args.no_routing:
+        pipeline.model_routing = False
+    tenants = create_tenant_registry(pipeline)
+    summary = ReplaySummary(parse_prices(args.price))
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
     try:
-        selected = list(SERVICES.keys())[int(choice) - 1]
-        print(f"Connecting to {selected}...")
-        return selected
-    except (ValueError, IndexError):
+        for record in replay(tenants, read_corpus(args.corpus), args.concurrency):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            summary.add(record)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    report = dict(summary.report(), seconds=round(time.perf_counter() - started, 1),
+                  reply_cache=pipeline.reply_cache.stats())
+    print(json.dumps(report, indent=2), file=sys.stderr)
+
+
+def select_service(pipeline, conv: Dict) -> str:
+    """List the services and connect to the one the guest picks (by number, or by saying it)."""
+    print("Welcome to Hotel AI Services. Please select a service:")
+    for number, (name, _) in pipeline.services.items():
+        print(f"{number}. {name.title()}")
+    while True:
+        choice = input("Enter a number or say what you need: ").strip()
+        digit = choice if choice.isdigit() else None
+        service_num, _ = pipeline.match_service(conv, '' if digit else choice.lower(), digit)
+        service = pipeline.connect_service(conv, service_num)
+        if service:
+            print(f"Connecting to {service}...")
+            return service
         print("Invalid choice. Please try again.")
-        return select_service()
 
-def ai_conversation(service: str, system_prompt: str) -> None:
-    """Handle AI conversation using xAI Grok API via requests."""
-    print(f"You are now connected to {service}. How can I help you?")
-    
-    messages = [{"role": "system", "content": system_prompt}]
-    
+
+def console_input() -> Iterator[str]:
     while True:
-        user_input = input("You: ")
-        if user_input.lower() in ["bye", "goodbye", "exit"]:
-            print("Thank you for calling. Goodbye!")
-            break
-        
-        messages.append({"role": "user", "content": user_input})
-        
-        payload = {
-            "model": "grok-beta",
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-        
         try:
-            response = requests.post(XAI_API_URL, headers=HEADERS, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            ai_reply = data["choices"][0]["message"]["content"]
-            print(f"AI ({service}): {ai_reply}")
-            
-            messages.append({"role": "assistant", "content": ai_reply})
-        except requests.exceptions.RequestException as e:
-            print(f"Error communicating with AI: {e}")
-            break
-        except (KeyError, IndexError) as e:
-            print(f"Unexpected response format: {e}")
-            break
+            yield input("You: ")
+        except EOFError:
+            return
+
+
+def run_console():
+    llm = create_llm_client(XAI_API_KEY, deadline=30.0, attempt_timeout=15.0)
+    pipeline = create_pipeline(llm)
+    room = input("Room number (optional): ").strip()
+    conv = start_call(pipeline, room=room or None)
+    conv['call_sid'] = f"console-{os.getpid()}"
+    service = select_service(pipeline, conv)
+    print(f"You are now connected to {service}. How can I help you?")
+    for record in converse(pipeline, conv, console_input()):
+        print(f"AI ({service}): {record['reply']}")
+    print(pipeline.templates.text(conv['lang'], 'goodbye'))
+
 
 if __name__ == "__main__":
-    service = select_service()
-    system_prompt = f"You are a helpful {service} assistant in a hotel. {SERVICES[service]}"
-    ai_conversation(service, system_prompt)
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if not XAI_API_KEY:
+        raise ValueError("XAI_API_KEY environment variable not set")
+    if sys.argv[1:2] == ['replay']:
+        run_replay(sys.argv[2:])
+    else:
+        run_console()
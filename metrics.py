@@ -0,0 +1,202 @@
+# metrics.py - Timing spans, counters and histograms with Prometheus text output
+#
+# `with span('llm'):` times a block into hotel_span_seconds{span="llm"} and adds
+# it to the current turn's breakdown. bind_call() tags the current request (or
+# background turn) with its CallSid, which CallSidFilter adds to every log
+# record. Values are per process; when METRICS_DIR is set each worker writes
+# its snapshot there every few seconds and /metrics sums all of them, so a
+# scrape sees the whole gunicorn server rather than one worker.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5.0  # Seconds between snapshot writes to METRICS_DIR
+
+HELP = {
+    'hotel_requests_total': ('counter', 'Webhook requests by route and status'),
+    'hotel_request_seconds': ('histogram', 'Webhook handling time by route'),
+    'hotel_span_seconds': ('histogram', 'Time spent in each stage of a turn'),
+    'hotel_llm_replies_total': ('counter', 'Assistant replies by source (template, llm, cache, fallback)'),
+    'hotel_routes_total': ('counter', 'Guest turns by routing tier (template, fast, full) and the rule that chose it'),
+    'hotel_reply_seconds': ('histogram', 'Time to produce a reply (routing through LLM) by routing tier'),
+    'hotel_escalations_total': ('counter', 'Calls handed to staff'),
+    'hotel_turns_rejected_total': ('counter', 'Deferred turns refused by admission control'),
+    'hotel_turns_stale_total': ('counter', 'Deferred turns dropped because the call stopped waiting for them'),
+    'hotel_speculative_turns_total': ('counter', 'Speculative first turns by outcome (started, used, discarded, failed)'),
+    'hotel_write_behind_flush_seconds': ('histogram', 'Time to store one write-behind batch'),
+    'hotel_write_behind_blocked_total': ('counter', 'Writes that waited for room in the full write-behind queue'),
+    'hotel_write_behind_errors_total': ('counter', 'Write-behind batches dropped after retries'),
+    'hotel_pms_lookups_total': ('counter', 'Room/guest lookups by kind and cache result (hit, miss)'),
+    'hotel_tenant_loads_total': ('counter', 'Hotel profile loads by result (loaded, reloaded, failed, evicted)'),
+}
+
+_call_sid = contextvars.ContextVar('call_sid', default='-')
+_spans = contextvars.ContextVar('spans', default=None)
+
+
+class Registry:
+    """Counters and fixed-bucket histograms keyed by name and rendered label string."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, list] = {}  # key -> bucket counts + [sum, count]
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    @staticmethod
+    def _key(name, labels):
+        return name + '|' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            row = self._histograms.get(key)
+            if row is None:
+                row = self._histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    row[i] += 1
+            row[-2] += seconds
+            row[-1] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'counters': dict(self._counters), 'histograms': {k: list(v) for k, v in self._histograms.items()}}
+
+    def start_flusher(self):
+        """Write this process's snapshot to METRICS_DIR every FLUSH_INTERVAL seconds (once per process)."""
+        if not self.directory or (self._flusher is not None and self._flusher[0] == os.getpid()):
+            return
+        thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher = (os.getpid(), thread)  # Keyed by pid: a forked worker needs its own thread
+        thread.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self._write()
+
+    def _write(self):
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self._write()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Being replaced right now; it'll be there next scrape
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text exposition format, summed over every worker's snapshot."""
+        counters, histograms = {}, {}
+        for snapshot in self._snapshots():
+            for key, value in snapshot['counters'].items():
+                counters[key] = counters.get(key, 0.0) + value
+            for key, row in snapshot['histograms'].items():
+                merged = histograms.setdefault(key, [0] * len(row))
+                for i, value in enumerate(row):
+                    merged[i] += value
+        lines, described = [], set()
+
+        def describe(name):
+            if name not in described and name in HELP:
+                described.add(name)
+                kind, text = HELP[name]
+                lines.extend([f"# HELP {name} {text}", f"# TYPE {name} {kind}"])
+
+        for key in sorted(counters):
+            name, labels = key.split('|', 1)
+            describe(name)
+            lines.append(f"{name}{{{labels}}} {counters[key]:g}" if labels else f"{name} {counters[key]:g}")
+        for key in sorted(histograms):
+            name, labels = key.split('|', 1)
+            describe(name)
+            row, prefix = histograms[key], labels + ',' if labels else ''
+            for bound, count in zip(BUCKETS, row):
+                lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {row[-1]}')
+            lines.append(f"{name}_sum{{{labels}}} {row[-2]:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {row[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry(os.getenv('METRICS_DIR') or None)
+if REGISTRY.directory:
+    os.makedirs(REGISTRY.directory, exist_ok=True)
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    REGISTRY.observe(name, seconds, **labels)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into hotel_span_seconds and the current turn's breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.observe('hotel_span_seconds', elapsed, span=name)
+        spans = _spans.get()
+        if spans is not None:
+            spans[name] = spans.get(name, 0.0) + elapsed
+
+
+def bind_call(call_sid: str):
+    """Attach call_sid (and a fresh span breakdown) to the current request or background job."""
+    _call_sid.set(call_sid or '-')
+    _spans.set({})
+
+
+def current_call() -> str:
+    return _call_sid.get()
+
+
+def span_summary() -> str:
+    """'name=12.3ms ...' for the spans recorded since bind_call."""
+    spans = _spans.get() or {}
+    return ' '.join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in spans.items())
+
+
+class CallSidFilter(logging.Filter):
+    """Adds %(call_sid)s to log records."""
+
+    def filter(self, record):
+        record.call_sid = _call_sid.get()
+        return True
+
+
+def payload_sampled(call_sid: str, rate: float) -> bool:
+    """Deterministic per-call sampling, so a sampled call is logged from start to finish."""
+    if rate <= 0:
+        return False
+    return zlib.crc32(call_sid.encode()) % 10000 < rate * 10000
@@ -0,0 +1,136 @@
+# model_router.py - Picks the cheapest way to answer each guest turn
+#
+# Tiers, cheapest first:
+#   template  the whole utterance is thanks / a confirmation the assistant asked
+#             for, or a question that is only about the balance/status the room
+#             record answers: reply from a PROMPTS template, no LLM call
+#   fast      short, focused turns (at most fast_max_words words, no open-ended
+#             phrasing, no frustration): the fast model with a smaller reply budget
+#   full      everything else: the full model
+# Phrases per language come from config.ROUTER_PHRASES and are compiled once,
+# like the intent vocabularies; every language also understands English. The
+# Route records why it was chosen, so logged decisions can be used to tune the
+# thresholds.
+
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from config import ROUTER_PHRASES
+from intent_matcher import CJK_RE, tokenize
+
+PUNCTUATION_RE = re.compile(r'[\s\W_]+')
+BARE_FILLER = {'oh', 'um', 'uh', 'hmm', 'well', 'so', 'and', 'please', 'very', 'much', 'then', 'that', 'all'}
+QUESTION_WORDS = 8  # Balance/status questions longer than this are likely asking for more than the number
+JOINERS = {'and', 'also', 'y', 'también', 'et', 'aussi', 'und', 'auch', 'e', 'anche'}
+
+
+class Route(NamedTuple):
+    tier: str  # 'template', 'fast' or 'full'
+    reason: str  # Which rule decided, e.g. 'thanks', 'short', 'open_ended'
+    model: Optional[str]  # None for templates
+    max_tokens: int
+    template: Optional[str] = None  # PROMPTS key for the template tier
+
+
+class _Phrases:
+    """One language's phrase lists, as token tuples (spaced scripts) and raw strings (CJK)."""
+
+    def __init__(self, tables: List[Dict[str, list]]):
+        self.tokens: Dict[str, set] = {}
+        self.cjk: Dict[str, list] = {}
+        for table in tables:
+            for kind, phrases in table.items():
+                for phrase in phrases:
+                    if CJK_RE.search(phrase):
+                        self.cjk.setdefault(kind, []).append(phrase)
+                    else:
+                        self.tokens.setdefault(kind, set()).add(tuple(tokenize(phrase)))
+        for phrases in self.cjk.values():
+            phrases.sort(key=len, reverse=True)
+        self.longest = max((len(p) for group in self.tokens.values() for p in group), default=1)
+
+    def contains(self, kind: str, tokens: List[str], text: str) -> bool:
+        """Some phrase of kind appears in the utterance."""
+        if any(p in text for p in self.cjk.get(kind, ())):
+            return True
+        phrases = self.tokens.get(kind, set())
+        return any(tuple(tokens[i:i + n]) in phrases
+                   for n in range(1, self.longest + 1) for i in range(len(tokens) - n + 1))
+
+    def covers(self, kinds, tokens: List[str], text: str) -> Optional[set]:
+        """Kinds used if the utterance is nothing but phrases of those kinds (and filler), else None."""
+        used = set()
+        if CJK_RE.search(text):
+            for kind in kinds:
+                for phrase in self.cjk.get(kind, ()):
+                    if phrase in text:
+                        text = text.replace(phrase, ' ')
+                        used.add(kind)
+            leftover = [t for t in tokenize(text) if t not in BARE_FILLER]
+            return used if used and not leftover else None
+        i = 0
+        while i < len(tokens):
+            if tokens[i] in BARE_FILLER:
+                i += 1
+                continue
+            for n in range(min(self.longest, len(tokens) - i), 0, -1):
+                kind = next((k for k in kinds if tuple(tokens[i:i + n]) in self.tokens.get(k, ())), None)
+                if kind:
+                    used.add(kind)
+                    i += n
+                    break
+            else:
+                return None
+        return used or None
+
+
+class ModelRouter:
+    """Chooses template / fast / full for a guest turn."""
+
+    def __init__(self, fast_model: str = 'grok-3-mini', full_model: str = 'grok-3', fast_max_words: int = 12,
+                 fast_max_tokens: int = 120, full_max_tokens: int = 200, phrases: Dict = ROUTER_PHRASES,
+                 fallback_lang: int = 1):
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.fast_max_words = fast_max_words
+        self.fast_max_tokens = fast_max_tokens
+        self.full_max_tokens = full_max_tokens
+        fallback = phrases.get(fallback_lang, {})
+        self._phrases = {lang: _Phrases([table] if lang == fallback_lang else [table, fallback])
+                         for lang, table in phrases.items()}
+        self._default = self._phrases.get(fallback_lang) or _Phrases([])
+
+    def _template(self, kind: str) -> Route:
+        return Route('template', kind, None, 0, f"{kind}_reply")
+
+    def route(self, utterance: str, lang: int = 1, has_room: bool = False, last_reply: Optional[str] = None,
+              escalate: bool = False) -> Route:
+        """Route one guest turn. last_reply is the assistant's previous message, if any."""
+        phrases = self._phrases.get(lang, self._default)
+        text = utterance.lower().strip()
+        tokens = tokenize(text)
+        full = Route('full', 'default', self.full_model, self.full_max_tokens)
+        if escalate:
+            return full._replace(reason='escalation')
+        if not PUNCTUATION_RE.sub('', text):
+            return full._replace(reason='empty')
+        bare = phrases.covers(('thanks', 'confirm'), tokens, text)
+        if bare:
+            if 'confirm' not in bare:
+                return self._template('thanks')
+            if last_reply and phrases.contains('confirm_question', tokenize(last_reply.lower()), last_reply.lower()):
+                return self._template('confirm')
+            # "Yes" to an open question ("Would you like fries?") still needs the conversation
+            return Route('fast', 'bare_answer', self.fast_model, self.fast_max_tokens)
+        short_question = len(tokens) <= QUESTION_WORDS and not JOINERS.intersection(tokens)
+        if has_room and short_question:
+            for kind in ('balance', 'status'):
+                # Only a question about the number itself: "what's my balance", not "put it on my bill"
+                if kind in (phrases.covers((kind, 'ask'), tokens, text) or ()):
+                    return self._template(kind)
+        if phrases.contains('open_ended', tokens, text):
+            return full._replace(reason='open_ended')
+        words = len(tokens) if not CJK_RE.search(text) else len(text) // 3  # ~3 characters per Japanese word
+        if words <= self.fast_max_words:
+            return Route('fast', 'short', self.fast_model, self.fast_max_tokens)
+        return full._replace(reason='long')
@@ -0,0 +1,220 @@
+# pms.py - Room and guest lookups from the property-management system, behind a read-through cache
+#
+# The voice flow needs two things from the PMS: the guest behind a caller
+# number (so /voice can skip the room-number prompt) and a room's record
+# (guest name, status, balance) for the prompt context. PropertyRepository
+# answers both from a per-process TTL cache and only sends misses to the
+# backend, several at a time for batched lookups. Unknown keys are cached
+# too, for a shorter time, so a wrong room number doesn't hit the PMS on
+# every retry. A failed lookup is treated as unknown and never cached.
+#
+# Backends: StubPMS serves config.HOTEL_DATA / config.KNOWN_CALLERS locally;
+# HttpPMS asks a JSON API (PMS_URL) for several rooms or phones per request.
+# With several hotels (tenants.py) each has its own repository and backend.
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from config import HOTEL_DATA, KNOWN_CALLERS
+from metrics import inc, span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60  # Seconds a room/guest record is served from cache (balances change)
+DEFAULT_NEGATIVE_TTL = 15  # Seconds an unknown room/phone is remembered as unknown
+DEFAULT_MAX_ENTRIES = 5000
+UNKNOWN_ROOM = {"status": "unknown", "balance": 0.00, "guest": "guest"}
+
+
+class PMSError(Exception):
+    """The property-management system couldn't answer."""
+
+
+class StubPMS:
+    """Local backend over config data: rooms by number, guests by the phone on their room record."""
+
+    def __init__(self, rooms: Dict = HOTEL_DATA, callers: Dict = KNOWN_CALLERS):
+        self._rooms = rooms
+        self._callers = callers
+        self._by_phone = {record['phone']: number for number, record in rooms.items()
+                          if record.get('phone') and record.get('status') == 'checked_in'}
+
+    def rooms(self, numbers: Iterable[str]) -> Dict[str, Dict]:
+        return {n: {k: v for k, v in self._rooms[n].items() if k != 'phone'} for n in numbers if n in self._rooms}
+
+    def guests(self, phones: Iterable[str]) -> Dict[str, Dict]:
+        found = {}
+        for phone in phones:
+            number = self._by_phone.get(phone)
+            if number is not None:
+                found[phone] = {'name': self._rooms[number]['guest'], 'room': number}
+            elif phone in self._callers:
+                found[phone] = {'name': self._callers[phone], 'room': None}  # Known, but not staying with us
+        return found
+
+
+class HttpPMS:
+    """JSON API backend: GET {url}/rooms?number=..&number=.. and GET {url}/guests?phone=..&phone=..
+
+    Both answer an object keyed by the requested number/phone, leaving out unknown ones.
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 2.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._session = requests.Session()
+        if token:
+            self._session.headers['Authorization'] = f"Bearer {token}"
+
+    def _get(self, path, param, keys):
+        try:
+            response = self._session.get(f"{self.url}/{path}", params={param: list(keys)}, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise PMSError(f"{path} lookup failed: {e}") from e
+
+    def rooms(self, numbers: Iterable[str]) -> Dict[str, Dict]:
+        return self._get('rooms', 'number', numbers)
+
+    def guests(self, phones: Iterable[str]) -> Dict[str, Dict]:
+        return self._get('guests', 'phone', phones)
+
+    def warm(self) -> bool:
+        """Open a pooled connection to the PMS ahead of the first lookup (an empty room query)."""
+        try:
+            self._get('rooms', 'number', [])
+            return True
+        except PMSError:
+            return False
+
+
+class _TTLCache:
+    """LRU of key -> (expires, value); value None means 'known to be missing'."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, now):
+        """(found values by key, keys that missed or expired)."""
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] <= now:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+        return found, missing
+
+    def put(self, key, value, expires):
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PropertyRepository:
+    """Read-through cached room and guest lookups over a PMS backend."""
+
+    def __init__(self, backend, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._rooms = _TTLCache(max_entries)
+        self._guests = _TTLCache(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _lookup(self, kind, cache, fetch, keys):
+        keys = list(dict.fromkeys(k for k in keys if k))
+        now = time.monotonic()
+        found, missing = cache.get_many(keys, now)
+        self.hits += len(found)
+        self.misses += len(missing)
+        if found:
+            inc('hotel_pms_lookups_total', len(found), kind=kind, result='hit')
+        if not missing:
+            return found
+        inc('hotel_pms_lookups_total', len(missing), kind=kind, result='miss')
+        try:
+            with span('room_lookup'):
+                fetched = fetch(missing)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("PMS %s lookup failed: %s", kind, e)
+            return found  # Unknown for now; not cached, so the next lookup retries
+        for key in missing:
+            value = fetched.get(key)
+            cache.put(key, value, now + (self.ttl if value is not None else self.negative_ttl))
+            found[key] = value
+        return found
+
+    def rooms(self, numbers: Iterable[str]) -> Dict[str, Dict]:
+        """Records for several rooms (unknown rooms get UNKNOWN_ROOM); one backend call for all misses."""
+        found = self._lookup('room', self._rooms, self.backend.rooms, numbers)
+        return {n: dict(found.get(n) or UNKNOWN_ROOM) for n in numbers}
+
+    def room(self, number: str) -> Dict:
+        return self.rooms([number])[number]
+
+    def guest(self, phone: str) -> Optional[Dict]:
+        """{'name', 'room'} for the guest calling from phone, or None if the number is unknown."""
+        return self._lookup('guest', self._guests, self.backend.guests, [phone]).get(phone)
+
+    def prefetch_caller(self, phone: str) -> Dict:
+        """Who is calling and, if they're staying with us, their room record.
+
+        Returns {'name', 'room', 'room_data'} with name 'guest' and room None for unknown callers.
+        """
+        guest = self.guest(phone) or {}
+        room = guest.get('room')
+        return {'name': guest.get('name') or 'guest', 'room': room, 'room_data': self.room(room) if room else None}
+
+    def warm(self) -> bool:
+        """Connect to the backend ahead of traffic, if it's remote."""
+        warm = getattr(self.backend, 'warm', None)
+        return warm() if warm else True
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {'rooms_cached': len(self._rooms), 'guests_cached': len(self._guests), 'hits': self.hits,
+                'misses': self.misses, 'errors': self.errors, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+def create_property_repository(settings: Optional[Dict] = None) -> PropertyRepository:
+    """Repository over PMS_BACKEND ('stub', the default, or 'http' at PMS_URL), cached for PMS_CACHE_TTL.
+
+    settings (a hotel profile's "pms" section) override the environment: backend, url, token_env
+    (the name of the variable holding the token; None for no token), timeout, and rooms / callers for the stub.
+    """
+    settings = settings or {}
+    backend_name = settings.get('backend', os.getenv('PMS_BACKEND', 'stub')).lower()
+    if backend_name == 'http':
+        if 'token_env' in settings:
+            token = os.getenv(settings['token_env']) if settings['token_env'] else None
+        else:
+            token = os.getenv('PMS_TOKEN')
+        backend = HttpPMS(settings.get('url') or os.environ['PMS_URL'], token,
+                          float(settings.get('timeout', os.getenv('PMS_TIMEOUT', 2.0))))
+    elif backend_name == 'stub':
+        backend = StubPMS(settings.get('rooms', HOTEL_DATA), settings.get('callers', KNOWN_CALLERS))
+    else:
+        raise ValueError(f"Unknown PMS_BACKEND: {backend_name}")
+    return PropertyRepository(backend, float(os.getenv('PMS_CACHE_TTL', DEFAULT_TTL)),
+                              float(os.getenv('PMS_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)))
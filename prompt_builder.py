@@ -0,0 +1,82 @@
+# prompt_builder.py - Token-budgeted prompt assembly with a rolling summary
+#
+# Message order is chosen for provider-side prompt caching:
+#   1. stable system prompt (persona + service instructions; identical every turn)
+#   2. call context (room/guest data; changes rarely within a call)
+#   3. rolling summary of older turns
+#   4. as many recent turns as fit the budget
+#   5. optional escalation note (changes turn to turn, so it goes last)
+# Stored history is never modified; only the cached summary is updated.
+
+from typing import Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD = 4  # Role/formatting tokens per chat message
+SUMMARY_LINE_CHARS = 160
+FOLD_TARGET = 0.6  # Share of the history budget left after folding
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English-like text)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_tokens(message: Dict) -> int:
+    return count_tokens(message['content']) + MESSAGE_OVERHEAD
+
+
+class PromptBuilder:
+    """Builds chat payloads that fit `budget` tokens, folding older turns into a cached summary."""
+
+    def __init__(self, budget: int = 1200, summary_budget: int = 200, min_recent: int = 2):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.min_recent = min_recent  # Always send at least this many latest messages verbatim
+
+    def _fold(self, summary: Dict, messages: List[Dict], upto: int) -> Dict:
+        """Extend the summary with messages[summary['upto']:upto], keeping it within summary_budget."""
+        lines = list(summary.get('lines', []))
+        for message in messages[summary.get('upto', 0):upto]:
+            speaker = 'Guest' if message['role'] == 'user' else 'You'
+            content = ' '.join(message['content'].split())
+            if len(content) > SUMMARY_LINE_CHARS:
+                content = content[:SUMMARY_LINE_CHARS - 3].rstrip() + '...'
+            lines.append(f"{speaker}: {content}")
+        while len(lines) > 1 and count_tokens(' '.join(lines)) > self.summary_budget:
+            lines.pop(0)  # Oldest detail goes first
+        return {'upto': upto, 'lines': lines}
+
+    def _recent_start(self, history: List[Dict], lo: int, available: int) -> int:
+        """Index of the oldest message (not before lo) that still fits in `available` tokens."""
+        start, used = len(history), 0
+        while start > lo:
+            cost = message_tokens(history[start - 1])
+            if used + cost > available and len(history) - start >= self.min_recent:
+                break
+            used += cost
+            start -= 1
+        return start
+
+    def build(self, history: List[Dict], summary: Optional[Dict], system_prompt: str,
+              context: Optional[str] = None, note: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """Return (messages to send, updated summary cache)."""
+        summary = summary or {'upto': 0, 'lines': []}
+        prefix = [{"role": "system", "content": system_prompt}]
+        if context:
+            prefix.append({"role": "system", "content": context})
+        fixed = sum(message_tokens(m) for m in prefix) + (count_tokens(note) + MESSAGE_OVERHEAD if note else 0)
+
+        available = self.budget - fixed - (MESSAGE_OVERHEAD + self.summary_budget)
+        start = self._recent_start(history, summary.get('upto', 0), available)
+        if start > summary.get('upto', 0):
+            # Fold down to FOLD_TARGET of the budget so the summary (and the cacheable prefix) changes rarely
+            start = self._recent_start(history, summary.get('upto', 0), int(available * FOLD_TARGET))
+            summary = self._fold(summary, history, start)
+
+        messages = list(prefix)
+        if summary['lines']:
+            messages.append({"role": "system", "content": "Earlier in this call:\n" + '\n'.join(summary['lines'])})
+        messages.extend(dict(m) for m in history[summary['upto']:])
+        if note:
+            messages.append({"role": "system", "content": note})
+        return messages, summary
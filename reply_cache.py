@@ -0,0 +1,88 @@
+# reply_cache.py - LRU/TTL cache of AI replies to repeated guest questions
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Filler that doesn't change what the guest is asking for
+FILLER_WORDS = {'um', 'uh', 'er', 'hmm', 'please', 'hi', 'hello', 'hey', 'so', 'okay', 'ok', 'well', 'just'}
+
+# Questions about the guest's own room/bill are answered from the room record and must never be shared
+ROOM_SPECIFIC_WORDS = {'balance', 'bill', 'billing', 'charge', 'charges', 'owe', 'folio', 'account',
+                       'my room', 'room number', 'my name', 'status', 'checked in', 'my reservation'}
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase, strip punctuation and filler words, collapse whitespace."""
+    words = re.findall(r"[\w']+", text.lower())
+    return ' '.join(w for w in words if w not in FILLER_WORDS)
+
+
+def is_room_specific(normalized: str) -> bool:
+    padded = f" {normalized} "
+    return any(f" {phrase} " in padded for phrase in ROOM_SPECIFIC_WORDS)
+
+
+class ReplyCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss accounting."""
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()  # key -> (expires, reply, llm_ms)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_ms = 0.0  # LLM latency avoided by hits
+
+    @staticmethod
+    def make_key(service: Optional[str], lang: int, utterance: str) -> Optional[Tuple]:
+        """Cache key for an utterance, or None if it must bypass the cache.
+
+        Whether the turn stands alone in its conversation is the caller's call (ConversationPipeline.cache_key).
+        """
+        normalized = normalize_utterance(utterance)
+        if len(normalized.split()) < 2 or is_room_specific(normalized):
+            return None  # Too short to stand alone ("yes", "that one") or depends on room data
+        return (service or '', lang, normalized)
+
+    def get(self, key: Optional[Tuple]) -> Optional[str]:
+        with self._lock:
+            if key is None:
+                self.bypassed += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_ms += entry[2]
+            return entry[1]
+
+    def put(self, key: Optional[Tuple], reply: str, llm_ms: float = 0.0) -> None:
+        if key is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, reply, llm_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'saved_llm_calls': self.hits,
+                'saved_ms': round(self.saved_ms),
+            }
@@ -0,0 +1,272 @@
+# session_store.py - Per-call conversation state, keyed by CallSid
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from blocking_io import gevent_patched, run_blocking
+
+DEFAULT_TTL = 2 * 60 * 60  # Forget abandoned calls after two hours
+SWEEP_INTERVAL = 60  # Seconds between expiry sweeps of the SQLite table
+POOL_SIZE = 16  # Idle SQLite connections kept per process
+SLOW_OP = 0.01  # Lock/database waits longer than this (seconds) count as contended
+BUSY_TIMEOUT = 5.0  # Seconds a statement waits for another writer's lock before failing
+
+
+class StoreStats:
+    """Time spent waiting for the store's lock (memory) or database (SQLite), per process."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.ops = 0
+        self.wait = 0.0
+        self.max_wait = 0.0
+        self.slow = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        except sqlite3.OperationalError:  # e.g. "database is locked" after the busy timeout
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.ops += 1
+                self.wait += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+                self.slow += elapsed > SLOW_OP
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"backend": self.backend, "ops": self.ops, "wait_ms": round(self.wait * 1000, 2),
+                    "max_wait_ms": round(self.max_wait * 1000, 2), "slow_ops": self.slow, "errors": self.errors}
+
+
+class MemorySessionStore:
+    """In-process store with TTL eviction. State is kept as JSON so callers never share mutable dicts."""
+
+    shared = False  # Only this process sees it
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # call_sid -> (expires, json)
+        self._lock = threading.Lock()
+        self._stats = StoreStats('memory')
+
+    @contextmanager
+    def _locked(self):
+        with self._stats.timed():
+            self._lock.acquire()
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _evict(self, now):
+        # Entries are kept in write order and every write refreshes the TTL,
+        # so expired entries are always at the front.
+        while self._data:
+            call_sid, (expires, _) = next(iter(self._data.items()))
+            if expires > now:
+                break
+            self._data.popitem(last=False)
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        """Return a copy of the state for call_sid, or None if unknown or expired."""
+        now = time.monotonic()
+        with self._locked():
+            self._evict(now)
+            entry = self._data.get(call_sid)
+        if entry is None:
+            return None
+        return json.loads(entry[1])
+
+    def put(self, call_sid: str, state: Dict) -> None:
+        """Store state for call_sid and refresh its TTL."""
+        payload = json.dumps(state)
+        now = time.monotonic()
+        with self._locked():
+            self._data.pop(call_sid, None)
+            self._data[call_sid] = (now + self.ttl, payload)
+            self._evict(now)
+
+    def delete(self, call_sid: str) -> None:
+        """Drop state for call_sid (no-op if missing)."""
+        with self._locked():
+            self._data.pop(call_sid, None)
+
+    def write_many(self, items: List[Tuple[str, Optional[str]]]) -> None:
+        """Apply (call_sid, JSON state) puts and (call_sid, None) deletes under one lock acquisition."""
+        now = time.monotonic()
+        with self._locked():
+            for call_sid, payload in items:
+                self._data.pop(call_sid, None)
+                if payload is not None:
+                    self._data[call_sid] = (now + self.ttl, payload)
+            self._evict(now)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict:
+        """Operation count and lock-wait totals for this process."""
+        return self._stats.snapshot()
+
+
+class SQLiteSessionStore:
+    """SQLite-backed store shared by every worker process on the same host."""
+
+    shared = True
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(POOL_SIZE)
+        self._stats = StoreStats('sqlite')
+        self._next_sweep = 0.0
+        # Under gevent, statements first run inline without waiting; only a busy database is waited out,
+        # on a native thread (see _run), so lock waits never stall the worker's other calls
+        self._cooperative = gevent_patched()
+
+        def create(conn):
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " call_sid TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+
+        with self._conn() as conn:
+            self._run(conn, create)  # Workers start together and may find the database locked
+
+    @contextmanager
+    def _conn(self):
+        # A connection is used by one thread (or gevent greenlet) at a time, then returned to the pool.
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.path, timeout=0 if self._cooperative else BUSY_TIMEOUT,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _sweep(self, conn, now):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL
+        conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def _run(self, conn, fn):
+        """fn(conn); under gevent, retried on the hub's thread pool with the busy timeout if the database is locked.
+
+        gevent can't make sqlite3's lock waits cooperative, and a wait of up to BUSY_TIMEOUT on the hub would
+        stall every call the worker serves. Every fn here is safe to run again (idempotent writes).
+        """
+        if not self._cooperative:
+            return fn(conn)
+        try:
+            return fn(conn)
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+
+        def wait_for_lock(conn):
+            conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}")
+            try:
+                return fn(conn)
+            finally:
+                conn.execute("PRAGMA busy_timeout=0")
+
+        return run_blocking(wait_for_lock, conn)
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        """Return the state for call_sid, or None if unknown or expired."""
+        with self._conn() as conn, self._stats.timed():
+            row = self._run(conn, lambda conn: conn.execute(
+                "SELECT state FROM sessions WHERE call_sid = ? AND expires > ?",
+                (call_sid, time.time()),
+            ).fetchone())
+        return json.loads(row[0]) if row else None
+
+    def put(self, call_sid: str, state: Dict) -> None:
+        """Store state for call_sid and refresh its TTL."""
+        now = time.time()
+        payload = json.dumps(state)
+
+        def write(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (call_sid, state, expires) VALUES (?, ?, ?)",
+                (call_sid, payload, now + self.ttl),
+            )
+            self._sweep(conn, now)
+
+        with self._conn() as conn, self._stats.timed():
+            self._run(conn, write)
+
+    def delete(self, call_sid: str) -> None:
+        """Drop state for call_sid (no-op if missing)."""
+        with self._conn() as conn, self._stats.timed():
+            self._run(conn, lambda conn: conn.execute("DELETE FROM sessions WHERE call_sid = ?", (call_sid,)))
+
+    def write_many(self, items: List[Tuple[str, Optional[str]]]) -> None:
+        """Apply (call_sid, JSON state) puts and (call_sid, None) deletes in one transaction."""
+        now = time.time()
+        puts = [(call_sid, payload, now + self.ttl) for call_sid, payload in items if payload is not None]
+        deletes = [(call_sid,) for call_sid, payload in items if payload is None]
+
+        def write(conn):
+            if len(items) > 1:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO sessions (call_sid, state, expires) VALUES (?, ?, ?)", puts)
+                conn.executemany("DELETE FROM sessions WHERE call_sid = ?", deletes)
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            self._sweep(conn, now)
+
+        with self._conn() as conn, self._stats.timed():
+            self._run(conn, write)
+
+    def __len__(self):
+        with self._conn() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Operation count and database-wait totals (including busy waits) for this process."""
+        return self._stats.snapshot()
+
+
+def create_session_store():
+    """Build the store selected by SESSION_BACKEND ('memory' or 'sqlite')."""
+    backend = os.getenv('SESSION_BACKEND', 'memory').lower()
+    ttl = float(os.getenv('SESSION_TTL', DEFAULT_TTL))
+    if backend == 'sqlite':
+        return SQLiteSessionStore(os.getenv('SESSION_DB_PATH', '/tmp/conversations.db'), ttl)
+    if backend == 'memory':
+        return MemorySessionStore(ttl)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
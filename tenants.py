@@ -0,0 +1,241 @@
+# tenants.py - Several hotels on one deployment: the dialled number picks the hotel's profile
+#
+# Each hotel is a JSON profile in TENANTS_DIR, named <hotel id>.json:
+#   {"name": "Seaside Inn", "numbers": ["+15550100001"],
+#    "services": {"1": ["room service", "Handle food and drink orders..."], ...},
+#    "languages": {"1": {"welcome": "..."}}, "prompts": {"2": {"connected": "..."}},
+#    "service_keywords": {"1": {"1": ["room service", "food", ...]}},
+#    "pms": {"backend": "http", "url": "https://pms.example/api", "token_env": "SEASIDE_PMS_TOKEN"}}
+# Every key but "numbers" is optional. services replaces config.SERVICES;
+# languages, prompts and service_keywords are merged per language (and per
+# prompt / service) over config, and vocabularies for services the hotel
+# doesn't offer are dropped. pms is passed to create_property_repository, but
+# never falls back to the PMS_* environment or config's records: those are the
+# default hotel's, so a hotel without pms has no room or guest records.
+#
+# TenantRegistry maps a Twilio `To` number to the hotel's ConversationPipeline.
+# Profiles are built on first use (templates, intent tables, PMS repository)
+# and kept in an LRU of TENANT_CACHE_SIZE; the xAI client, model router, prompt
+# builder and language model are shared by all hotels. The directory is
+# rescanned at most every TENANT_RELOAD_INTERVAL seconds: new files add hotels,
+# a changed file is rebuilt on its next call, and a profile that fails to load
+# keeps serving its last good version. Numbers that match no profile, and
+# deployments without TENANTS_DIR, get the default hotel built from config.
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from call_analyzer import CallAnalyzer
+from config import SERVICE_KEYWORDS
+from conversation import ConversationPipeline
+from intent_matcher import IntentMatcher
+from metrics import inc
+from pms import create_property_repository
+from reply_cache import ReplyCache
+from twiml_templates import TwimlTemplates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 100  # Hotels kept built in each worker
+DEFAULT_RELOAD_INTERVAL = 30.0  # Seconds between checks of the profile directory
+NO_PMS = {'backend': 'stub', 'rooms': {}, 'callers': {}, 'token_env': None}  # What a profile's pms section starts from
+
+
+def normalize_number(number: str) -> str:
+    """E.164-ish form for matching: digits and a leading '+' ("+1 (555) 010-0001" -> "+15550100001")."""
+    number = number.strip()
+    return ('+' if number.startswith('+') else '') + re.sub(r'\D', '', number)
+
+
+def _int_keys(table: Dict) -> Dict:
+    """JSON object keys that are numbers (language / service ids) back to ints."""
+    return {int(k) if isinstance(k, str) and k.isdigit() else k: v for k, v in table.items()}
+
+
+def _merge(defaults: Dict, overrides: Optional[Dict]) -> Dict:
+    """Per-language tables with a profile's entries laid over config's."""
+    merged = {lang: dict(table) for lang, table in defaults.items()}
+    for lang, table in _int_keys(overrides or {}).items():
+        merged.setdefault(lang, {}).update(_int_keys(table))
+    return merged
+
+
+def _pms_settings(profile: Dict) -> Dict:
+    """The profile's PMS settings, with nothing taken from the default hotel's."""
+    settings = {**NO_PMS, **(profile.get('pms') or {})}
+    if str(settings['backend']).lower() == 'http' and not settings.get('url'):
+        raise ValueError("an http pms needs its own url")
+    return settings
+
+
+def read_profile(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        profile = json.load(f)
+    if not isinstance(profile, dict):
+        raise ValueError(f"{path}: a hotel profile is a JSON object")
+    return profile
+
+
+def build_pipeline(base: ConversationPipeline, hotel_id: str, profile: Dict) -> ConversationPipeline:
+    """A hotel's pipeline from its profile, sharing base's xAI client, router, prompt builder and language model."""
+    services = ({int(k): tuple(v) for k, v in profile['services'].items()} if 'services' in profile
+                else base.services)
+    keywords = _merge(SERVICE_KEYWORDS, profile.get('service_keywords'))
+    keywords = {lang: {s: words for s, words in table.items() if s in services} for lang, table in keywords.items()}
+    intents = IntentMatcher(keywords)
+    templates = TwimlTemplates(_merge(base.templates.languages, profile.get('languages')),
+                               _merge(base.templates.prompts, profile.get('prompts')))
+    return ConversationPipeline(
+        base.llm,
+        create_property_repository(_pms_settings(profile)),
+        templates,
+        intents,
+        CallAnalyzer(base.analyzer.language_tracker, intents),
+        base.prompts,
+        base.router,
+        ReplyCache(base.reply_cache.max_entries, base.reply_cache.ttl),  # Replies can name the hotel
+        services,
+        model_routing=base.model_routing,
+        log_payload=base.log_payload,
+        hotel=hotel_id,
+        hotel_name=profile.get('name'),
+    )
+
+
+class TenantRegistry:
+    """Dialled number -> hotel pipeline, built lazily from profile files and kept in an LRU."""
+
+    def __init__(self, default: ConversationPipeline, directory: Optional[str] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+                 build: Callable[[ConversationPipeline, str, Dict], ConversationPipeline] = build_pipeline):
+        self.default = default
+        self.directory = directory
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self._build = build
+        self._files: Dict[str, Tuple[float, tuple]] = {}  # Hotel id -> (profile mtime, its numbers)
+        self._numbers: Dict[str, str] = {}  # Normalized number -> hotel id
+        self._loaded: "OrderedDict[str, Tuple[float, ConversationPipeline]]" = OrderedDict()
+        self._failed: Dict[str, float] = {}  # Hotel id -> mtime of a profile version that didn't load
+        self._scanned_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # One profile build at a time, so concurrent first calls build once
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.failures = 0
+
+    def scan(self):
+        """Re-read the profile directory: which hotels exist, their numbers and file versions."""
+        files = {}
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith('.json') and e.is_file()]
+        except OSError:
+            logger.exception("Tenants: can't read %s", self.directory)
+            return
+        for entry in entries:
+            hotel_id = entry.name[:-5]
+            mtime = entry.stat().st_mtime
+            known = self._files.get(hotel_id)
+            if known and known[0] == mtime:
+                files[hotel_id] = known
+                continue
+            try:
+                numbers = tuple(normalize_number(n) for n in read_profile(entry.path).get('numbers', []))
+            except (OSError, ValueError) as e:
+                logger.warning("Tenants: can't read profile %s: %s", entry.name, e)
+                files[hotel_id] = known or (0.0, ())  # Keep what we had; retried on the next scan
+                continue
+            files[hotel_id] = (mtime, numbers)
+        numbers = {}
+        for hotel_id, (_, hotel_numbers) in sorted(files.items()):
+            for number in hotel_numbers:
+                if numbers.setdefault(number, hotel_id) != hotel_id:
+                    logger.warning("Tenants: %s is claimed by %s and %s", number, numbers[number], hotel_id)
+        with self._lock:
+            changed = files != self._files
+            self._files, self._numbers = files, numbers
+        if changed:
+            logger.info("Tenants: %d hotel profiles, %d numbers", len(files), len(numbers))
+
+    def refresh(self):
+        """Scan again once reload_interval has passed (only one caller does the scan)."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._scanned_at is not None and now - self._scanned_at < self.reload_interval:
+                return
+            self._scanned_at = now
+        self.scan()
+
+    def resolve(self, number: Optional[str]) -> ConversationPipeline:
+        """Pipeline of the hotel that owns a dialled number (the default hotel for unknown numbers)."""
+        if not self.directory or not number:
+            return self.default
+        self.refresh()
+        return self.get(self._numbers.get(normalize_number(number)))
+
+    def get(self, hotel_id: Optional[str]) -> ConversationPipeline:
+        """A hotel's pipeline by id (as stored in call state), building or rebuilding it if needed."""
+        if not self.directory or not hotel_id or hotel_id == self.default.hotel:
+            return self.default
+        self.refresh()
+        with self._lock:
+            version = self._files.get(hotel_id, (None,))[0]
+            loaded = self._loaded.get(hotel_id)
+            if loaded:
+                self._loaded.move_to_end(hotel_id)
+                if loaded[0] == version or version is None or self._failed.get(hotel_id) == version:
+                    return loaded[1]  # Current, removed (calls in progress finish on it), or a bad edit
+        if version is None or self._failed.get(hotel_id) == version:
+            return self.default
+        with self._load_lock:
+            with self._lock:
+                current = self._loaded.get(hotel_id)
+            if current and current[0] == version:  # Built by another thread meanwhile
+                return current[1]
+            try:
+                pipeline = self._build(self.default, hotel_id, read_profile(os.path.join(self.directory, f"{hotel_id}.json")))
+            except Exception:
+                logger.exception("Tenants: profile %s failed to load", hotel_id)
+                self.failures += 1
+                inc('hotel_tenant_loads_total', result='failed')
+                with self._lock:
+                    self._failed[hotel_id] = version
+                return current[1] if current else self.default
+            result = 'reloaded' if current else 'loaded'
+            with self._lock:
+                self._failed.pop(hotel_id, None)
+                self._loaded[hotel_id] = (version, pipeline)
+                self._loaded.move_to_end(hotel_id)
+                while len(self._loaded) > self.cache_size:
+                    self._loaded.popitem(last=False)
+                    self.evictions += 1
+                    inc('hotel_tenant_loads_total', result='evicted')
+                if current:
+                    self.reloads += 1
+                else:
+                    self.loads += 1
+        inc('hotel_tenant_loads_total', result=result)
+        logger.info("Tenants: %s %s (%s)", result, hotel_id, pipeline.hotel_name or 'unnamed')
+        return pipeline
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'profiles': len(self._files), 'numbers': len(self._numbers), 'loaded': len(self._loaded),
+                    'loads': self.loads, 'reloads': self.reloads, 'evictions': self.evictions,
+                    'failures': self.failures}
+
+
+def create_tenant_registry(default: ConversationPipeline) -> TenantRegistry:
+    """Registry over TENANTS_DIR (unset: every call goes to the default hotel)."""
+    return TenantRegistry(default, os.getenv('TENANTS_DIR') or None,
+                          int(os.getenv('TENANT_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+                          float(os.getenv('TENANT_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL)))
@@ -0,0 +1,68 @@
+# test_call_log.py - Segments, the per-day index and time lookups in call_log
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import call_log  # noqa: E402
+from call_analytics import CallAnalytics  # noqa: E402
+from call_log import CallLog  # noqa: E402
+
+
+def sids(batch):
+    return [entry['call_sid'] for _, entry in batch]
+
+
+def test_segments_rotate_by_size(tmp_path):
+    log = CallLog(str(tmp_path), max_segment_bytes=200)
+    for i in range(10):
+        log.append({'call_sid': f"CA{i}", 'speech': 'x' * 50})
+    segments = [n for n in os.listdir(tmp_path) if n.startswith('calls-')]
+    assert len(segments) > 3
+    batch, end = log.entries_since(0)
+    assert sids(batch) == [f"CA{i}" for i in range(10)] and end == log.end()
+    assert log.read([batch[3][0]])[0]['call_sid'] == 'CA3'
+
+
+def test_entries_since_resumes_and_stops(tmp_path):
+    log = CallLog(str(tmp_path))
+    log.append_many([{'call_sid': f"CA{i}"} for i in range(5)])
+    first, position = log.entries_since(0, limit=2)
+    rest, end = log.entries_since(position, stop=log.end())
+    assert sids(first) == ['CA0', 'CA1'] and sids(rest) == ['CA2', 'CA3', 'CA4']
+    assert log.entries_since(end) == ([], end)
+
+
+def test_index_starts_a_file_each_day(tmp_path, monkeypatch):
+    clock = [datetime(2026, 10, 16, 23, 59).timestamp()]
+    monkeypatch.setattr(call_log, 'time', SimpleNamespace(time=lambda: clock[0]))
+    log = CallLog(str(tmp_path))
+    log.append_many([{'call_sid': 'CA1'}, {'call_sid': 'CA2'}])
+    clock[0] += 120
+    midnight = datetime(2026, 10, 17)
+    log.append({'call_sid': 'CA3'})
+    assert sorted(n[:14] for n in os.listdir(tmp_path) if n.startswith('index-')) == ['index-20261016', 'index-20261017']
+    reopened = CallLog(str(tmp_path))  # Another worker: finds both files
+    batch, _ = reopened.entries_since(0)
+    assert sids(batch) == ['CA1', 'CA2', 'CA3']
+    assert sids(reopened.entries_since(reopened.position_at(midnight))[0]) == ['CA3']
+    assert [e['call_sid'] for e in reopened.read([pos for pos, _ in batch])] == ['CA1', 'CA2', 'CA3']
+
+
+def test_entries_queued_earlier_are_not_skipped(tmp_path):
+    log = CallLog(str(tmp_path))
+    now = datetime.now()
+    log.append({'call_sid': 'CA1', 'timestamp': (now - timedelta(hours=5)).isoformat()})
+    since = datetime.now()
+    # A write-behind batch from another worker: stamped when queued, written after newer entries
+    log.append({'call_sid': 'CA2', 'timestamp': (now + timedelta(seconds=1)).isoformat()})
+    log.append({'call_sid': 'CA3', 'timestamp': (now - timedelta(minutes=1)).isoformat()})
+    log.append({'call_sid': 'CA4', 'timestamp': (now + timedelta(seconds=2)).isoformat()})
+    assert sids(log.entries_since(log.position_at(since))[0]) == ['CA2', 'CA3', 'CA4']
+    exported = ''.join(CallAnalytics(log).export('csv', since=now - timedelta(hours=1)))
+    assert [line.split(',')[2] for line in exported.splitlines()[1:]] == ['CA2', 'CA3', 'CA4']
@@ -0,0 +1,61 @@
+# test_intent_matcher.py - Service matching accuracy and speculative-turn reuse in intent_matcher
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SERVICE_KEYWORDS  # noqa: E402
+from intent_matcher import IntentMatcher  # noqa: E402
+
+MATCHER = IntentMatcher(SERVICE_KEYWORDS)
+
+# (language, utterance, expected service) as callers phrase them at service selection
+ACCURACY_SET = [
+    (1, "room service please", 1), (1, "I'd like to order a burger", 1), (1, "can I get some coffee and breakfast", 1),
+    (1, "front desk", 2), (1, "I have a question about my bill", 2), (1, "late checkout please", 2),
+    (1, "I'm locked out of my room", 2), (1, "can you recommend a restaurant", 3), (1, "I need a taxi to the airport", 3),
+    (1, "concierge", 3), (1, "extra towels please", 4), (1, "can someone clean my room", 4), (1, "I need more pillows", 4),
+    (1, "the air conditioning is broken", 5), (1, "my toilet is clogged", 5), (1, "the tv doesn't work", 5),
+    (1, "the light in the bathroom", 5), (1, "two", 2), (1, "five", 5),
+    (2, "servicio de habitaciones", 1), (2, "necesito toallas", 4), (2, "quiero pedir el desayuno", 1),
+    (3, "service en chambre", 1), (3, "j'ai besoin de serviettes", 4),
+    (4, "zimmerservice bitte", 1), (4, "ich brauche handtücher", 4),
+    (5, "servizio in camera", 1), (5, "vorrei degli asciugamani", 4),
+    (6, "ルームサービスをお願いします", 1), (6, "タオルをください", 4),
+    (1, "hello", None), (1, "towels and a burger", None),  # Nothing to go on / a tie: ask again
+]
+
+
+def test_accuracy_set():
+    wrong = [(lang, text, MATCHER.match(text, lang).service, expected) for lang, text, expected in ACCURACY_SET
+             if MATCHER.match(text, lang).service != expected]
+    assert wrong == []
+
+
+def speculation_reused(selection, final, lang=1):
+    """Whether the reply speculated for the service-selection utterance would answer the final one."""
+    return MATCHER.repeats(MATCHER.residual(selection, lang), final, lang)
+
+
+def test_same_request_reuses_speculation():
+    assert speculation_reused("room service, a hamburger", "a hamburger please")
+    assert speculation_reused("housekeeping, two towels", "two towels")
+
+
+def test_added_item_discards_speculation():
+    assert not speculation_reused("room service, a hamburger", "a hamburger and fries please")
+    assert not speculation_reused("housekeeping, two towels", "two towels and a toothbrush")
+
+
+def test_changed_number_discards_speculation():
+    assert not speculation_reused("housekeeping, two towels", "three towels")
+    assert not speculation_reused("room service to room 101", "room service to room 102")
+
+
+def test_menu_number_alone_is_not_a_request():
+    assert MATCHER.residual("two", 1) == []
+    assert MATCHER.residual("room service please", 1) == []
+    assert MATCHER.residual("two towels", 1) == ['two', 'towels']
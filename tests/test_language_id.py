@@ -0,0 +1,47 @@
+# test_language_id.py - Language detection and the call-language hysteresis in language_id
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_id import LanguageIdentifier, LanguageTracker  # noqa: E402
+
+IDENTIFIER = LanguageIdentifier()
+
+
+def follow(utterances, lang=1):
+    """The call's language after each utterance."""
+    tracker, candidate, langs = LanguageTracker(IDENTIFIER), None, []
+    for text in utterances:
+        lang, candidate = tracker.update(lang, candidate, text)
+        langs.append(lang)
+    return langs
+
+
+def test_detects_full_sentences():
+    for text, lang in [("Can I get a hamburger with fries please", 1),
+                       ("Quisiera pedir el desayuno para dos personas por favor", 2),
+                       ("Je voudrais commander le petit déjeuner s'il vous plaît", 3),
+                       ("Ich möchte bitte zwei Handtücher", 4),
+                       ("Vorrei ordinare la colazione per favore", 5),
+                       ("ルームサービスをお願いします", 6)]:
+        assert IDENTIFIER.detect(text).lang == lang, text
+
+
+def test_one_foreign_word_does_not_switch():
+    assert follow(["quesadillas"]) == [1]
+    assert follow(["I'd like the quesadillas please"]) == [1]
+
+
+def test_short_utterances_do_not_flip_flop():
+    # Each points somewhere different, and none is enough on its own
+    assert follow(["gracias", "thank you", "merci", "okay", "danke", "yes"]) == [1] * 6
+
+
+def test_switches_on_a_sentence_or_two_agreeing_utterances():
+    assert follow(["Quisiera pedir el desayuno para dos personas por favor"]) == [2]
+    assert follow(["gracias", "hola"]) == [1, 2]
+    assert follow(["ルームサービス"]) == [6]  # Script detection needs no second opinion
@@ -0,0 +1,112 @@
+# test_llm_client.py - Circuit breaker regressions in llm_client
+#
+# Usage: python -m pytest tests/
+# The xAI session is replaced by a canned response, so no network is needed.
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailable, RateLimiter  # noqa: E402
+
+
+class FakeResponse:
+    """Just enough of requests.Response for complete() and stream()."""
+
+    status_code = 200
+
+    def __init__(self, text='Hello. How can I help?'):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.text}}], "model": "grok-3", "usage": {}}
+
+    def iter_lines(self):
+        for word in self.text.split(' '):
+            yield b'data: ' + json.dumps({"choices": [{"delta": {"content": word + ' '}}]}).encode()
+        yield b'data: [DONE]'
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def post(self, url, **kwargs):
+        return FakeResponse()
+
+
+def half_open_client():
+    """Client whose breaker has tripped and is due a probe."""
+    client = LLMClient('key', breaker=CircuitBreaker(failure_threshold=1, reset_after=0))
+    client.session = FakeSession()
+    client.breaker.record_failure()
+    assert client.breaker.is_open
+    return client
+
+
+def test_abandoned_stream_probe_releases_breaker():
+    client = half_open_client()
+    deltas = client.stream([{"role": "user", "content": "hi"}])
+    next(deltas)
+    deltas.close()  # Caller hung up mid-reply
+    assert client.complete([{"role": "user", "content": "hi"}]).text == 'Hello. How can I help?'
+    assert not client.breaker.is_open
+
+
+def test_finished_stream_probe_closes_breaker():
+    client = half_open_client()
+    assert ''.join(client.stream([{"role": "user", "content": "hi"}])).strip() == 'Hello. How can I help?'
+    assert not client.breaker.is_open
+
+
+def test_throttled_probe_releases_breaker():
+    client = half_open_client()
+    client.rate_limit = RateLimiter(rate=0.01, burst=1)
+    client.rate_limit.acquire()  # Bucket empty for the next 100s
+    for call in (lambda: client.complete([{"role": "user", "content": "hi"}], deadline=1),
+                 lambda: next(client.stream([{"role": "user", "content": "hi"}]))):
+        try:
+            call()
+        except LLMUnavailable as e:
+            assert 'rate limit' in str(e)  # Not "circuit breaker is open": the probe was handed back
+        else:
+            raise AssertionError("throttled call went through")
+    client.rate_limit = None
+    assert client.complete([{"role": "user", "content": "hi"}]).text == 'Hello. How can I help?'
+    assert not client.breaker.is_open
+
+
+def test_breaker_hands_out_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0)
+    assert breaker.acquire() == 'ok'
+    breaker.record_failure()
+    assert [breaker.acquire() for _ in range(3)] == ['probe', 'rejected', 'rejected']
+    breaker.release_probe()
+    assert breaker.acquire() == 'probe'
+    breaker.record_success()
+    assert breaker.acquire() == 'ok'
+
+
+class BrokenSession:
+    def post(self, url, **kwargs):
+        raise TypeError("bug in the request path")
+
+
+def test_unexpected_error_releases_probe():
+    client = half_open_client()
+    client.session = BrokenSession()
+    for call in (lambda: client.complete([{"role": "user", "content": "hi"}], deadline=1),
+                 lambda: next(client.stream([{"role": "user", "content": "hi"}]))):
+        try:
+            call()
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("error was swallowed")
+        assert client.breaker.acquire() == 'probe'  # Handed back, not stuck half-open
+        client.breaker.release_probe()
@@ -0,0 +1,36 @@
+# test_main.py - Console / replay conversation endings in main.py
+#
+# Usage: python -m pytest tests/
+# xAI is replaced by the canned response from test_llm_client, so no network is needed.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conversation import create_pipeline, is_goodbye  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+from main import converse, start_call  # noqa: E402
+from test_llm_client import FakeSession  # noqa: E402
+
+
+def connected_call():
+    llm = LLMClient('key')
+    llm.session = FakeSession()
+    pipeline = create_pipeline(llm)
+    conv = start_call(pipeline)
+    pipeline.connect_service(conv, 1)
+    return pipeline, conv
+
+
+def test_exit_words_end_the_conversation_without_a_turn():
+    for word in ('exit', 'bye', 'Goodbye'):
+        pipeline, conv = connected_call()
+        turns = list(converse(pipeline, conv, ["maybe a club sandwich", "and a coffee", word, "never reached"]))
+        assert [t['speech'] for t in turns] == ["maybe a club sandwich", "and a coffee"]
+
+
+def test_goodbye_is_a_whole_word():
+    assert is_goodbye("thanks, bye") and is_goodbye("Goodbye!") and is_goodbye("bye-bye")
+    assert not is_goodbye("maybe a club sandwich") and not is_goodbye("can I buy a byelaw copy")
@@ -0,0 +1,25 @@
+# test_model_router.py - Template-tier routing in model_router
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_router import ModelRouter  # noqa: E402
+
+
+def test_balance_and_status_questions_use_templates():
+    router = ModelRouter()
+    for utterance, kind in [("What's my balance?", 'balance'), ("how much do I owe", 'balance'),
+                            ("what room am I in", 'status'), ("¿Cuál es mi saldo?", 'balance')]:
+        route = router.route(utterance, 2 if utterance.startswith('¿') else 1, has_room=True)
+        assert (route.tier, route.reason) == ('template', kind), utterance
+
+
+def test_requests_mentioning_the_bill_go_to_the_model():
+    router = ModelRouter()
+    for utterance in ("put the burger on my bill", "I want to dispute my bill", "charge it to my room number",
+                      "what's wrong with my bill"):
+        assert router.route(utterance, 1, has_room=True).tier != 'template', utterance
@@ -0,0 +1,80 @@
+# test_session_store.py - Both session stores: keyed state, TTL expiry and batched writes
+#
+# Usage: python -m pytest tests/
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import MemorySessionStore, SQLiteSessionStore  # noqa: E402
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(ttl=60.0):
+        if request.param == 'memory':
+            return MemorySessionStore(ttl=ttl)
+        return SQLiteSessionStore(str(tmp_path / 'sessions.db'), ttl=ttl)
+    return make
+
+
+def test_put_get_delete(make_store):
+    store = make_store()
+    state = {'service': 'room service', 'messages': [{'role': 'user', 'content': 'hi'}]}
+    store.put('CA1', state)
+    loaded = store.get('CA1')
+    assert loaded == state
+    loaded['messages'].clear()  # A copy: changing it doesn't touch the stored state
+    assert store.get('CA1') == state
+    store.delete('CA1')
+    store.delete('CA1')  # No-op when missing
+    assert store.get('CA1') is None
+
+
+def test_state_expires_after_ttl(make_store):
+    store = make_store(ttl=0.05)
+    store.put('CA1', {'turn': 1})
+    assert store.get('CA1') == {'turn': 1}
+    time.sleep(0.1)
+    assert store.get('CA1') is None
+    assert len(store) == 0
+
+
+def test_put_refreshes_ttl(make_store):
+    store = make_store(ttl=0.15)
+    store.put('CA1', {'turn': 1})
+    time.sleep(0.1)
+    store.put('CA1', {'turn': 2})
+    time.sleep(0.1)
+    assert store.get('CA1') == {'turn': 2}
+
+
+def test_write_many_applies_puts_and_deletes(make_store):
+    store = make_store()
+    store.put('CA1', {'turn': 1})
+    store.put('CA2', {'turn': 1})
+    store.write_many([('CA1', None), ('CA2', json.dumps({'turn': 2})), ('CA3', json.dumps({'turn': 1}))])
+    assert store.get('CA1') is None
+    assert store.get('CA2') == {'turn': 2} and store.get('CA3') == {'turn': 1}
+    assert len(store) == 2
+
+
+def test_concurrent_calls_keep_their_own_state(make_store):
+    store = make_store()
+
+    def call(n):
+        for turn in range(20):
+            store.put(f"CA{n}", {'turn': turn})
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(store.get(f"CA{n}") == {'turn': 19} for n in range(8))
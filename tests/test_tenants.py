@@ -0,0 +1,78 @@
+# test_tenants.py - Dialled-number resolution and profile reloads in tenants
+#
+# Usage: python -m pytest tests/
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tenants import NO_PMS, TenantRegistry, _pms_settings, normalize_number  # noqa: E402
+
+DEFAULT = SimpleNamespace(hotel=None, hotel_name='Default')
+
+
+def fake_build(base, hotel_id, profile):
+    """Stands in for build_pipeline: a broken profile (no name) fails to build."""
+    return SimpleNamespace(hotel=hotel_id, hotel_name=profile['name'])
+
+
+def write_profile(directory, hotel_id, profile, mtime):
+    path = directory / f"{hotel_id}.json"
+    path.write_text(json.dumps(profile) if isinstance(profile, dict) else profile)
+    os.utime(path, (mtime, mtime))  # Distinct versions even within the filesystem's mtime resolution
+
+
+@pytest.fixture
+def registry(tmp_path):
+    write_profile(tmp_path, 'seaside', {'name': 'Seaside Inn', 'numbers': ['+1 (555) 010-0001']}, 1000)
+    write_profile(tmp_path, 'harbor', {'name': 'Harbor Hotel', 'numbers': ['+15550100002']}, 1000)
+    return TenantRegistry(DEFAULT, str(tmp_path), reload_interval=0, build=fake_build)
+
+
+def test_normalize_number():
+    assert normalize_number(' +1 (555) 010-0001 ') == '+15550100001'
+    assert normalize_number('555.010.0001') == '5550100001'
+
+
+def test_resolves_by_dialled_number(registry):
+    assert registry.resolve('+15550100001').hotel_name == 'Seaside Inn'
+    assert registry.resolve('+1-555-010-0002').hotel_name == 'Harbor Hotel'
+    assert registry.resolve('+15550100001') is registry.resolve('+15550100001')  # Built once
+    assert registry.stats()['loads'] == 2
+
+
+def test_unknown_numbers_get_the_default_hotel(registry):
+    assert registry.resolve('+15559999999') is DEFAULT
+    assert registry.resolve(None) is DEFAULT
+    assert registry.get('no-such-hotel') is DEFAULT
+    assert TenantRegistry(DEFAULT, None, build=fake_build).resolve('+15550100001') is DEFAULT
+
+
+def test_reload_picks_up_a_changed_profile(registry, tmp_path):
+    assert registry.resolve('+15550100001').hotel_name == 'Seaside Inn'
+    write_profile(tmp_path, 'seaside', {'name': 'Seaside Resort', 'numbers': ['+15550100001', '+15550100009']}, 2000)
+    assert registry.resolve('+15550100009').hotel_name == 'Seaside Resort'
+    assert registry.stats()['reloads'] == 1
+
+
+def test_broken_profile_keeps_the_last_good_version(registry, tmp_path):
+    good = registry.resolve('+15550100001')
+    write_profile(tmp_path, 'seaside', {'numbers': ['+15550100001']}, 2000)  # Valid JSON, fails to build
+    assert registry.resolve('+15550100001') is good
+    write_profile(tmp_path, 'seaside', '{"name": ', 3000)  # Not JSON: numbers kept from the last scan
+    assert registry.resolve('+15550100001') is good
+    assert registry.stats()['failures'] == 1
+    write_profile(tmp_path, 'seaside', {'name': 'Seaside Inn', 'numbers': ['+15550100001']}, 4000)
+    assert registry.resolve('+15550100001') is not good and registry.stats()['reloads'] == 1
+
+
+def test_profiles_without_pms_get_no_records():
+    assert _pms_settings({}) == NO_PMS
+    assert _pms_settings({'pms': {'backend': 'stub', 'rooms': {'101': {}}}})['callers'] == {}
+    with pytest.raises(ValueError):
+        _pms_settings({'pms': {'backend': 'http'}})
@@ -0,0 +1,42 @@
+# test_turn_pipeline.py - Admission and waiting in the deferred-turn pool
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from turn_pipeline import TurnPipeline  # noqa: E402
+
+
+def drained(pipeline, timeout=1.0):
+    """True once no turn is in flight (slots are freed just after a turn's waiters wake)."""
+    deadline = time.monotonic() + timeout
+    while pipeline.in_flight and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return pipeline.in_flight == 0
+
+
+def test_refuses_turns_past_max_in_flight_until_one_finishes():
+    pipeline = TurnPipeline(max_workers=2, max_in_flight=2)
+    release = threading.Event()
+    assert pipeline.submit('CA1', release.wait)
+    assert pipeline.submit('CA2', release.wait)
+    assert not pipeline.submit('CA3', release.wait)
+    assert pipeline.rejected == 1 and pipeline.in_flight == 2
+    release.set()
+    assert drained(pipeline)
+    assert pipeline.submit('CA3', release.wait)
+    pipeline.shutdown()
+
+
+def test_wait_blocks_for_the_calls_running_turn():
+    pipeline = TurnPipeline()
+    done = []
+    assert pipeline.submit('CA1', lambda: (time.sleep(0.05), done.append('CA1')))
+    assert pipeline.wait('CA1', 1.0) and done == ['CA1']
+    assert pipeline.wait('CA-unknown', 5.0) is False  # Nothing running here: returns at once
+    pipeline.shutdown()
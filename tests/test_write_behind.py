@@ -0,0 +1,81 @@
+# test_write_behind.py - Coalescing, ordering and draining in the write-behind queue
+#
+# Usage: python -m pytest tests/
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import MemorySessionStore, SQLiteSessionStore  # noqa: E402
+from write_behind import WriteBehind, WriteBehindSessionStore  # noqa: E402
+
+
+class Sink:
+    """Records each batch it is handed."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, values):
+        self.batches.append(list(values))
+
+    @property
+    def values(self):
+        return [value for batch in self.batches for value in batch]
+
+
+def idle_queue():
+    """A queue that only writes when flushed or closed."""
+    return WriteBehind(interval=60.0)
+
+
+def test_keyed_writes_coalesce():
+    queue, sink = idle_queue(), Sink()
+    queue.submit(sink, 'CA1 turn 1', key='CA1')
+    queue.submit(sink, 'CA2 turn 1', key='CA2')
+    queue.submit(sink, 'CA1 turn 2', key='CA1')
+    assert queue.pending(sink, 'CA1') == 'CA1 turn 2'
+    assert queue.flush(1.0)
+    assert sorted(sink.values) == ['CA1 turn 2', 'CA2 turn 1'] and len(sink.batches) == 1
+    assert queue.stats()['coalesced'] == 1 and queue.stats()['written'] == 2
+    queue.close()
+
+
+def test_unkeyed_writes_are_all_kept_in_order():
+    queue, sink = idle_queue(), Sink()
+    for n in range(5):
+        queue.submit(sink, n)
+    assert queue.flush(1.0)
+    assert sink.values == [0, 1, 2, 3, 4]
+    queue.close()
+
+
+def test_close_drains_the_queue():
+    queue, sink = idle_queue(), Sink()
+    queue.submit(sink, 'entry')
+    queue.submit(sink, 'state', key='CA1')
+    queue.close()
+    assert sink.values == ['entry', 'state'] and queue.stats()['pending'] == 0
+    queue.submit(sink, 'late')  # After close: written directly
+    assert sink.values[-1] == 'late'
+
+
+def test_session_store_reads_its_own_queued_writes():
+    queue = idle_queue()
+    store = WriteBehindSessionStore(MemorySessionStore(), queue)
+    store.put('CA1', {'turn': 1})
+    assert store.get('CA1') == {'turn': 1} and store.store.get('CA1') is None
+    store.delete('CA1')
+    assert store.get('CA1') is None
+    queue.close()
+    assert len(store) == 0
+
+
+def test_shared_store_writes_state_through(tmp_path):
+    queue = idle_queue()
+    store = WriteBehindSessionStore(SQLiteSessionStore(str(tmp_path / 'sessions.db')), queue)
+    store.put('CA1', {'turn': 1})
+    other_worker = SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    assert other_worker.get('CA1') == {'turn': 1}
+    queue.close()
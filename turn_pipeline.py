@@ -0,0 +1,56 @@
+# turn_pipeline.py - Bounded background pool for LLM turns (deferred replies)
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict
+
+
+class TurnPipeline:
+    """Runs one LLM turn per call on a bounded pool, refusing work past max_in_flight."""
+
+    def __init__(self, max_workers: int = 8, max_in_flight: int = 16):
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='turn')
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._futures: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, call_sid: str, fn: Callable, *args) -> bool:
+        """Queue fn(*args) for call_sid; return False (admission refused) when the pool is saturated."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:  # Executor shut down
+            self._slots.release()
+            return False
+        with self._lock:
+            self._futures[call_sid] = future
+        future.add_done_callback(lambda f: self._finished(call_sid, f))
+        return True
+
+    def _finished(self, call_sid, future):
+        self._slots.release()
+        with self._lock:
+            if self._futures.get(call_sid) is future:
+                del self._futures[call_sid]
+
+    def wait(self, call_sid: str, timeout: float) -> bool:
+        """Block up to timeout for call_sid's running turn; False at once if none is running in this process."""
+        with self._lock:
+            future = self._futures.get(call_sid)
+        if future is None:
+            return False
+        wait([future], timeout=timeout)
+        return True
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def shutdown(self, wait_for_jobs: bool = True):
+        self._executor.shutdown(wait=wait_for_jobs)
@@ -0,0 +1,240 @@
+# twiml_templates.py - TwiML responses precompiled once per language
+#
+# Every response the voice flow sends is built through VoiceResponse once per
+# language at startup, with each <Say> holding its prompt markup from
+# config.LANGUAGES / config.PROMPTS (SSML passes through untouched). The XML is
+# then split into literal chunks and {slots}, so serving a response is one join
+# with the XML-escaped dynamic fields (caller name, room, balance, reply text)
+# spliced in: no element tree and no serialization per request.
+#
+# The compiled XML can also be kept in a JSON snapshot (`python twiml_templates.py`
+# writes one next to this file, e.g. at build time). A snapshot is only used
+# while its fingerprint (the prompts, languages and this file's source) still
+# matches, and then startup skips both compiling and importing the TwiML library.
+
+import hashlib
+import json
+import os
+from html import escape
+from string import Formatter
+from typing import Dict, List, Optional
+
+from config import LANGUAGES, PROMPTS
+
+FALLBACK_LANG = 1
+MARKER = '\ue000{}\ue000'  # Private-use code points: survive ElementTree escaping unchanged
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'twiml_snapshot.json')
+
+
+def _gather_room(resp):
+    resp.gather(input='speech dtmf', num_digits=3, speech_timeout='auto', action='/room_number', method='POST', speech_model='default')
+
+
+def _gather_service(resp):
+    resp.gather(input='dtmf speech', num_digits=1, speech_timeout='auto', action='/service_selected', method='POST', speech_model='default')
+
+
+def _gather_speech(resp):
+    resp.gather(input='speech', speech_timeout='auto', action='/handle_speech', method='POST', speech_model='default', finish_on_key='#')
+
+
+# Template name -> builder(resp, say, prompt, lang_config). say(key) adds a <Say> for a prompt
+# key (or a '{slot}' literal); prompt(key) returns a prompt's text for use in attributes.
+def _welcome(resp, say, prompt, lang_config):
+    say('welcome')
+    _gather_service(resp)
+
+
+def _welcome_room(resp, say, prompt, lang_config):
+    say('welcome')
+    say('room_prompt')
+    _gather_room(resp)
+    resp.redirect('/voice')
+
+
+def _room_prompt(resp, say, prompt, lang_config):
+    say('room_prompt')
+    _gather_room(resp)
+
+
+def _room_noted(resp, say, prompt, lang_config):
+    say('room_noted')
+    _gather_service(resp)
+
+
+def _connected(resp, say, prompt, lang_config):
+    say('connected')
+    _gather_speech(resp)
+
+
+def _connected_relay(resp, say, prompt, lang_config):
+    connect = resp.connect(action='/stream_ended', method='POST')
+    connect.add_child('ConversationRelay', url='wss://{host}/relay', language=lang_config['lang'], tts_provider='Amazon',
+                      voice=lang_config['voice'].split('.', 1)[-1], welcome_greeting=prompt('connected_relay'))
+
+
+def _not_understood(resp, say, prompt, lang_config):
+    say('not_understood')
+    _gather_service(resp)
+
+
+def _reply(resp, say, prompt, lang_config):
+    say('{reply}')
+    resp.pause(length=1)
+    _listen(resp, say, prompt, lang_config)
+
+
+def _reply_goodbye(resp, say, prompt, lang_config):
+    say('{reply}')
+    resp.pause(length=1)
+    _goodbye(resp, say, prompt, lang_config)
+
+
+def _listen(resp, say, prompt, lang_config):
+    say('anything_else')
+    _gather_speech(resp)
+
+
+def _one_moment(resp, say, prompt, lang_config):
+    say('one_moment')
+    resp.redirect('/speech_reply?attempt=1')
+
+
+def _poll(resp, say, prompt, lang_config):
+    resp.redirect('/speech_reply?attempt={attempt}')
+
+
+def _hold(resp, say, prompt, lang_config):
+    say('hold')
+    resp.hangup()
+
+
+def _goodbye(resp, say, prompt, lang_config):
+    say('goodbye')
+    resp.hangup()
+
+
+def _hangup(resp, say, prompt, lang_config):
+    resp.hangup()
+
+
+def _error(resp, say, prompt, lang_config):
+    say('error')
+    resp.hangup()
+
+
+TEMPLATES = {
+    'welcome': _welcome, 'welcome_room': _welcome_room, 'room_prompt': _room_prompt, 'room_noted': _room_noted,
+    'connected': _connected, 'connected_relay': _connected_relay, 'not_understood': _not_understood,
+    'reply': _reply, 'reply_goodbye': _reply_goodbye, 'listen': _listen, 'one_moment': _one_moment, 'poll': _poll,
+    'hold': _hold, 'goodbye': _goodbye, 'hangup': _hangup, 'error': _error,
+}
+
+
+class TwimlTemplate:
+    """One precompiled response: literal chunks with named slots between them."""
+
+    def __init__(self, xml: str):
+        self.literals: List[str] = ['']
+        self.fields: List[str] = []
+        for literal, field, _, _ in Formatter().parse(xml):
+            self.literals[-1] += literal
+            if field is not None:
+                self.fields.append(field)
+                self.literals.append('')
+
+    def render(self, values: Dict) -> str:
+        out = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            out.append(escape(str(values[field])))
+            out.append(literal)
+        return ''.join(out)
+
+
+class TwimlTemplates:
+    """All TEMPLATES compiled for every language; prompts missing in a language fall back to English."""
+
+    def __init__(self, languages: Dict = LANGUAGES, prompts: Dict = PROMPTS, snapshot: Optional[str] = None):
+        self.languages = languages
+        self.prompts = prompts
+        self.from_snapshot = False
+        xml = self._load_snapshot(snapshot) if snapshot else None
+        if xml is None:
+            xml = self._compile_all()
+            if snapshot:
+                self._save_snapshot(snapshot, xml)
+        else:
+            self.from_snapshot = True
+        self._compiled = {key: TwimlTemplate(text) for key, text in xml.items()}
+
+    def prompt(self, lang: int, key: str) -> str:
+        """Raw prompt markup (with unfilled {slots}) for a language."""
+        for table in (self.languages.get(lang, {}), self.prompts.get(lang, {}), self.prompts[FALLBACK_LANG]):
+            if key in table:
+                return table[key]
+        raise KeyError(key)
+
+    def text(self, lang: int, key: str, **values) -> str:
+        """A prompt with its slots filled, for channels that take plain text (ConversationRelay)."""
+        return self.prompt(lang, key).format(**values)
+
+    def fingerprint(self) -> str:
+        """Hash of everything the compiled XML depends on."""
+        digest = hashlib.sha256(json.dumps([self.languages, self.prompts], sort_keys=True).encode())
+        with open(__file__, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def _load_snapshot(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('fingerprint') != self.fingerprint():
+            return None  # Prompts or templates changed since it was written
+        return {(name, lang): xml for name, lang, xml in data['templates']}
+
+    def _save_snapshot(self, path: str, xml: Dict) -> bool:
+        """Write the compiled XML to path (best effort: a read-only deploy just compiles every start)."""
+        data = {'fingerprint': self.fingerprint(), 'templates': [[name, lang, text] for (name, lang), text in xml.items()]}
+        try:
+            with open(f"{path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+            return True
+        except OSError:
+            return False
+
+    def _compile_all(self) -> Dict:
+        from twilio.twiml.voice_response import VoiceResponse  # Only needed when there's no usable snapshot
+        return {(name, lang): self._compile(VoiceResponse, builder, lang)
+                for lang in self.languages for name, builder in TEMPLATES.items()}
+
+    def _compile(self, response_class, builder, lang: int) -> str:
+        lang_config = self.languages[lang]
+        resp = response_class()
+        bodies = []
+
+        def say(key):
+            bodies.append(key if key.startswith('{') else self.prompt(lang, key))
+            resp.say(MARKER.format(len(bodies) - 1), voice=lang_config['voice'], language=lang_config['lang'])
+
+        builder(resp, say, lambda key: self.prompt(lang, key), lang_config)
+        xml = str(resp)
+        for i, body in enumerate(bodies):
+            xml = xml.replace(MARKER.format(i), body)
+        return xml
+
+    def render(self, name: str, lang: int = FALLBACK_LANG, **values) -> str:
+        """TwiML for a template in a language, with values escaped into its slots."""
+        template = self._compiled.get((name, lang)) or self._compiled[(name, FALLBACK_LANG)]
+        return template.render(values)
+
+
+if __name__ == '__main__':
+    # Build step: write the snapshot so instances start without compiling
+    templates = TwimlTemplates(snapshot=SNAPSHOT_PATH)
+    if not templates.from_snapshot and templates._load_snapshot(SNAPSHOT_PATH) is None:
+        raise SystemExit(f"Could not write {SNAPSHOT_PATH}")
+    print(f"{len(templates._compiled)} templates in {SNAPSHOT_PATH}")
@@ -0,0 +1,71 @@
+# voice_stream.py - Sentence-level streaming of LLM replies over a Twilio <Connect> websocket
+#
+# Raw <Stream> Media Streams only carry mu-law audio, so this uses Twilio's
+# ConversationRelay on the same <Connect> websocket transport: Twilio does the
+# speech-to-text and sends {"type": "prompt"} messages, and speaks every
+# {"type": "text"} token we send back. Each complete sentence is sent as soon
+# as the LLM has produced it, so the caller hears the first sentence while the
+# rest is still being generated.
+
+import json
+import re
+import time
+from typing import Callable, Iterable, Iterator
+
+from llm_client import LLMUnavailable
+
+# A sentence ends at . ! ? (or their CJK forms) followed by whitespace; CJK marks need no space.
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+MIN_SENTENCE_CHARS = 12  # Avoid speaking fragments like "Mr." or "1." on their own
+
+
+def split_sentences(deltas: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed text deltas into complete sentences, flushing the remainder at the end."""
+    buffer = ''
+    for delta in deltas:
+        buffer += delta
+        while True:
+            match = None
+            for candidate in SENTENCE_END.finditer(buffer):
+                if candidate.start() >= MIN_SENTENCE_CHARS:
+                    match = candidate
+                    break
+            if match is None:
+                break
+            sentence, buffer = buffer[:match.start()].strip(), buffer[match.end():]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def text_message(token: str, last: bool) -> str:
+    return json.dumps({"type": "text", "token": token, "last": last})
+
+
+def end_message(reason: str) -> str:
+    return json.dumps({"type": "end", "handoffData": json.dumps({"reason": reason})})
+
+
+def stream_reply(deltas: Iterable[str], send: Callable[[str], None], fallback: str) -> dict:
+    """Speak streamed deltas sentence by sentence; returns the full reply and time to first sentence.
+
+    complete is False if the stream broke off, leaving only the sentences spoken so far (or the fallback).
+    """
+    start = time.monotonic()
+    first_sentence_ms = None
+    spoken = []
+    complete = True
+    try:
+        for sentence in split_sentences(deltas):
+            if first_sentence_ms is None:
+                first_sentence_ms = (time.monotonic() - start) * 1000
+            send(text_message(sentence + ' ', last=False))
+            spoken.append(sentence)
+    except LLMUnavailable:
+        complete = False
+        if not spoken:
+            send(text_message(fallback, last=False))
+            spoken.append(fallback)
+    send(text_message('', last=True))
+    return {"text": ' '.join(spoken), "first_sentence_ms": first_sentence_ms, "complete": complete}
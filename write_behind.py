@@ -0,0 +1,225 @@
+# write_behind.py - Background persistence: routes queue writes, one thread batches them to storage
+#
+# Webhooks hand their writes (call state, call-log entries, post-call records)
+# to a WriteBehind queue and return at once; a writer thread flushes the queue
+# every `interval` seconds, or sooner once `batch_size` writes are waiting.
+# Keyed writes coalesce: a second write for the same (sink, key) replaces the
+# pending one, so a call saved three times in a webhook costs one store write.
+# Unkeyed writes (log appends) are all kept, in order. Each flush hands every
+# sink all of its writes at once, so a sink can batch them (one SQLite
+# transaction, one locked log append). The queue is bounded: once max_pending
+# writes are waiting, submitters block until the writer catches up. close()
+# drains everything still queued, and runs at interpreter exit, so a graceful
+# restart loses nothing.
+#
+# WriteBehindSessionStore puts a session store behind the queue. Reads check
+# the queue first, so a worker always sees its own latest writes, but no other
+# worker can see them: the queue only coalesces within one worker. Twilio sends
+# a call's next webhook to whichever worker is free, so when workers share the
+# store (SQLite) call state is written through before the webhook responds, and
+# only deletes of finished calls' state and the other sinks stay queued.
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from metrics import inc, observe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.05  # Seconds between flushes
+DEFAULT_BATCH_SIZE = 500  # Flush early once this many writes are waiting
+DEFAULT_MAX_PENDING = 10000  # Submitters block past this many waiting writes
+RETRIES = 3  # Attempts per sink batch before its writes are dropped (and logged)
+
+_MISSING = object()
+
+
+class WriteBehind:
+    """Bounded, coalescing write queue drained by one background thread."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[tuple, tuple]" = OrderedDict()  # (sink, key or seq) -> (sink, value)
+        self._inflight: Dict[tuple, object] = {}  # Keyed writes taken by the writer but not yet stored
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flushing = False
+        self.submitted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.errors = 0
+        self.blocked = 0
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, sink: Callable[[List], None], value, key: Optional[str] = None):
+        """Queue value for sink(values); with a key, replaces any write for (sink, key) still waiting."""
+        with self._cond:
+            closed = self._closed
+        if closed:  # Late write during shutdown: store it directly
+            self._write(sink, [value])
+            return
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.blocked += 1
+                inc('hotel_write_behind_blocked_total')
+                while len(self._pending) >= self.max_pending and not self._closed:
+                    self._cond.wait()
+            self.submitted += 1
+            if key is None:
+                self._seq += 1
+                slot = (sink, None, self._seq)
+            else:
+                slot = (sink, key)
+                if self._pending.pop(slot, None) is not None:
+                    self.coalesced += 1
+            self._pending[slot] = (sink, value)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def write_now(self, sink: Callable[[List], None], value, key: str):
+        """Store a keyed write on the calling thread, superseding any queued write for (sink, key)."""
+        slot = (sink, key)
+        with self._cond:
+            if self._pending.pop(slot, None) is not None:
+                self.coalesced += 1
+            while slot in self._inflight:  # An older value is being stored; this one has to land after it
+                self._cond.wait()
+            self.submitted += 1
+        self._write(sink, [value])
+        with self._cond:
+            self.written += 1
+
+    def pending(self, sink: Callable, key: str):
+        """The latest not-yet-stored value for (sink, key), or _MISSING."""
+        slot = (sink, key)
+        with self._cond:
+            entry = self._pending.get(slot)
+            if entry is not None:
+                return entry[1]
+            return self._inflight.get(slot, _MISSING)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._flushing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting writes and drain the queue (idempotent)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._write_batch()  # Whatever the writer thread didn't get to (e.g. it's stuck or never ran)
+        logger.info("Write-behind queue drained: %d written, %d coalesced", self.written, self.coalesced)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.interval)
+                if self._closed and not self._pending:
+                    return
+            self._write_batch()
+
+    def _take(self):
+        with self._cond:
+            if self._flushing:
+                return None
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                slot, entry = self._pending.popitem(last=False)
+                batch.append(entry)
+                if slot[1] is not None:
+                    self._inflight[slot] = entry[1]
+            if batch:
+                self._flushing = True
+                self._cond.notify_all()  # Room for blocked submitters
+            return batch
+
+    def _write_batch(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            start = time.perf_counter()
+            by_sink: "OrderedDict[Callable, list]" = OrderedDict()
+            for sink, value in batch:
+                by_sink.setdefault(sink, []).append(value)
+            for sink, values in by_sink.items():
+                self._write(sink, values)
+            observe('hotel_write_behind_flush_seconds', time.perf_counter() - start)
+            with self._cond:
+                self._inflight.clear()
+                self._flushing = False
+                self.written += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, sink, values):
+        for attempt in range(RETRIES):
+            try:
+                sink(values)
+                return
+            except Exception:
+                if attempt == RETRIES - 1:
+                    self.errors += 1
+                    inc('hotel_write_behind_errors_total')
+                    logger.exception("Write-behind: dropped %d writes to %s", len(values), getattr(sink, '__qualname__', sink))
+                else:
+                    time.sleep(0.05 * (attempt + 1))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {'pending': len(self._pending), 'submitted': self.submitted, 'coalesced': self.coalesced,
+                    'written': self.written, 'errors': self.errors, 'blocked': self.blocked}
+
+
+class WriteBehindSessionStore:
+    """Session store whose puts and deletes go through a WriteBehind queue, coalesced per CallSid."""
+
+    def __init__(self, store, queue: WriteBehind):
+        self.store = store
+        self.queue = queue
+        self._sink = store.write_many  # One bound method, so queue slots compare equal
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        pending = self.queue.pending(self._sink, call_sid)
+        if pending is _MISSING:
+            return self.store.get(call_sid)
+        payload = pending[1]
+        return None if payload is None else json.loads(payload)
+
+    def put(self, call_sid: str, state: Dict) -> None:
+        """Queue state for call_sid, or store it before returning if other workers read the store."""
+        if self.store.shared:
+            self.queue.write_now(self._sink, (call_sid, json.dumps(state)), key=call_sid)
+        else:
+            self.queue.submit(self._sink, (call_sid, json.dumps(state)), key=call_sid)
+
+    def delete(self, call_sid: str) -> None:
+        self.queue.submit(self._sink, (call_sid, None), key=call_sid)
+
+    def __len__(self):
+        return len(self.store)
+
+    def stats(self) -> Dict:
+        return self.store.stats()